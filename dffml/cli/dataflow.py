@@ -170,55 +170,48 @@ class RunAllRecords(RunCMD):
         async for record in sctx.records():
             yield record
 
-    async def run_dataflow(self, orchestrator, sources, dataflow):
-        # Orchestrate the running of these operations
-        async with orchestrator(dataflow) as octx, sources() as sctx:
-            # Add our inputs to the input network with the context being the
-            # record key
-            inputs = []
-            async for record in self.records(sctx):
-                # Skip running DataFlow if record already has features
-                existing_features = record.features()
-                if self.caching and all(
-                    map(
-                        lambda cached: cached in existing_features,
-                        self.caching,
-                    )
-                ):
-                    continue
+    async def input_sets(self, sctx, dataflow):
+        """
+        Create an input set for each record, with the context being the record
+        key
+        """
+        async for record in self.records(sctx):
+            # Skip running DataFlow if record already has features
+            existing_features = record.features()
+            if self.caching and all(
+                map(lambda cached: cached in existing_features, self.caching)
+            ):
+                continue
 
-                record_inputs = []
-                for value, def_name in self.inputs:
-                    record_inputs.append(
-                        Input(
-                            value=value,
-                            definition=dataflow.definitions[def_name],
-                        )
-                    )
-                if self.record_def:
-                    record_inputs.append(
-                        Input(
-                            value=record.key,
-                            definition=dataflow.definitions[self.record_def],
-                        )
+            record_inputs = []
+            for value, def_name in self.inputs:
+                record_inputs.append(
+                    Input(
+                        value=value, definition=dataflow.definitions[def_name]
                     )
-
-                # TODO(p1) When OrchestratorContext is fixed to accept an
-                # asyncgenerator we won't have to build a list
-                inputs.append(
-                    MemoryInputSet(
-                        MemoryInputSetConfig(
-                            ctx=StringInputSetContext(record.key),
-                            inputs=record_inputs,
-                        )
+                )
+            if self.record_def:
+                record_inputs.append(
+                    Input(
+                        value=record.key,
+                        definition=dataflow.definitions[self.record_def],
                     )
                 )
 
-            if not inputs:
-                return
+            yield MemoryInputSet(
+                MemoryInputSetConfig(
+                    ctx=StringInputSetContext(record.key),
+                    inputs=record_inputs,
+                )
+            )
 
+    async def run_dataflow(self, orchestrator, sources, dataflow):
+        # Orchestrate the running of these operations
+        async with orchestrator(dataflow) as octx, sources() as sctx:
+            # Add our inputs to the input network as the orchestrator has room
+            # to run them
             async for ctx, results in octx.run(
-                *inputs, strict=not self.no_strict
+                self.input_sets(sctx, dataflow), strict=not self.no_strict
             ):
                 ctx_str = (await ctx.handle()).as_string()
                 # TODO(p4) Make a RecordInputSetContext which would let us
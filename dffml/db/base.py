@@ -40,6 +40,7 @@ class BaseDatabaseContext(
         self.parent = parent
 
     @classmethod
+    @functools.lru_cache(maxsize=1024)
     def sanitize_non_bindable(self, val):
         if val.replace("_", "").isalnum():
             return val
@@ -54,12 +55,12 @@ class BaseDatabaseContext(
         def scrub(obj):
             if isinstance(obj, str):
                 return self.sanitize_non_bindable(obj)
-            if isinstance(obj, Dict):
+            if isinstance(obj, dict):
                 nobj = {
                     self.sanitize_non_bindable(k): v for k, v in obj.items()
                 }
                 return nobj
-            if isinstance(obj, List):
+            if isinstance(obj, list):
                 nobj = list(map(scrub, obj))
                 return nobj
             if isinstance(obj, Condition):
@@ -106,6 +107,17 @@ class BaseDatabaseContext(
         table `table_name`
         """
 
+    async def insert_many(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Inserts each row in `data` into the table `table_name`. Databases which
+        can insert many rows at once should override this, by default it calls
+        `insert` for each row.
+        """
+        for row in data:
+            await self.insert(table_name, row)
+
     @abc.abstractmethod
     async def update(
         self,
@@ -147,6 +159,18 @@ class BaseDatabaseContext(
         except:
             await self.update(table_name, data, conditions=[])
 
+    async def insert_or_update_many(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Inserts each row in `data` into the table `table_name`, or updates the
+        row already in the table if one conflicts with it. Databases which can
+        upsert many rows at once should override this, by default it calls
+        `insert_or_update` for each row.
+        """
+        for row in data:
+            await self.insert_or_update(table_name, row)
+
 
 @base_entry_point("dffml.db", "db")
 class BaseDatabase(BaseDataFlowObject):
@@ -1,10 +1,14 @@
 """
 Base classes to wrap various SQL based databases in dffml.db abstraction.
 """
+import functools
 from typing import Dict, Any, List, Tuple, Optional
 
 from .base import BaseDatabaseContext, Conditions
 
+# Number of query strings of each type SQLDatabaseContext keeps
+QUERY_CACHE_SIZE: int = 1024
+
 
 class SQLDatabaseContext(BaseDatabaseContext):
     # BIND_DECLARATION is the string used to bind a param
@@ -29,42 +33,156 @@ class SQLDatabaseContext(BaseDatabaseContext):
                 'values':
                      ['John', 'Miles', '38']
                 }
+
+        The ``IN`` and ``NOT IN`` operations take a list of values, each of
+        which is bound separately.
         """
 
-        def _make_condition_expression(conditions):
-            def make_or(lst):
-                val_list = []
-                exp = []
+        if not conditions:
+            return None
+        return {
+            "expression": cls.condition_expression(
+                cls.condition_shape(conditions)
+            ),
+            "values": cls.condition_values(conditions),
+        }
+
+    @classmethod
+    def condition_shape(cls, conditions) -> Optional[Tuple]:
+        """
+        Returns everything about ``conditions`` which is part of the text of a
+        query, the column and operation of each condition and the number of
+        values of ``IN`` and ``NOT IN`` conditions. Returns ``None`` if there
+        are no conditions. Queries with conditions of the same shape have the
+        same text.
+        """
+        if not conditions:
+            return None
+        return tuple(
+            tuple(
+                (
+                    cnd.column,
+                    cnd.operation,
+                    len(cnd.value)
+                    if cnd.operation.upper() in ("IN", "NOT IN")
+                    else None,
+                )
+                for cnd in lst
+            )
+            for lst in conditions
+        )
 
-                for cnd in lst:
+    @classmethod
+    def condition_values(cls, conditions) -> List[Any]:
+        """
+        Returns the values to bind for ``conditions``, in the order they appear
+        in the expression
+        """
+        values = []
+        for lst in conditions or []:
+            for cnd in lst:
+                if cnd.operation.upper() in ("IN", "NOT IN"):
+                    values.extend(cnd.value)
+                else:
+                    values.append(cnd.value)
+        return values
+
+    @classmethod
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def condition_expression(cls, shape: Tuple) -> str:
+        """
+        Returns the expression for conditions of the given shape, see
+        :py:meth:`condition_shape`
+        """
+        exps = []
+        for lst in shape:
+            exp = []
+            for column, operation, count in lst:
+                if count is not None:
+                    binds = ", ".join([cls.BIND_DECLARATION] * count)
+                    exp.append(f"(`{column}` {operation} ( {binds} ) )")
+                else:
                     exp.append(
-                        f"(`{cnd.column}` {cnd.operation} {cls.BIND_DECLARATION} )"
+                        f"(`{column}` {operation} {cls.BIND_DECLARATION} )"
                     )
-                    val_list.append(cnd.value)
-
-                result = {"expression": " OR ".join(exp), "values": val_list}
+            exps.append(f"({' OR '.join(exp)})")
+        return " AND ".join(exps)
 
-                return result
+    # The *_query_text methods create the text of queries. They are cached
+    # since dataflows often make the same shape of query over and over. Their
+    # arguments must already be sanitized, which the *_query methods are.
 
-            lst = map(make_or, conditions)
+    @classmethod
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def insert_query_text(cls, table_name: str, cols: Tuple[str]) -> str:
+        col_exp = ", ".join([f"`{col}`" for col in cols])
+        return (
+            f"INSERT INTO {table_name} "
+            + f"( {col_exp} )"
+            + f" VALUES( {', '.join([cls.BIND_DECLARATION] * len(cols))} ) "
+        )
 
-            result_exps = []
-            result_vals = []
-            for result in lst:
-                temp_exp = result["expression"]
-                temp_exp = f"({temp_exp})"
-                result_exps.append(temp_exp)
-                result_vals.extend(result["values"])
+    @classmethod
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def insert_or_update_query_text(
+        cls,
+        table_name: str,
+        cols: Tuple[str],
+        unique_cols: Tuple[Tuple[str, ...], ...],
+    ) -> str:
+        query = cls.insert_query_text(table_name, cols)
+        # One clause for each constraint, SQLite uses the one which conflicts
+        for key_cols in unique_cols:
+            update_cols = [col for col in cols if col not in key_cols]
+            conflict_exp = ", ".join([f"`{col}`" for col in key_cols])
+            query += f"ON CONFLICT ( {conflict_exp} ) "
+            if update_cols:
+                query += "DO UPDATE SET " + " ,".join(
+                    [f"`{col}` = excluded.`{col}`" for col in update_cols]
+                )
+            else:
+                query += "DO NOTHING"
+            query += " "
+        return query
 
-            result_exps = " AND ".join(result_exps)
-            result = {"expression": result_exps, "values": result_vals}
+    @classmethod
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def update_query_text(
+        cls, table_name: str, cols: Tuple[str], shape: Optional[Tuple]
+    ) -> str:
+        return (
+            f"UPDATE {table_name} SET "
+            + " ,".join([f"`{col}` = {cls.BIND_DECLARATION}" for col in cols])
+            + (
+                f" WHERE {cls.condition_expression(shape)}"
+                if shape is not None
+                else ""
+            )
+        )
 
-            return result
+    @classmethod
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def lookup_query_text(
+        cls, table_name: str, cols: Tuple[str], shape: Optional[Tuple]
+    ) -> str:
+        if not cols:
+            col_exp = "*"
+        else:
+            col_exp = ", ".join([f"`{col}`" for col in cols])
+        return f"SELECT {col_exp} FROM {table_name} " + (
+            f" WHERE {cls.condition_expression(shape)}"
+            if shape is not None
+            else ""
+        )
 
-        condition_dict = None
-        if (not conditions == None) and (len(conditions) != 0):
-            condition_dict = _make_condition_expression(conditions)
-        return condition_dict
+    @classmethod
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def remove_query_text(cls, table_name: str, shape: Optional[Tuple]) -> str:
+        return f"DELETE FROM {table_name} " + (
+            f" WHERE {cls.condition_expression(shape)}"
+            if shape is not None
+            else ""
+        )
 
     def create_table_query(
         self, table_name: str, cols: Dict[str, str], *args, **kwargs
@@ -115,13 +233,48 @@ class SQLDatabaseContext(BaseDatabaseContext):
         parameters : tuple
             Variables to bind
         """
-        col_exp = ", ".join([f"`{col}`" for col in data])
-        query = (
-            f"INSERT INTO {table_name} "
-            + f"( {col_exp} )"
-            + f" VALUES( {', '.join([self.BIND_DECLARATION] * len(data))} ) "
+        return (
+            self.insert_query_text(table_name, tuple(data)),
+            list(data.values()),
+        )
+
+    def insert_or_update_query(
+        self,
+        table_name: str,
+        data: Dict[str, Any],
+        unique_cols: List[List[str]],
+        *args,
+        **kwargs,
+    ) -> None:
+        """
+        Creates an insert query which updates the existing row instead when
+        the values of the columns of any of ``unique_cols`` conflict with one
+        already in ``table_name``. Only the columns in ``data`` which aren't
+        in the conflicting constraint are updated.
+
+        Parameters
+        ----------
+        table_name : str
+            Name of the table.
+        data : dict
+            Columns names are keys, values are data to insert.
+        unique_cols : list
+            Columns of each primary key or unique constraint to check for
+            conflicts. If empty the query is a plain ``INSERT`` query.
+
+        Returns
+        -------
+        query : str
+            ``INSERT`` query with an ``ON CONFLICT`` clause
+        parameters : tuple
+            Variables to bind
+        """
+        return (
+            self.insert_or_update_query_text(
+                table_name, tuple(data), tuple(map(tuple, unique_cols))
+            ),
+            list(data.values()),
         )
-        return query, list(data.values())
 
     def update_query(
         self,
@@ -149,22 +302,10 @@ class SQLDatabaseContext(BaseDatabaseContext):
         parameters : tuple
             Variables to bind
         """
-        query_values = list(data.values())
-        condition_dict = self.make_condition_expression(conditions)
-
-        if condition_dict is not None:
-            condition_exp = condition_dict["expression"]
-            query_values.extend(condition_dict["values"])
-        else:
-            condition_exp = None
-
-        query = (
-            f"UPDATE {table_name} SET "
-            + " ,".join([f"`{col}` = {self.BIND_DECLARATION}" for col in data])
-            + (f" WHERE {condition_exp}" if condition_exp is not None else "")
+        query = self.update_query_text(
+            table_name, tuple(data), self.condition_shape(conditions)
         )
-
-        return query, query_values
+        return query, list(data.values()) + self.condition_values(conditions)
 
     def lookup_query(
         self,
@@ -191,25 +332,10 @@ class SQLDatabaseContext(BaseDatabaseContext):
         parameters : tuple
             Variables to bind
         """
-
-        condition_dict = self.make_condition_expression(conditions)
-        query_values = []
-        if condition_dict is not None:
-            condition_exp = condition_dict["expression"]
-            query_values.extend(condition_dict["values"])
-        else:
-            condition_exp = None
-
-        if not cols:
-            col_exp = "*"
-        else:
-            col_exp = ", ".join([f"`{col}`" for col in cols])
-
-        query = f"SELECT {col_exp} FROM {table_name} " + (
-            f" WHERE {condition_exp}" if condition_exp is not None else ""
+        query = self.lookup_query_text(
+            table_name, tuple(cols or ()), self.condition_shape(conditions)
         )
-
-        return query, query_values
+        return query, self.condition_values(conditions)
 
     def remove_query(
         self, table_name: str, conditions: Optional[Conditions] = None
@@ -232,16 +358,7 @@ class SQLDatabaseContext(BaseDatabaseContext):
         parameters : tuple
             Variables to bind
         """
-        condition_dict = self.make_condition_expression(conditions)
-        query_values = []
-        if condition_dict is not None:
-            condition_exp = condition_dict["expression"]
-            query_values = condition_dict["values"]
-        else:
-            condition_exp = None
-
-        query = f"DELETE FROM {table_name} " + (
-            f" WHERE {condition_exp}" if condition_exp is not None else ""
+        query = self.remove_query_text(
+            table_name, self.condition_shape(conditions)
         )
-
-        return query, query_values
+        return query, self.condition_values(conditions)
@@ -1,17 +1,112 @@
 import asyncio
 import sqlite3
-from typing import Dict, Any, List, Optional, AsyncIterator
+import functools
+import itertools
+import contextlib
+import concurrent.futures
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 
 
 from .base import BaseDatabase, Conditions
 from .sql import SQLDatabaseContext
-from ..base import config
+from ..base import config, field
 from ..util.entrypoint import entrypoint
 
+# Number of ON CONFLICT clauses an insert can have. Since SQLite 3.35 there
+# can be one for each unique constraint, before that one, and none before 3.24
+if sqlite3.sqlite_version_info >= (3, 35, 0):
+    UPSERT_CLAUSES = None
+elif sqlite3.sqlite_version_info >= (3, 24, 0):
+    UPSERT_CLAUSES = 1
+else:
+    UPSERT_CLAUSES = 0
+
 
 @config
 class SqliteDatabaseConfig:
     filename: str
+    fetch_size: int = field(
+        "Number of rows lookup fetches from the database at a time",
+        default=1000,
+    )
+    readers: int = field(
+        "Number of connections lookups read from while the writer connection "
+        "writes. Lookups use the writer connection if 0 or if the database is "
+        "in memory",
+        default=4,
+    )
+    journal_mode: str = field(
+        "Journal mode of the database, in WAL mode lookups don't have to wait "
+        "for writes",
+        default="WAL",
+    )
+    synchronous: str = field(
+        "How often SQLite waits for writes to reach the disk", default="NORMAL"
+    )
+    cache_size: int = field(
+        "Pages of cache for each connection, or KiB of cache if negative",
+        default=None,
+    )
+    mmap_size: int = field(
+        "Bytes of the database file each connection memory maps",
+        default=None,
+    )
+
+
+def execute(db: sqlite3.Connection, query: str, query_values=()) -> None:
+    with db:
+        db.execute(query, query_values)
+
+
+def executemany(
+    db: sqlite3.Connection, queries: List[Tuple[str, List[List[Any]]]]
+) -> None:
+    """
+    Runs each query with executemany for each of its list of values, all in
+    one transaction
+    """
+    with db:
+        for query, rows in queries:
+            db.executemany(query, rows)
+
+
+def fetchmany(
+    _db: sqlite3.Connection, cursor: sqlite3.Cursor, size: int
+) -> List[sqlite3.Row]:
+    return cursor.fetchmany(size)
+
+
+def close(_db: sqlite3.Connection, cursor: sqlite3.Cursor) -> None:
+    cursor.close()
+
+
+def table_unique_cols(
+    db: sqlite3.Connection, table_name: str
+) -> List[List[str]]:
+    """
+    Columns of the primary key of ``table_name`` followed by the columns of
+    each of its unique indexes. Partial indexes and indexes on expressions
+    are left out since they can't be the target of ``ON CONFLICT``.
+    """
+    rows = db.execute(f"PRAGMA table_info({table_name})").fetchall()
+    cols = [
+        row["name"]
+        for row in sorted(rows, key=lambda row: row["pk"])
+        if row["pk"]
+    ]
+    unique_cols = [cols] if cols else []
+    for index in db.execute(f"PRAGMA index_list({table_name})").fetchall():
+        if (
+            not index["unique"]
+            or index["partial"]
+            or index["origin"] == "pk"
+        ):
+            continue
+        rows = db.execute(f'PRAGMA index_info("{index["name"]}")').fetchall()
+        cols = [row["name"] for row in rows]
+        if None not in cols and cols not in unique_cols:
+            unique_cols.append(cols)
+    return unique_cols
 
 
 class SqliteDatabaseContext(SQLDatabaseContext):
@@ -20,14 +115,21 @@ class SqliteDatabaseContext(SQLDatabaseContext):
     ) -> None:
         query = self.create_table_query(table_name, cols)
         self.logger.debug(query)
-        self.parent.cursor.execute(query)
+        await self.parent.write(execute, query)
+        # The table may have been created with different constraints
+        self.parent.unique_cols.pop(table_name, None)
 
     async def insert(self, table_name: str, data: Dict[str, Any]) -> None:
         query, query_values = self.insert_query(table_name, data)
-        async with self.parent.lock:
-            with self.parent.db:
-                self.logger.debug(query)
-                self.parent.cursor.execute(query, list(data.values()))
+        self.logger.debug(query)
+        await self.parent.write(execute, query, query_values)
+
+    async def insert_many(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> None:
+        await self.parent.write(
+            executemany, self.group_rows(self.insert_query, table_name, data)
+        )
 
     async def update(
         self,
@@ -38,10 +140,8 @@ class SqliteDatabaseContext(SQLDatabaseContext):
         query, query_values = self.update_query(
             table_name, data, conditions=conditions
         )
-        async with self.parent.lock:
-            with self.parent.db:
-                self.logger.debug(query)
-                self.parent.cursor.execute(query, query_values)
+        self.logger.debug(query)
+        await self.parent.write(execute, query, query_values)
 
     async def lookup(
         self,
@@ -52,12 +152,26 @@ class SqliteDatabaseContext(SQLDatabaseContext):
         query, query_values = self.lookup_query(
             table_name, cols=cols, conditions=conditions
         )
-        async with self.parent.lock:
-            with self.parent.db:
-                self.logger.debug(query)
-                self.parent.cursor.execute(query, query_values)
-                for row in self.parent.cursor.fetchall():
-                    yield dict(row)
+        self.logger.debug(query)
+        # Rows are fetched fetch_size at a time so they don't all have to be
+        # in memory at once
+        async with self.parent.reader() as read:
+            cursor = await read(
+                sqlite3.Connection.execute, query, query_values
+            )
+            try:
+                while True:
+                    rows = await read(
+                        fetchmany, cursor, self.parent.config.fetch_size
+                    )
+                    if not rows:
+                        return
+                    for row in rows:
+                        yield dict(row)
+            finally:
+                # Closed in the thread which uses the connection, holding the
+                # lock if the connection is the writer's
+                await read(close, cursor)
 
     async def remove(
         self, table_name: str, conditions: Optional[Conditions] = None
@@ -65,31 +179,104 @@ class SqliteDatabaseContext(SQLDatabaseContext):
         query, query_values = self.remove_query(
             table_name, conditions=conditions
         )
-        async with self.parent.lock:
-            with self.parent.db:
-                self.logger.debug(query)
-                self.parent.cursor.execute(query, query_values)
+        self.logger.debug(query)
+        await self.parent.write(execute, query, query_values)
 
     async def insert_or_update(self, table_name: str, data: Dict[str, Any]):
+        await self.insert_or_update_many(table_name, [data])
+
+    async def insert_or_update_many(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> None:
+        def upsert(db: sqlite3.Connection):
+            if table_name not in self.parent.unique_cols:
+                self.parent.unique_cols[table_name] = table_unique_cols(
+                    db, table_name
+                )
+            unique_cols = self.parent.unique_cols[table_name]
+            if (
+                UPSERT_CLAUSES is not None
+                and len(unique_cols) > UPSERT_CLAUSES
+            ):
+                with db:
+                    for row in data:
+                        self.upsert_row(db, table_name, unique_cols, row)
+                return
+            executemany(
+                db,
+                self.group_rows(
+                    lambda table_name, row: self.insert_or_update_query(
+                        table_name, row, unique_cols
+                    ),
+                    table_name,
+                    data,
+                ),
+            )
+
+        await self.parent.write(upsert)
+
+    def upsert_row(
+        self,
+        db: sqlite3.Connection,
+        table_name: str,
+        unique_cols: List[List[str]],
+        data: Dict[str, Any],
+    ) -> None:
+        """
+        Inserts a row, or if it conflicts with one on a unique constraint
+        updates that one. Used when this version of SQLite can't have an
+        ``ON CONFLICT`` clause for each of the table's unique constraints.
+        """
+        query, query_values = self.insert_query(table_name, data)
         try:
-            await self.insert(table_name, data)
-        except sqlite3.IntegrityError as e:
-            # Hack to get primary key out of error message
-            # Error : ` UNIQUE constraint failed: myTable.id `
-            e = repr(e)
-            replaces = "'`()"
-            for s in replaces:
-                e = e.replace(s, "")
-            _key = e.split("UNIQUE constraint failed:")[-1]
-            _key = _key.split(table_name + ".")[-1]
-
-            _keyval = data.pop(_key)
-            conditions = [[[_key, "=", _keyval]]]
-            await self.update(table_name, data, conditions)
+            db.execute(query, query_values)
+            return
+        except sqlite3.IntegrityError:
+            conflicts = [
+                key_cols
+                for key_cols in unique_cols
+                if all(col in data for col in key_cols)
+            ]
+            if not conflicts:
+                raise
+        for key_cols in conflicts:
+            update_data = {
+                col: value
+                for col, value in data.items()
+                if col not in key_cols
+            }
+            if not update_data:
+                return
+            query, query_values = self.update_query(
+                table_name,
+                update_data,
+                conditions=[[[col, "=", data[col]]] for col in key_cols],
+            )
+            if db.execute(query, query_values).rowcount:
+                return
+
+    def group_rows(self, make_query, table_name: str, data):
+        """
+        Groups rows by the columns they have and creates a query for each
+        group with ``make_query``, so that each group can be written with one
+        call to ``executemany``.
+        """
+        queries = []
+        for cols, rows in itertools.groupby(data, key=tuple):
+            query, _query_values = make_query(table_name, dict.fromkeys(cols))
+            self.logger.debug(query)
+            queries.append((query, [list(row.values()) for row in rows]))
+        return queries
 
 
 @entrypoint("sqlite")
 class SqliteDatabase(BaseDatabase):
+    """
+    Writes go through one connection, lookups read from a pool of connections
+    while it writes. Queries run in threads so they don't block the event
+    loop.
+    """
+
     CONFIG = SqliteDatabaseConfig
     CONTEXT = SqliteDatabaseContext
 
@@ -98,10 +285,117 @@ class SqliteDatabase(BaseDatabase):
         self.lock = None
         self.db = None
         self.cursor = None
+        self.readers = None
+        self.executor = None
+        self.readers_executor = None
+        # Set once the last write started has finished
+        self.written = None
+        # Operations sharing the database each enter it
+        self.entered = 0
+        # Maps table names to the columns of each of their unique constraints,
+        # which are used to detect conflicts on upsert
+        self.unique_cols = {}
+
+    def connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.config.filename, check_same_thread=False)
+        db.row_factory = sqlite3.Row
+        for pragma in ["synchronous", "cache_size", "mmap_size"]:
+            value = getattr(self.config, pragma)
+            if value is None:
+                continue
+            if not str(value).lstrip("-").isalnum():
+                raise ValueError(f"Invalid value for {pragma}: {value!r}")
+            db.execute(f"PRAGMA {pragma} = {value}")
+        return db
+
+    async def write(self, func, *args):
+        """
+        Calls func with the writer connection and args in the writer's thread.
+        Only one call uses the writer at a time.
+        """
+        written = asyncio.get_event_loop().create_future()
+        self.written = written
+        try:
+            async with self.lock:
+                return await asyncio.get_event_loop().run_in_executor(
+                    self.executor, functools.partial(func, self.db, *args)
+                )
+        finally:
+            if not written.done():
+                written.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def reader(self):
+        """
+        Takes a reader connection from the pool until exiting, yields a
+        function which calls func with it and args in a reader thread. If
+        there's no pool then calls are made with the writer connection.
+
+        Waits for writes which were started before it to finish first, so that
+        lookups see them.
+        """
+        if self.written is not None:
+            # Shielded so that cancelling one lookup doesn't cancel the future
+            # every other lookup waits on
+            await asyncio.shield(self.written)
+        readers = self.readers
+        if readers is None:
+            yield self.write
+            return
+        db = await readers.get()
+
+        def read(func, *args):
+            return asyncio.get_event_loop().run_in_executor(
+                self.readers_executor, functools.partial(func, db, *args)
+            )
+
+        try:
+            yield read
+        finally:
+            readers.put_nowait(db)
 
     async def __aenter__(self):
+        self.entered += 1
+        if self.entered > 1:
+            return await super().__aenter__()
         self.lock = asyncio.Lock()
-        self.db = sqlite3.connect(self.config.filename)
-        self.db.row_factory = sqlite3.Row
+        self.written = None
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1
+            )
+        self.db = self.connect()
         self.cursor = self.db.cursor()
+        self.readers = None
+        if ":memory:" in self.config.filename:
+            # Each connection to an in memory database has its own database
+            return await super().__aenter__()
+        journal_mode = self.config.journal_mode
+        if not journal_mode.isalnum():
+            raise ValueError(
+                f"Invalid value for journal_mode: {journal_mode!r}"
+            )
+        self.db.execute(f"PRAGMA journal_mode = {journal_mode}")
+        if self.config.readers:
+            if self.readers_executor is None:
+                self.readers_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.config.readers
+                )
+            self.readers = asyncio.Queue()
+            for _i in range(self.config.readers):
+                self.readers.put_nowait(self.connect())
         return await super().__aenter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.entered -= 1
+        if not self.entered:
+            if self.readers is not None:
+                while not self.readers.empty():
+                    self.readers.get_nowait().close()
+                self.readers = None
+            for executor in [self.executor, self.readers_executor]:
+                if executor is not None:
+                    executor.shutdown()
+            self.executor = None
+            self.readers_executor = None
+        await super().__aexit__(exc_type, exc_value, traceback)
@@ -11,11 +11,12 @@ from typing import (
     Union,
     Optional,
     Set,
+    Callable,
 )
 from contextlib import asynccontextmanager
 
 from .exceptions import NotOpImp
-from .types import Operation, Input, Parameter, Stage, Definition
+from .types import Operation, Input, Parameter, Stage, Definition, DataFlow
 
 from .log import LOGGER
 
@@ -184,6 +185,11 @@ def op(*args, imp_enter=None, ctx_enter=None, config_cls=None, **kwargs):
     iterated over and the values in that ``dict`` are entered. The value yielded
     upon entry is assigned to a parameter in the ``OperationImplementation``
     instance named after the respective key.
+
+    Non-async functions are called on the event loop, unless ``execution`` is
+    given as :py:class:`Execution.THREAD <dffml.df.types.Execution>` or
+    :py:class:`Execution.PROCESS <dffml.df.types.Execution>`, in which case the
+    operation implementation network runs them in a thread or process pool.
     """
 
     def wrap(func):
@@ -304,9 +310,19 @@ def op(*args, imp_enter=None, ctx_enter=None, config_cls=None, **kwargs):
                         return await bound(**inputs)
                     elif inspect.iscoroutinefunction(func):
                         return await func(**inputs)
-                    else:
-                        # TODO Add auto thread pooling of non-async functions
+                    elif (
+                        self.octx is None
+                        or inspect.isasyncgenfunction(func)
+                        or inspect.isgeneratorfunction(func)
+                    ):
                         return func(**inputs)
+                    else:
+                        # Let the operation implementation network run the
+                        # function inline, in a thread pool or in a process
+                        # pool, depending on the operation's execution mode
+                        return await self.octx.nctx.run_function(
+                            self.parent.op, func, inputs
+                        )
 
             func.imp = type(
                 f"{cls_name}Implementation",
@@ -440,6 +456,15 @@ class BaseKeyValueStoreContext(BaseDataFlowObjectContext):
         Get a value in the key value store
         """
 
+    async def delete(self, *keys: str):
+        """
+        Remove keys from the key value store. Key value stores which can remove
+        keys should override this, by default each key is set to None, which
+        is what get returns for keys which aren't present.
+        """
+        for key in keys:
+            await self.set(key, None)
+
 
 @base_entry_point("dffml.kvstore", "kvstore")
 class BaseKeyValueStore(BaseDataFlowObject):
@@ -534,6 +559,8 @@ class BaseParameterSetConfig(NamedTuple):
 
 
 class BaseParameterSet(abc.ABC):
+    __slots__ = ("config", "ctx", "logger")
+
     def __init__(self, config: BaseParameterSetConfig) -> None:
         self.config = config
         self.ctx = config.ctx
@@ -622,11 +649,22 @@ class BaseInputNetworkContext(BaseDataFlowObjectContext):
         self,
         rctx: "BaseRedundancyCheckerContext",
         operation: Operation,
+        dataflow: DataFlow,
         ctx: Optional[BaseInputSetContext] = None,
+        *,
+        new_input_set: Optional[BaseInputSet] = None,
     ) -> AsyncIterator[BaseParameterSet]:
         """
         Generate all possible permutations of applicable inputs for an operation
-        that, according to the redundancy checker, haven't been run yet.
+        that, according to the redundancy checker, haven't been run yet. If
+        new_input_set is given, only permutations which include at least one of
+        its inputs need to be generated.
+        """
+
+    async def remove_ctx(self, ctx: BaseInputSetContext):
+        """
+        Remove a context and all of its inputs from the network. Called by the
+        orchestrator once a context has completed.
         """
 
 
@@ -689,10 +727,6 @@ class BaseRedundancyCheckerConfig(NamedTuple):
     key_value_store: BaseKeyValueStore
 
 
-# TODO store redundancy checks by BaseInputSetContext.handle() and add method
-# to remove all associated with a particular handle. Aka allow us to clean up
-# the input, redundancy, etc. networks after execution of a context completes
-# via the orchestrator.
 class BaseRedundancyCheckerContext(BaseDataFlowObjectContext):
     """
     Abstract Base Class for redundancy checking context
@@ -708,6 +742,12 @@ class BaseRedundancyCheckerContext(BaseDataFlowObjectContext):
     async def add(self, operation: Operation, parameter_set: BaseParameterSet):
         pass
 
+    async def remove_ctx(self, ctx: BaseInputSetContext):
+        """
+        Remove all redundancy checks associated with a context. Called by the
+        orchestrator once a context has completed.
+        """
+
 
 @base_entry_point("dffml.redundancy.checker", "rchecker")
 class BaseRedundancyChecker(BaseDataFlowObject):
@@ -717,7 +757,6 @@ class BaseRedundancyChecker(BaseDataFlowObject):
     """
 
 
-# TODO Provide a way to clear out all locks for inputs within a context
 class BaseLockNetworkContext(BaseDataFlowObjectContext):
     @abc.abstractmethod
     async def acquire(self, parameter_set: BaseParameterSet) -> bool:
@@ -726,6 +765,12 @@ class BaseLockNetworkContext(BaseDataFlowObjectContext):
         the parameter set.
         """
 
+    async def remove_ctx(self, ctx: BaseInputSetContext):
+        """
+        Remove the locks for inputs within a context. Called by the
+        orchestrator once a context has completed.
+        """
+
 
 @base_entry_point("dffml.lock.network", "lock", "network")
 class BaseLockNetwork(BaseDataFlowObject):
@@ -767,6 +812,16 @@ class BaseOperationImplementationNetworkContext(BaseDataFlowObjectContext):
         return the results.
         """
 
+    async def run_function(
+        self, operation: Operation, func: Callable, inputs: Dict[str, Any]
+    ) -> Union[bool, Dict[str, Any]]:
+        """
+        Call the non-async function behind an operation. Networks which are
+        able to should run it as requested by the operation's execution mode,
+        by default it's called directly.
+        """
+        return func(**inputs)
+
     @abc.abstractmethod
     async def operation_completed(self):
         """
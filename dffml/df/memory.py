@@ -1,14 +1,15 @@
 import io
 import copy
+import pickle
 import asyncio
 import secrets
-import hashlib
 import inspect
+import functools
 import itertools
 import traceback
 import concurrent.futures
 from itertools import product, chain
-from contextlib import asynccontextmanager, AsyncExitStack, ExitStack
+from contextlib import asynccontextmanager, AsyncExitStack
 from typing import (
     AsyncIterator,
     Dict,
@@ -20,14 +21,25 @@ from typing import (
     Optional,
     Set,
     Callable,
+    Iterable,
+    Iterator,
 )
 
 from .exceptions import (
     ContextNotPresent,
     DefinitionNotInContext,
     ValidatorMissing,
+    NotPicklable,
+)
+from .types import (
+    Input,
+    Parameter,
+    Definition,
+    Operation,
+    Stage,
+    Execution,
+    DataFlow,
 )
-from .types import Input, Parameter, Definition, Operation, Stage, DataFlow
 from .base import (
     OperationException,
     OperationImplementation,
@@ -64,7 +76,7 @@ from .base import (
 from ..util.entrypoint import entrypoint
 from ..util.cli.arg import Arg
 from ..util.data import ignore_args
-from ..util.asynchelper import aenter_stack, concurrently
+from ..util.asynchelper import aenter_stack
 
 from .log import LOGGER
 
@@ -112,6 +124,11 @@ class MemoryKeyValueStoreContext(BaseKeyValueStoreContext):
                 return True
         return False
 
+    async def delete(self, *keys: str):
+        async with self.lock:
+            for key in keys:
+                self.memory.pop(key, None)
+
 
 @entrypoint("memory")
 class MemoryKeyValueStore(BaseKeyValueStore, BaseMemoryDataFlowObject):
@@ -169,6 +186,8 @@ class MemoryParameterSetConfig(NamedTuple):
 
 
 class MemoryParameterSet(BaseParameterSet):
+    __slots__ = ("__parameters",)
+
     def __init__(self, config: MemoryParameterSetConfig) -> None:
         super().__init__(config)
         self.__parameters = config.parameters
@@ -244,7 +263,8 @@ class NotificationSet(object):
 class MemoryInputNetworkContextEntry(NamedTuple):
     ctx: BaseInputSetContext
     definitions: Dict[Definition, List[Input]]
-    by_origin: Dict[Union[str, Tuple[str, str]], List[Input]]
+    # Index of inputs by their origin and then by the name of their definition
+    by_origin: Dict[Union[str, Tuple[str, str]], Dict[str, List[Input]]]
 
 
 class MemoryDefinitionSetContext(BaseDefinitionSetContext):
@@ -253,7 +273,7 @@ class MemoryDefinitionSetContext(BaseDefinitionSetContext):
         handle = await self.ctx.handle()
         handle_string = handle.as_string()
         # Associate inputs with their context handle grouped by definition
-        async with self.parent.ctxhd_lock:
+        async with self.parent.ctx_lock(handle_string):
             # Yield all items under the context for the given definition
             entry = self.parent.ctxhd[handle_string]
             for item in entry.definitions[definition]:
@@ -268,9 +288,34 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
         self.ctx_notification_set = NotificationSet()
         self.input_notification_set = {}
         # Organize by context handle string then by definition within that
-        self.ctxhd: Dict[str, Dict[Definition, Any]] = {}
-        # TODO Create ctxhd_locks dict to manage a per context lock
+        self.ctxhd: Dict[str, MemoryInputNetworkContextEntry] = {}
+        # Each context has its own lock so that contexts never block each
+        # other. ctxhd_lock is only held to create a context's lock, or to look
+        # at which contexts are present
         self.ctxhd_lock = asyncio.Lock()
+        self.ctxhd_locks: Dict[str, asyncio.Lock] = {}
+        # Number of times a context's lock was acquired, and how many of those
+        # times had to wait for it to be released. Useful for tuning
+        self.ctx_lock_acquired = 0
+        self.ctx_lock_contended = 0
+
+    @asynccontextmanager
+    async def ctx_lock(self, handle_string: str):
+        """
+        Acquire the lock for the context with the given handle string, creating
+        it if it doesn't exist yet.
+        """
+        lock = self.ctxhd_locks.get(handle_string, None)
+        if lock is None:
+            async with self.ctxhd_lock:
+                lock = self.ctxhd_locks.setdefault(
+                    handle_string, asyncio.Lock()
+                )
+        self.ctx_lock_acquired += 1
+        if lock.locked():
+            self.ctx_lock_contended += 1
+        async with lock:
+            yield
 
     async def receive_from_parent_flow(self, inputs: List[Input]):
         """
@@ -289,23 +334,10 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
         # Grab the input set context handle
         handle = await input_set.ctx.handle()
         handle_string = handle.as_string()
-        # TODO These ctx.add calls should probably happen after inputs are in
-        # self.ctxhd
-
         # remove unvalidated inputs
         unvalidated_input_set = await input_set.remove_unvalidated_inputs()
-
-        # If the context for this input set does not exist create a
-        # NotificationSet for it to notify the orchestrator
-        if not handle_string in self.input_notification_set:
-            self.input_notification_set[handle_string] = NotificationSet()
-            async with self.ctx_notification_set() as ctx:
-                await ctx.add((None, input_set.ctx))
-        # Add the input set to the incoming inputs
-        async with self.input_notification_set[handle_string]() as ctx:
-            await ctx.add((unvalidated_input_set, input_set))
         # Associate inputs with their context handle grouped by definition
-        async with self.ctxhd_lock:
+        async with self.ctx_lock(handle_string):
             # Create dict for handle_string if not present
             if not handle_string in self.ctxhd:
                 self.ctxhd[handle_string] = MemoryInputNetworkContextEntry(
@@ -323,11 +355,21 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
                 self.ctxhd[handle_string].definitions[item.definition].append(
                     item
                 )
-                # Create set for item origin if not present
-                if not item.origin in self.ctxhd[handle_string].by_origin:
-                    self.ctxhd[handle_string].by_origin[item.origin] = []
-                # Add input to by origin set
-                self.ctxhd[handle_string].by_origin[item.origin].append(item)
+                # Add input to by origin and definition name index
+                self.ctxhd[handle_string].by_origin.setdefault(
+                    item.origin, {}
+                ).setdefault(item.definition.name, []).append(item)
+        # Notify the orchestrator only once inputs are in self.ctxhd, so that
+        # gather_inputs will be able to pair them with the existing inputs.
+        # If the context for this input set does not exist create a
+        # NotificationSet for it to notify the orchestrator
+        if not handle_string in self.input_notification_set:
+            self.input_notification_set[handle_string] = NotificationSet()
+            async with self.ctx_notification_set() as ctx:
+                await ctx.add((None, input_set.ctx))
+        # Add the input set to the incoming inputs
+        async with self.input_notification_set[handle_string]() as ctx:
+            await ctx.add((unvalidated_input_set, input_set))
 
     async def uadd(self, *args: Input):
         """
@@ -380,6 +422,29 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
         async with self.ctx_notification_set() as ctx:
             return await ctx.added()
 
+    async def remove_ctx(self, ctx: BaseInputSetContext):
+        """
+        Remove a context along with its inputs, its notification set and its
+        lock.
+        """
+        handle_string = (await ctx.handle()).as_string()
+        async with self.ctx_lock(handle_string):
+            self.ctxhd.pop(handle_string, None)
+            self.input_notification_set.pop(handle_string, None)
+        async with self.ctxhd_lock:
+            self.ctxhd_locks.pop(handle_string, None)
+        # Nothing waits on new contexts while a dataflow runs, so drop the
+        # notification of this context having been added if it's still there
+        notifications = self.ctx_notification_set
+        async with notifications.lock:
+            notifications.notification_items = [
+                item
+                for item in notifications.notification_items
+                if (await item[1].handle()).as_string() != handle_string
+            ]
+            if not notifications.notification_items:
+                notifications.event_added.clear()
+
     async def added(
         self, watch_ctx: BaseInputSetContext
     ) -> Tuple[bool, BaseInputSet]:
@@ -401,12 +466,12 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
     async def definition(
         self, ctx: BaseInputSetContext, definition: str
     ) -> Definition:
-        async with self.ctxhd_lock:
-            # Grab the input set context handle
-            handle_string = (await ctx.handle()).as_string()
-            # Ensure that the handle_string is present in ctxhd
-            if not handle_string in self.ctxhd:
-                raise ContextNotPresent(handle_string)
+        # Grab the input set context handle
+        handle_string = (await ctx.handle()).as_string()
+        # Ensure that the handle_string is present in ctxhd
+        if not handle_string in self.ctxhd:
+            raise ContextNotPresent(handle_string)
+        async with self.ctx_lock(handle_string):
             # Search through the definitions to find one with a matching name
             found = list(
                 filter(
@@ -427,137 +492,190 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
     ) -> BaseDefinitionSetContext:
         return MemoryDefinitionSetContext(self.config, self, ctx)
 
+    @staticmethod
+    def _index_keys(
+        operation: Operation, dataflow: DataFlow
+    ) -> Tuple[
+        List[Tuple[Union[str, Tuple[str, str]], str]],
+        Dict[str, List[Tuple[Union[str, Tuple[str, str]], str]]],
+    ]:
+        """
+        Resolve the (origin, definition name) keys of the by_origin index
+        under which the conditions and inputs of an operation will be found.
+        """
+        # Grab the input flow to check for definition overrides
+        input_flow = dataflow.flow[operation.instance_name]
+        # TODO(p2) We favored comparing names to defintions because sometimes
+        # we create defintions which have specs which create new types which
+        # will not equal each other. We maybe want to consider switching to
+        # comparing exported Defintions
+        conditions = []
+        for i, condition_source in enumerate(input_flow.conditions):
+            if isinstance(condition_source, dict):
+                for origin in condition_source.items():
+                    conditions.append(
+                        (
+                            origin,
+                            dataflow.operations[origin[0]]
+                            .outputs[origin[1]]
+                            .name,
+                        )
+                    )
+            else:
+                conditions.append(
+                    (condition_source, operation.conditions[i].name)
+                )
+        inputs = {}
+        for input_name, input_sources in input_flow.inputs.items():
+            inputs[input_name] = []
+            for input_source in input_sources:
+                if isinstance(input_source, dict):
+                    for origin in input_source.items():
+                        inputs[input_name].append(
+                            (
+                                origin,
+                                dataflow.operations[origin[0]]
+                                .outputs[origin[1]]
+                                .name,
+                            )
+                        )
+                else:
+                    inputs[input_name].append(
+                        (input_source, operation.inputs[input_name].name)
+                    )
+        return conditions, inputs
+
+    @staticmethod
+    def delta_product(
+        every: List[Iterable[Input]], new: List[List[Input]]
+    ) -> Iterator[Tuple[Input, ...]]:
+        """
+        Permutations of inputs which contain at least one new input. Each
+        permutation is generated exactly once, at the position of its first new
+        input. Positions before it only take old inputs, positions after it take
+        every input.
+        """
+        new_uids = set(item.uid for item in chain(*new))
+        positions = [i for i, items in enumerate(new) if items]
+        if not positions:
+            return
+        # Only copy out the inputs for positions permutations will be drawn
+        # from. If new inputs only fill one position, then no existing inputs
+        # need to be copied for it
+        every = [
+            list(items) if positions[0] < i or i < positions[-1] else []
+            for i, items in enumerate(every)
+        ]
+        old = [
+            [item for item in items if item.uid not in new_uids]
+            for items in every
+        ]
+        for i in positions:
+            yield from product(*old[:i], new[i], *every[i + 1 :])
+
     async def gather_inputs(
         self,
         rctx: "BaseRedundancyCheckerContext",
         operation: Operation,
         dataflow: DataFlow,
         ctx: Optional[BaseInputSetContext] = None,
+        *,
+        new_input_set: Optional[BaseInputSet] = None,
     ) -> AsyncIterator[BaseParameterSet]:
-        # Create a mapping of definitions to inputs for that definition
-        gather: Dict[str, List[Parameter]] = {}
-        async with self.ctxhd_lock:
-            # If no context is given we will generate input pairs for all
-            # contexts
-            contexts = self.ctxhd.values()
+        # Keys of the by_origin index conditions and inputs will be under
+        condition_keys, input_keys = self._index_keys(operation, dataflow)
+        # If we were told which inputs just entered the network, only pair
+        # those against the existing inputs
+        new_inputs: Optional[Dict[str, List[Input]]] = None
+        if new_input_set is not None:
+            new_inputs = {input_name: [] for input_name in input_keys}
+            relevant = False
+            async for item in new_input_set.inputs():
+                key = (item.origin, item.definition.name)
+                # A condition may have changed, every permutation of the
+                # existing inputs must be considered
+                if key in condition_keys:
+                    new_inputs = None
+                    break
+                for input_name, keys in input_keys.items():
+                    if key in keys:
+                        new_inputs[input_name].append(item)
+                        relevant = True
+            # None of the new inputs are of use to this operation
+            if new_inputs is not None and not relevant:
+                return
+        # Create a mapping of input names to the lists of inputs within the
+        # by_origin index which that input can be taken from
+        gather: Dict[str, List[List[Input]]] = {}
+        # If no context is given we will generate input pairs for all contexts
+        if ctx is None:
+            async with self.ctxhd_lock:
+                handle_strings = list(self.ctxhd.keys())
+        else:
             # If a context is given only search definitions within that context
-            if not ctx is None:
-                # Grab the input set context handle
-                handle_string = (await ctx.handle()).as_string()
-                # Ensure that the handle_string is present in ctxhd
-                if not handle_string in self.ctxhd:
-                    return
-                # Limit search to given context via context handle
-                contexts = [self.ctxhd[handle_string]]
-            for ctx, _, by_origin in contexts:
-                # Grab the input flow to check for definition overrides
-                input_flow = dataflow.flow[operation.instance_name]
+            handle_strings = [(await ctx.handle()).as_string()]
+        for handle_string in handle_strings:
+            # Ensure that the handle_string is present in ctxhd
+            if not handle_string in self.ctxhd:
+                return
+            async with self.ctx_lock(handle_string):
+                ctx, _, by_origin = self.ctxhd[handle_string]
                 # TODO(p1) This only checks that Inputs that are present are
                 # true. If there are none present, the operation will run
                 # Check that all conditions are present and logicly True
-                for i, condition_source in enumerate(input_flow.conditions):
-                    # Create a list of places this input originates from
-                    origins = []
-                    if isinstance(condition_source, dict):
-                        for origin in condition_source.items():
-                            origins.append(origin)
-                    else:
-                        origins.append(condition_source)
-                    # Ensure all conditions from all origins are True
-                    for origin in origins:
-                        # Bail if the condition doesn't exist
-                        if not origin in by_origin:
+                for origin, definition_name in condition_keys:
+                    # Bail if the condition doesn't exist
+                    if not origin in by_origin:
+                        return
+                    # Bail if the condition is not True
+                    for item in by_origin[origin].get(definition_name, []):
+                        if not bool(item.value):
                             return
-                        # Bail if the condition is not True
-                        for item in by_origin[origin]:
-                            # TODO(p2) Alright, this shits fucked, way not clean
-                            # / clear. We're just trying to skip any conditions
-                            # (and inputs for input_flow.inputs.items()) where
-                            # the definition doesn't match, but it's within the
-                            # correct origin.
-                            if isinstance(condition_source, str):
-                                if (
-                                    item.definition.name
-                                    != operation.conditions[i].name
-                                ):
-                                    continue
-                            elif (
-                                item.definition.name
-                                != dataflow.operations[origin[0]]
-                                .outputs[origin[1]]
-                                .name
-                            ):
-                                continue
-                            if not bool(item.value):
-                                return
                 # Gather all inputs with matching definitions and contexts
-                for input_name, input_sources in input_flow.inputs.items():
-                    # Create parameters for all the inputs
-                    gather[input_name] = []
-                    for input_source in input_sources:
-                        # Create a list of places this input originates from
-                        origins = []
-                        if isinstance(input_source, dict):
-                            for origin in input_source.items():
-                                origins.append(origin)
-                        else:
-                            origins.append(input_source)
-                        for origin in origins:
-                            # Don't try to grab inputs from an origin that
-                            # doesn't have any to give us
-                            if not origin in by_origin:
-                                continue
-                            # Generate parameters from inputs
-                            for item in by_origin[origin]:
-                                # TODO(p2) We favored comparing names to
-                                # defintions because sometimes we create
-                                # defintions which have specs which create new
-                                # types which will not equal each other. We
-                                # maybe want to consider switching to comparing
-                                # exported Defintions
-                                if isinstance(input_source, str):
-                                    if (
-                                        item.definition.name
-                                        != operation.inputs[input_name].name
-                                    ):
-                                        continue
-                                elif (
-                                    item.definition.name
-                                    != dataflow.operations[origin[0]]
-                                    .outputs[origin[1]]
-                                    .name
-                                ):
-                                    continue
-                                gather[input_name].append(
-                                    Parameter(
-                                        key=input_name,
-                                        value=item.value,
-                                        origin=item,
-                                        definition=operation.inputs[
-                                            input_name
-                                        ],
-                                    )
-                                )
+                for input_name, keys in input_keys.items():
+                    gather[input_name] = [
+                        by_origin[origin][definition_name]
+                        for origin, definition_name in keys
+                        if definition_name in by_origin.get(origin, {})
+                    ]
                     # Return if there is no data for an input
                     if not gather[input_name]:
                         return
-        # Generate all possible permutations of applicable inputs
-        # Create the parameter set for each
-        products = list(
-            map(
-                lambda permutation: MemoryParameterSet(
-                    MemoryParameterSetConfig(ctx=ctx, parameters=permutation)
-                ),
-                product(*list(gather.values())),
+        every = [chain(*lists) for lists in gather.values()]
+        if new_inputs is None:
+            # Generate all possible permutations of applicable inputs
+            permutations = product(*every)
+        else:
+            # Generate only the permutations which include new inputs
+            permutations = self.delta_product(
+                every, [new_inputs[input_name] for input_name in gather]
             )
-        )
-        # Check if each permutation has been executed before
-        async for parameter_set, taken in rctx.take_if_non_existant(
-            operation, *products
-        ):
-            # If taken then yield the permutation
-            if taken:
-                yield parameter_set
+        # Permutations are generated lazily. Each one is turned into a
+        # parameter set and checked for having been executed before as it's
+        # generated, rather than building the list of every permutation first
+        for permutation in permutations:
+            # Create the parameter set for the permutation
+            parameter_set = MemoryParameterSet(
+                MemoryParameterSetConfig(
+                    ctx=ctx,
+                    parameters=[
+                        Parameter(
+                            key=input_name,
+                            value=item.value,
+                            origin=item,
+                            definition=operation.inputs[input_name],
+                        )
+                        for input_name, item in zip(gather, permutation)
+                    ],
+                )
+            )
+            # Check if the permutation has been executed before
+            async for parameter_set, taken in rctx.take_if_non_existant(
+                operation, parameter_set
+            ):
+                # If taken then yield the permutation
+                if taken:
+                    yield parameter_set
 
 
 @entrypoint("memory")
@@ -641,6 +759,9 @@ class MemoryRedundancyCheckerContext(BaseRedundancyCheckerContext):
     ) -> None:
         super().__init__(config, parent)
         self.kvctx = None
+        # Maps context handle strings to the keys taken within that context,
+        # so that they can be removed once the context completes
+        self.ctx_keys: Dict[str, List[str]] = {}
 
     async def __aenter__(self) -> "MemoryRedundancyCheckerContext":
         self.__stack = AsyncExitStack()
@@ -654,94 +775,69 @@ class MemoryRedundancyCheckerContext(BaseRedundancyCheckerContext):
         await self.__stack.aclose()
 
     @staticmethod
-    def _unique(instance_name: str, handle: str, *uids: str) -> str:
-        """
-        SHA384 hash of the parameter set context handle as a string, the
-        operation.instance_name, and the sorted list of input uuids.
-        """
-        uid_list = [instance_name, handle] + sorted(uids)
-        return hashlib.sha384("".join(uid_list).encode("utf-8")).hexdigest()
-
-    async def unique(
-        self, operation: Operation, parameter_set: BaseParameterSet
+    def key(
+        handle_string: str,
+        instance_name: str,
+        parameters: Iterable[Parameter],
     ) -> str:
         """
-        SHA384 hash of the parameter set context handle as a string, the
-        operation.instance_name, and the sorted list of input uuids.
+        Key a parameter set is stored under in the key value store, made from
+        the context handle, the operation.instance_name, and the sorted list
+        of the uids of the inputs the parameters came from. Parameter sets with
+        the same inputs have the same key regardless of the order of their
+        parameters.
         """
-        return self._unique(
-            operation.instance_name,
-            (await parameter_set.ctx.handle()).as_string(),
-            *[item.origin.uid async for item in parameter_set.parameters()],
-        )
-
-    async def _take(self, coro) -> bool:
-        return await self.kvctx.conditional_set(
-            await coro, "\x01", checker=lambda value: value != "\x01"
-        )
+        uids = sorted(parameter.origin.uid for parameter in parameters)
+        return "\x00".join([handle_string, instance_name, *map(str, uids)])
 
     async def take_if_non_existant(
         self, operation: Operation, *parameter_sets: BaseParameterSet
     ) -> bool:
-        # TODO(p4) Run tests to choose an optimal threaded vs non-threaded value
-        if len(parameter_sets) < 4:
-            for parameter_set in parameter_sets:
-                yield parameter_set, await self._take(
-                    self.unique(operation, parameter_set)
-                )
-        else:
-            async for parameter_set, taken in concurrently(
-                {
-                    asyncio.create_task(
-                        self._take(
-                            self.parent.loop.run_in_executor(
-                                self.parent.pool,
-                                self._unique,
-                                operation.instance_name,
-                                (await parameter_set.ctx.handle()).as_string(),
-                                *[
-                                    item.origin.uid
-                                    async for item in parameter_set.parameters()
-                                ],
-                            )
-                        )
-                    ): parameter_set
-                    for parameter_set in parameter_sets
-                }
-            ):
-                yield parameter_set, taken
+        # Context of the last parameter set checked. All parameter sets in a
+        # batch usually belong to the same context
+        ctx = None
+        for parameter_set in parameter_sets:
+            if parameter_set.ctx is not ctx:
+                ctx = parameter_set.ctx
+                handle_string = (await ctx.handle()).as_string()
+                ctx_keys = self.ctx_keys.setdefault(handle_string, [])
+            if isinstance(parameter_set, MemoryParameterSet):
+                parameters = parameter_set.config.parameters
+            else:
+                parameters = [
+                    parameter async for parameter in parameter_set.parameters()
+                ]
+            key = self.key(handle_string, operation.instance_name, parameters)
+            taken = await self.kvctx.conditional_set(
+                key, "\x01", checker=lambda value: value != "\x01"
+            )
+            if taken:
+                ctx_keys.append(key)
+            yield parameter_set, taken
+
+    async def remove_ctx(self, ctx: BaseInputSetContext):
+        keys = self.ctx_keys.pop((await ctx.handle()).as_string(), [])
+        await self.kvctx.delete(*keys)
 
 
 @entrypoint("memory")
 class MemoryRedundancyChecker(BaseRedundancyChecker, BaseMemoryDataFlowObject):
     """
-    Redundancy Checker backed by Memory Key Value Store
+    Redundancy Checker backed by a Key Value Store, Memory Key Value Store by
+    default
     """
 
     CONTEXT = MemoryRedundancyCheckerContext
 
-    def __init__(self, config):
-        super().__init__(config)
-        self.loop = None
-        self.pool = None
-        self.__pool = None
-
     async def __aenter__(self) -> "MemoryRedundancyCheckerContext":
         self.__stack = AsyncExitStack()
-        self.__exit_stack = ExitStack()
-        self.__exit_stack.__enter__()
         await self.__stack.__aenter__()
         self.key_value_store = await self.__stack.enter_async_context(
             self.config.key_value_store
         )
-        self.loop = asyncio.get_event_loop()
-        self.pool = self.__exit_stack.enter_context(
-            concurrent.futures.ThreadPoolExecutor()
-        )
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
-        self.__exit_stack.__exit__(exc_type, exc_value, traceback)
         await self.__stack.__aexit__(exc_type, exc_value, traceback)
 
     @classmethod
@@ -772,7 +868,10 @@ class MemoryLockNetworkContext(BaseLockNetworkContext):
     ) -> None:
         super().__init__(config, parent)
         self.lock = asyncio.Lock()
-        self.locks: Dict[str, asyncio.Lock] = {}
+        self.locks: Dict[int, asyncio.Lock] = {}
+        # Maps context handle strings to the uids of inputs locked within
+        # that context
+        self.ctx_locks: Dict[str, Set[int]] = {}
 
     @asynccontextmanager
     async def acquire(self, parameter_set: BaseParameterSet):
@@ -781,6 +880,7 @@ class MemoryLockNetworkContext(BaseLockNetworkContext):
         prior to running an operation using the input.
         """
         need_lock = {}
+        handle_string = (await parameter_set.ctx.handle()).as_string()
         # Acquire the master lock to find and or create needed locks
         async with self.lock:
             # Get all the inputs up the ancestry tree
@@ -795,6 +895,10 @@ class MemoryLockNetworkContext(BaseLockNetworkContext):
                     self.locks[item.uid] = asyncio.Lock()
                 # Retrieve the lock
                 need_lock[item.uid] = (item, self.locks[item.uid])
+            if need_lock:
+                self.ctx_locks.setdefault(handle_string, set()).update(
+                    need_lock
+                )
         # Use AsyncExitStack to lock the variable amount of inputs required
         async with AsyncExitStack() as stack:
             # Take all the locks we found we needed for this parameter set
@@ -806,6 +910,17 @@ class MemoryLockNetworkContext(BaseLockNetworkContext):
             # All locks for these parameters have been acquired
             yield
 
+    async def remove_ctx(self, ctx: BaseInputSetContext):
+        async with self.lock:
+            for uid in self.ctx_locks.pop(
+                (await ctx.handle()).as_string(), set()
+            ):
+                # Inputs may be shared with other contexts (for instance when
+                # forwarded from a parent flow), leave locks which are held
+                lock = self.locks.get(uid, None)
+                if lock is not None and not lock.locked():
+                    del self.locks[uid]
+
 
 @entrypoint("memory")
 class MemoryLockNetwork(BaseLockNetwork, BaseMemoryDataFlowObject):
@@ -817,6 +932,15 @@ class MemoryOperationImplementationNetworkConfig(NamedTuple):
     operations: Dict[str, OperationImplementation]
 
 
+def run_pickled(pickled: bytes) -> Any:
+    """
+    Unpickle a function and its inputs and call it. Used to run functions in
+    a process pool.
+    """
+    func, inputs = pickle.loads(pickled)
+    return func(**inputs)
+
+
 class MemoryOperationImplementationNetworkContext(
     BaseOperationImplementationNetworkContext
 ):
@@ -961,6 +1085,34 @@ class MemoryOperationImplementationNetworkContext(
             self.logger.debug("---")
             return outputs
 
+    async def run_function(
+        self, operation: Operation, func: Callable, inputs: Dict[str, Any]
+    ) -> Union[bool, Dict[str, Any]]:
+        """
+        Call the non-async function behind an operation on the event loop, in
+        a thread pool or in a process pool, depending on the operation's
+        execution mode.
+        """
+        if operation.execution == Execution.INLINE:
+            return func(**inputs)
+        pool = self.parent.pool(operation.execution)
+        if operation.execution == Execution.THREAD:
+            return await asyncio.get_event_loop().run_in_executor(
+                pool, functools.partial(func, **inputs)
+            )
+        # Pickle here so that a function or inputs which can't be sent to
+        # another process result in an error, rather than a broken pool
+        try:
+            pickled = pickle.dumps((func, inputs))
+        except (pickle.PicklingError, TypeError, AttributeError) as error:
+            raise NotPicklable(
+                "%s: Function and inputs must be picklable to run in a "
+                "process pool" % (operation.instance_name,)
+            ) from error
+        return await asyncio.get_event_loop().run_in_executor(
+            pool, run_pickled, pickled
+        )
+
     async def operation_completed(self):
         await self.completed_event.wait()
         self.completed_event.clear()
@@ -974,7 +1126,8 @@ class MemoryOperationImplementationNetworkContext(
     ):
         """
         Run an operation in the background and add its outputs to the input
-        network when complete
+        network when complete. The caller must hold a slot to run the
+        operation in from ``octx.acquire_operation_slot``.
         """
         # Ensure that we can run the operation
         # Lock all inputs which cannot be used simultaneously
@@ -1008,12 +1161,14 @@ class MemoryOperationImplementationNetworkContext(
                 for key, output in an_output.items():
                     if not key in expand:
                         output = [output]
+                    # All inputs created from this output share their origin
+                    origin = (operation.instance_name, key)
                     for value in output:
                         new_input = Input(
                             value=value,
                             definition=operation.outputs[key],
                             parents=parents,
-                            origin=(operation.instance_name, key),
+                            origin=origin,
                         )
                         new_input.validated = set_valid
                         inputs.append(new_input)
@@ -1040,12 +1195,17 @@ class MemoryOperationImplementationNetworkContext(
         parameter_set: BaseParameterSet,
     ):
         """
-        Schedule the running of an operation
+        Schedule the running of an operation. Waits for a free slot to run the
+        operation in before creating its task, so that operations beyond
+        max_ops and max_ops_per_instance wait as parameter sets which haven't
+        been generated yet rather than as tasks.
         """
         self.logger.debug("[DISPATCH] %s", operation.instance_name)
+        release = await octx.acquire_operation_slot(operation)
         task = asyncio.create_task(
             self.run_dispatch(octx, operation, parameter_set)
         )
+        task.add_done_callback(ignore_args(release))
         task.add_done_callback(ignore_args(self.completed_event.set))
         return task
 
@@ -1060,11 +1220,7 @@ class MemoryOperationImplementationNetworkContext(
         for operation in octx.config.dataflow.operations.values():
             if operation.inputs:
                 continue
-            task = asyncio.create_task(
-                self.run_dispatch(octx, operation, empty_parameter_set)
-            )
-            task.add_done_callback(ignore_args(self.completed_event.set))
-            yield task
+            yield await self.dispatch(octx, operation, empty_parameter_set)
 
 
 @entrypoint("memory")
@@ -1074,6 +1230,32 @@ class MemoryOperationImplementationNetwork(
 
     CONTEXT = MemoryOperationImplementationNetworkContext
 
+    def __init__(self, config: BaseConfig) -> None:
+        super().__init__(config)
+        # Maps execution modes to the pools they run functions in
+        self.pools: Dict[Execution, concurrent.futures.Executor] = {}
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        for pool in self.pools.values():
+            pool.shutdown()
+        self.pools = {}
+
+    def pool(self, execution: Execution) -> concurrent.futures.Executor:
+        """
+        Thread or process pool for an execution mode, created on first use so
+        that pools are only started if operations ask for them.
+        """
+        if not execution in self.pools:
+            if execution == Execution.THREAD:
+                self.pools[execution] = concurrent.futures.ThreadPoolExecutor()
+            elif execution == Execution.PROCESS:
+                self.pools[
+                    execution
+                ] = concurrent.futures.ProcessPoolExecutor()
+            else:
+                raise ValueError(f"No pool for {execution}")
+        return self.pools[execution]
+
     @classmethod
     def args(cls, args, *above) -> Dict[str, Arg]:
         # Enable the user to specify operation implementations to be loaded via
@@ -1109,11 +1291,30 @@ class MemoryOperationImplementationNetwork(
         )
 
 
-class MemoryOrchestratorConfig(BaseOrchestratorConfig):
+class MemoryOrchestratorConfig(BaseConfig, NamedTuple):
     """
-    Same as base orchestrator config
+    Same as base orchestrator config, with limits on how much work may be in
+    flight at the same time. None means no limit.
     """
 
+    input_network: BaseInputNetwork
+    operation_network: BaseOperationNetwork
+    lock_network: BaseLockNetwork
+    opimp_network: BaseOperationImplementationNetwork
+    rchecker: BaseRedundancyChecker
+    # Maximum number of contexts running at the same time. Contexts beyond that
+    # are not seeded until running ones complete
+    max_ctxs: Optional[int] = None
+    # Maximum number of operations running at the same time, across all
+    # contexts of an orchestrator context
+    max_ops: Optional[int] = None
+    # Maximum number of operations running at the same time for each
+    # operation instance
+    max_ops_per_instance: Optional[int] = None
+    # Keep the inputs, redundancy checks and locks of contexts once they have
+    # completed, rather than removing them after their results are yielded
+    keep_ctxs: bool = False
+
 
 class MemoryOrchestratorContextConfig(NamedTuple):
     uid: str
@@ -1133,6 +1334,47 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
         self._stack = None
         # Maps instance_name to OrchestratorContext
         self.subflows = {}
+        # Limit the number of operations running at the same time
+        self.ops_semaphore = None
+        if self.parent.config.max_ops is not None:
+            self.ops_semaphore = asyncio.Semaphore(self.parent.config.max_ops)
+        # Maps instance_name to the semaphore limiting the number of running
+        # operations for that operation instance
+        self.instance_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def acquire_operation_slot(
+        self, operation: Operation
+    ) -> Callable[[], None]:
+        """
+        Wait until the operation may run without exceeding max_ops or
+        max_ops_per_instance. Operations are admitted in the order they started
+        waiting. Returns a function which releases the slot.
+        """
+        semaphores = []
+        if self.parent.config.max_ops_per_instance is not None:
+            if not operation.instance_name in self.instance_semaphores:
+                self.instance_semaphores[
+                    operation.instance_name
+                ] = asyncio.Semaphore(self.parent.config.max_ops_per_instance)
+            semaphores.append(
+                self.instance_semaphores[operation.instance_name]
+            )
+        if self.ops_semaphore is not None:
+            semaphores.append(self.ops_semaphore)
+        acquired = []
+
+        def release():
+            for semaphore in acquired:
+                semaphore.release()
+
+        try:
+            for semaphore in semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+        except:
+            release()
+            raise
+        return release
 
     async def __aenter__(self) -> "BaseOrchestratorContext":
         # TODO(subflows) In all of these contexts we are about to enter, they
@@ -1287,108 +1529,162 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
                     instance_name
                 ].ictx.receive_from_parent_flow(inputs)
 
-    # TODO(dfass) Get rid of run_operations, make it run_dataflow. Pass down the
-    # dataflow to everything. Make inputs a list of InputSets or an
-    # asyncgenerator of InputSets. Add a parameter which tells us if we should
-    # exit when all operations are complete or continue to wait for more inputs
-    # from the asyncgenerator. Make that parameter an asyncio.Event
-    async def run(
+    async def seeds(
         self,
-        *input_sets: Union[List[Input], BaseInputSet],
-        strict: bool = True,
+        input_sets: Tuple[
+            Union[
+                List[Input],
+                BaseInputSet,
+                Dict[str, List[Input]],
+                AsyncIterator[Union[List[Input], BaseInputSet]],
+            ],
+            ...,
+        ],
         ctx: Optional[BaseInputSetContext] = None,
-        halt: Optional[asyncio.Event] = None,
-    ) -> AsyncIterator[Tuple[BaseContextHandle, Dict[str, Any]]]:
+    ) -> AsyncIterator[Tuple[List[Input], Dict[str, Any]]]:
         """
-        Run a DataFlow.
+        Yields the inputs to forward to subflows and the keyword arguments to
+        seed_inputs for each of the contexts run() was asked to run.
         """
-        # Lists of contexts we care about for this dataflow
-        ctxs: List[BaseInputSetContext] = []
-        self.logger.debug("Running %s: %s", self.config.dataflow, input_sets)
         if not input_sets:
             # If there are no input sets, add only seed inputs
-            ctxs.append(await self.seed_inputs(ctx=ctx))
-            await self.forward_inputs_to_subflow(self.config.dataflow.seed)
-        if len(input_sets) == 1 and inspect.isasyncgen(input_sets[0]):
-            # Check if inputs is an asyncgenerator
-            # If it is, start a coroutine to wait for new inputs or input sets
-            # from it. When new inputs are received, add the seed inputs from
-            # the dataflow to the context.
-            # TODO(dfass) Grab inputs from asyncgen, combine with seed
-            raise NotImplementedError("asyncgen not yet supported")
+            yield self.config.dataflow.seed, {"ctx": ctx}
+        elif len(input_sets) == 1 and hasattr(input_sets[0], "__aiter__"):
+            # If inputs is an async iterator, pull input sets from it as we
+            # have room to start contexts for them
+            async for input_set in input_sets[0]:
+                yield [], {"ctx": ctx, "input_set": input_set}
         elif len(input_sets) == 1 and isinstance(input_sets[0], dict):
             # Helper to quickly add inputs under string context
             for ctx_string, input_set in input_sets[0].items():
-                await self.forward_inputs_to_subflow(input_set)
-                ctxs.append(
-                    await self.seed_inputs(
-                        ctx=StringInputSetContext(ctx_string),
-                        input_set=input_set,
-                    )
-                )
+                yield input_set, {
+                    "ctx": StringInputSetContext(ctx_string),
+                    "input_set": input_set,
+                }
         else:
             # For inputs sets that are of type BaseInputSetContext or list
             for input_set in input_sets:
-                ctxs.append(
-                    await self.seed_inputs(ctx=ctx, input_set=input_set)
+                yield [], {"ctx": ctx, "input_set": input_set}
+
+    # TODO(dfass) Get rid of run_operations, make it run_dataflow. Pass down the
+    # dataflow to everything. Add a parameter which tells us if we should exit
+    # when all operations are complete or continue to wait for more inputs from
+    # the asyncgenerator. Make that parameter an asyncio.Event
+    async def run(
+        self,
+        *input_sets: Union[
+            List[Input],
+            BaseInputSet,
+            Dict[str, List[Input]],
+            AsyncIterator[Union[List[Input], BaseInputSet]],
+        ],
+        strict: bool = True,
+        ctx: Optional[BaseInputSetContext] = None,
+        halt: Optional[asyncio.Event] = None,
+    ) -> AsyncIterator[Tuple[BaseContextHandle, Dict[str, Any]]]:
+        """
+        Run a DataFlow.
+
+        Input sets may be given as lists of inputs, input sets, a dict mapping
+        context strings to lists of inputs, or a single async iterator of lists
+        of inputs or input sets. An async iterator is only pulled from when
+        there is room to start another context (see max_ctxs). Results are
+        yielded as contexts complete.
+        """
+        self.logger.debug("Running %s: %s", self.config.dataflow, input_sets)
+        # Limit the number of contexts running at the same time. A slot is
+        # released once the results of a context have been yielded
+        max_ctxs = self.parent.config.max_ctxs
+        ctx_slots = None
+        if max_ctxs is not None:
+            ctx_slots = asyncio.Semaphore(max_ctxs)
+        # Tasks are placed on this queue when they complete
+        completed = asyncio.Queue()
+        # Tasks running operations for contexts
+        tasks = set()
+
+        async def start_ctxs():
+            async for forward, kwargs in self.seeds(input_sets, ctx=ctx):
+                if ctx_slots is not None:
+                    await ctx_slots.acquire()
+                await self.forward_inputs_to_subflow(forward)
+                # Contexts are only seeded when they are started
+                seeded_ctx = await self.seed_inputs(**kwargs)
+                self.logger.debug(
+                    "kickstarting context: %s",
+                    (await seeded_ctx.handle()).as_string(),
                 )
+                task = asyncio.create_task(
+                    self.run_operations_for_ctx(seeded_ctx, strict=strict)
+                )
+                task.ctx = seeded_ctx
+                task.add_done_callback(completed.put_nowait)
+                tasks.add(task)
+
         # TODO Add check that ctx returned is the ctx corresponding to uadd.
         # We'll have to make uadd return the ctx so we can compare.
         # TODO Send the context back into some list maintained by
         # run_operations so that if there is another run_dataflow method
         # running on the same orchestrator context it will get the context
         # it's waiting for and return
-        # BEGIN old run_operations
-        # Set of tasks we are waiting on
-        # TODO Make some way to cap the number of context's who have operations
-        # executing. Or maybe just the number of operations. Or both.
-        tasks = set()
-        # Create tasks to wait on the results of each of the contexts submitted
-        for ctx in ctxs:
-            self.logger.debug(
-                "kickstarting context: %s", (await ctx.handle()).as_string()
-            )
-            tasks.add(
-                asyncio.create_task(
-                    self.run_operations_for_ctx(ctx, strict=strict)
-                )
-            )
+        # Create tasks to wait on the results of each of the contexts
+        # submitted, as long as we have room for them
+        starting = asyncio.create_task(start_ctxs())
+        starting.add_done_callback(completed.put_nowait)
+        started = False
         try:
-            # Return when outstanding operations reaches zero
-            while tasks:
+            # Return when all contexts have been started and outstanding
+            # contexts reaches zero
+            while not started or tasks:
                 # Wait for incoming events
-                done, _pending = await asyncio.wait(
-                    tasks, return_when=asyncio.FIRST_COMPLETED
-                )
-
-                for task in done:
-                    # Remove the task from the set of tasks we are waiting for
-                    tasks.remove(task)
-                    # Get the tasks exception if any
-                    exception = task.exception()
-                    if strict and exception is not None:
-                        raise exception
-                    elif exception is not None:
-                        # If there was an exception log it
-                        output = io.StringIO()
-                        task.print_stack(file=output)
-                        self.logger.error("%s", output.getvalue().rstrip())
-                        output.close()
-                    else:
-                        # All operations for a context completed
-                        # Yield the context that completed and the results of its
-                        # output operations
-                        ctx, results = task.result()
-                        yield ctx, results
-                self.logger.debug("ctx.outstanding: %d", len(tasks) - 1)
+                task = await completed.get()
+                if task is starting:
+                    # Raise any exception which happened while starting
+                    # contexts, such as one from the async iterator
+                    task.result()
+                    started = True
+                    continue
+                # Remove the task from the set of tasks we are waiting for
+                tasks.remove(task)
+                # Get the tasks exception if any
+                exception = task.exception()
+                if strict and exception is not None:
+                    raise exception
+                elif exception is not None:
+                    # If there was an exception log it
+                    output = io.StringIO()
+                    task.print_stack(file=output)
+                    self.logger.error("%s", output.getvalue().rstrip())
+                    output.close()
+                else:
+                    # All operations for a context completed
+                    # Yield the context that completed and the results of its
+                    # output operations
+                    ctx, results = task.result()
+                    yield ctx, results
+                # Free everything the completed context was holding on to
+                if not self.parent.config.keep_ctxs:
+                    await self.remove_ctx(task.ctx)
+                # Make room for the next context
+                if ctx_slots is not None:
+                    ctx_slots.release()
+                self.logger.debug("ctx.outstanding: %d", len(tasks))
         finally:
             # Cancel tasks which we don't need anymore now that we know we are done
-            for task in tasks:
+            for task in [starting] + list(tasks):
                 if not task.done():
                     task.cancel()
-                else:
+                elif not task.cancelled():
                     task.exception()
 
+    async def remove_ctx(self, ctx: BaseInputSetContext):
+        """
+        Remove a completed context from the input network, redundancy checker
+        and lock network.
+        """
+        for network_ctx in [self.ictx, self.rctx, self.lctx]:
+            await network_ctx.remove_ctx(ctx)
+
     async def operations_parameter_set_pairs(
         self,
         ctx: BaseInputSetContext,
@@ -1409,7 +1705,11 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
         ):
             # Generate all pairs of un-run input combinations
             async for parameter_set in self.ictx.gather_inputs(
-                self.rctx, operation, dataflow, ctx=ctx
+                self.rctx,
+                operation,
+                dataflow,
+                ctx=ctx,
+                new_input_set=new_input_set,
             ):
                 yield operation, parameter_set
 
@@ -1685,6 +1985,11 @@ class MemoryOrchestrator(BaseOrchestrator, BaseMemoryDataFlowObject):
                 default=MemoryRedundancyChecker,
             ),
         )
+        for limit in ["max_ctxs", "max_ops", "max_ops_per_instance"]:
+            cls.config_set(args, above, limit, Arg(type=int, default=None))
+        cls.config_set(
+            args, above, "keep_ctxs", Arg(action="store_true", default=False),
+        )
         above = cls.add_orig_label(*above)
         for sub in [
             BaseInputNetwork,
@@ -1706,6 +2011,11 @@ class MemoryOrchestrator(BaseOrchestrator, BaseMemoryDataFlowObject):
         opimp_network = cls.config_get(config, above, "opimp", "network")
         lock_network = cls.config_get(config, above, "lock", "network")
         rchecker = cls.config_get(config, above, "rchecker")
+        limits = {
+            limit: cls.config_get(config, above, limit)
+            for limit in ["max_ctxs", "max_ops", "max_ops_per_instance"]
+        }
+        keep_ctxs = cls.config_get(config, above, "keep_ctxs")
         above = cls.add_label(*above)
         return MemoryOrchestratorConfig(
             input_network=input_network.withconfig(config, *above),
@@ -1713,6 +2023,8 @@ class MemoryOrchestrator(BaseOrchestrator, BaseMemoryDataFlowObject):
             lock_network=lock_network.withconfig(config, *above),
             opimp_network=opimp_network.withconfig(config, *above),
             rchecker=rchecker.withconfig(config, *above),
+            keep_ctxs=keep_ctxs,
+            **limits,
         )
 
     @classmethod
@@ -112,6 +112,18 @@ class Stage(Enum):
     OUTPUT = "output"
 
 
+class Execution(Enum):
+    """
+    Where the non-async function behind an operation is run. INLINE runs it
+    directly on the event loop, THREAD in a thread pool, PROCESS in a process
+    pool (its inputs and outputs must be picklable).
+    """
+
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
 class FailedToLoadOperation(Exception):
     """
     Raised when an Operation wasn't found to be registered with the
@@ -129,6 +141,7 @@ class Operation(NamedTuple, Entrypoint):
     expand: Optional[List[str]] = []
     instance_name: Optional[str] = None
     validator: bool = False
+    execution: Execution = Execution.INLINE
 
     def export(self):
         exported = {
@@ -150,6 +163,8 @@ class Operation(NamedTuple, Entrypoint):
             del exported["conditions"]
         if not exported["expand"]:
             del exported["expand"]
+        if self.execution != Execution.INLINE:
+            exported["execution"] = self.execution.value
         return exported
 
     @classmethod
@@ -250,6 +265,8 @@ class Operation(NamedTuple, Entrypoint):
             ]
         if "stage" in kwargs:
             kwargs["stage"] = Stage[kwargs["stage"].upper()]
+        if "execution" in kwargs:
+            kwargs["execution"] = Execution[kwargs["execution"].upper()]
         return cls(**kwargs)
 
 
@@ -261,12 +278,34 @@ class Output(NamedTuple):
     ismap: bool = False
 
 
+# Inputs are numbered in the order they are created within a process. Integers
+# are much cheaper than uuid strings to create, hash and compare
+INPUT_UIDS = itertools.count(1)
+
+
 class Input(object):
     """
     All inputs have a unique id. Without it they can't be tracked for locking
     purposes.
+
+    The ``uid`` is an integer which is unique within the process. The ``uuid``
+    is unique everywhere, it's only generated when asked for, or when the
+    input is pickled to be sent to another process. Unpickled inputs are given
+    a new ``uid`` and keep their ``uuid``.
     """
 
+    # Dataflows may create hundreds of thousands of inputs, don't give each a
+    # __dict__
+    __slots__ = (
+        "validated",
+        "value",
+        "definition",
+        "parents",
+        "origin",
+        "uid",
+        "_uuid",
+    )
+
     def __init__(
         self,
         value: Any,
@@ -275,7 +314,7 @@ class Input(object):
         origin: Optional[Union[str, Tuple[Operation, str]]] = "seed",
         validated: bool = True,
         *,
-        uid: Optional[str] = "",
+        uid: Optional[int] = None,
     ):
         # NOTE For some reason doctests end up with id(type(definition)) not
         # equal to id(Definition). Therfore just compare the class name.
@@ -308,7 +347,29 @@ class Input(object):
         self.origin = origin
         self.uid = uid
         if not self.uid:
-            self.uid = str(uuid.uuid4())
+            self.uid = next(INPUT_UIDS)
+        self._uuid = None
+
+    @property
+    def uuid(self) -> str:
+        if self._uuid is None:
+            self._uuid = str(uuid.uuid4())
+        return self._uuid
+
+    def __getstate__(self):
+        state = {
+            name: getattr(self, name)
+            for name in self.__slots__
+            # uid is only unique within this process
+            if name != "uid"
+        }
+        state["_uuid"] = self.uuid
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.uid = next(INPUT_UIDS)
 
     def get_parents(self) -> Iterator["Input"]:
         return list(
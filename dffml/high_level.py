@@ -228,9 +228,10 @@ async def save(source: BaseSource, *args: Record) -> None:
     """
     Update a source's knowledge about given records.
 
-    For each record given, call
-    :py:func:`update <dffml.source.source.BaseSourceContext.update>` on the
-    source. Effectively saving all the records to the source.
+    Calls
+    :py:func:`update_many <dffml.source.source.BaseSourceContext.update_many>`
+    on the source with all the records given. Effectively saving all the
+    records to the source.
 
     Parameters
     ----------
@@ -268,8 +269,7 @@ async def save(source: BaseSource, *args: Record) -> None:
     """
     async with source:
         async with source() as sctx:
-            for record in args:
-                await sctx.update(record)
+            await sctx.update_many(list(args))
 
 
 async def load(source: BaseSource, *args: str) -> AsyncIterator[Record]:
@@ -10,6 +10,9 @@ from ..df.types import Definition
 # definitions
 QUERY_TABLE = Definition(name="query_table", primitive="str")
 QUERY_DATA = Definition(name="query_data", primitive="Dict[str, Any]")
+QUERY_DATA_MANY = Definition(
+    name="query_data_many", primitive="List[Dict[str, Any]]"
+)
 QUERY_CONDITIONS = Definition(name="query_conditions", primitive="Conditions")
 QUERY_COLS = Definition(name="query_cols", primitive="Dict[str, str]")
 QUERY_LOOKUPS = Definition(name="query_lookups", primitive="Dict[str, Any]")
@@ -536,3 +539,177 @@ async def db_query_insert_or_update(
     {'query_lookups': [{'firstName': 'John', 'lastName': 'Wick', 'age': 39}]}
     """
     await self.dbctx.insert_or_update(table_name=table_name, data=data)
+
+
+@op(
+    inputs={"table_name": QUERY_TABLE, "data": QUERY_DATA_MANY},
+    outputs={},
+    config_cls=DatabaseQueryConfig,
+    imp_enter={"database": (lambda self: self.config.database)},
+    ctx_enter={"dbctx": (lambda self: self.parent.database())},
+)
+async def db_query_insert_many(
+    self, *, table_name: str, data: List[Dict[str, Any]]
+):
+    """
+    Generates an insert query in the database which inserts many rows at once.
+
+    Parameters
+    ++++++++++
+    table_name : str
+        The name of the table to insert data in to.
+    data : list[dict]
+        Rows to be inserted into the table.
+
+    Examples
+    ++++++++
+
+    >>> import asyncio
+    >>> from dffml import *
+    >>>
+    >>> sdb = SqliteDatabase(SqliteDatabaseConfig(filename="examples.db"))
+    >>>
+    >>> dataflow = DataFlow(
+    ...     operations={
+    ...         "db_query_insert_many": db_query_insert_many.op,
+    ...         "db_query_lookup": db_query_lookup.op,
+    ...         "get_single": GetSingle.imp.op,
+    ...     },
+    ...     configs={
+    ...         "db_query_lookup": DatabaseQueryConfig(database=sdb),
+    ...         "db_query_insert_many": DatabaseQueryConfig(database=sdb),
+    ...     },
+    ...     seed=[],
+    ... )
+    >>>
+    >>> inputs = {
+    ...     "insert": [
+    ...         Input(
+    ...             value="myTable",
+    ...             definition=db_query_insert_many.op.inputs["table_name"],
+    ...         ),
+    ...         Input(
+    ...             value=[
+    ...                 {"key": 10, "firstName": "John", "lastName": "Doe", "age": 16},
+    ...                 {"key": 11, "firstName": "John", "lastName": "Wick", "age": 39},
+    ...             ],
+    ...             definition=db_query_insert_many.op.inputs["data"],
+    ...         ),
+    ...     ],
+    ...     "lookup": [
+    ...         Input(
+    ...             value="myTable", definition=db_query_lookup.op.inputs["table_name"],
+    ...         ),
+    ...         Input(
+    ...             value=["firstName", "lastName", "age"],
+    ...             definition=db_query_lookup.op.inputs["cols"],
+    ...         ),
+    ...         Input(value=[], definition=db_query_lookup.op.inputs["conditions"],),
+    ...         Input(
+    ...             value=[db_query_lookup.op.outputs["lookups"].name],
+    ...             definition=GetSingle.op.inputs["spec"],
+    ...         ),
+    ...     ]
+    ... }
+    >>>
+    >>> async def main():
+    ...     async for ctx, result in MemoryOrchestrator.run(dataflow, inputs):
+    ...         if result:
+    ...             print(result)
+    >>>
+    >>> asyncio.run(main())
+    {'query_lookups': [{'firstName': 'John', 'lastName': 'Doe', 'age': 16}, {'firstName': 'John', 'lastName': 'Wick', 'age': 39}]}
+    """
+    await self.dbctx.insert_many(table_name=table_name, data=data)
+
+
+@op(
+    inputs={"table_name": QUERY_TABLE, "data": QUERY_DATA_MANY},
+    outputs={},
+    config_cls=DatabaseQueryConfig,
+    imp_enter={"database": (lambda self: self.config.database)},
+    ctx_enter={"dbctx": (lambda self: self.parent.database())},
+)
+async def db_query_insert_or_update_many(
+    self, *, table_name: str, data: List[Dict[str, Any]]
+):
+    """
+    Inserts many rows at once, updating the rows already in the table which
+    have the same primary key instead of inserting them.
+
+    Parameters
+    ++++++++++
+    table_name : str
+        The name of the table to insert data in to.
+    data : list[dict]
+        Rows to be inserted or updated into the table.
+
+    Examples
+    ++++++++
+
+    >>> import asyncio
+    >>> from dffml import *
+    >>>
+    >>> sdb = SqliteDatabase(SqliteDatabaseConfig(filename="examples.db"))
+    >>>
+    >>> people = [
+    ...     {"key": 10, "firstName": "John", "lastName": "Doe", "age": 16},
+    ...     {"key": 11, "firstName": "John", "lastName": "Wick", "age": 38},
+    ... ]
+    >>>
+    >>> dataflow = DataFlow(
+    ...     operations={
+    ...         "db_query_insert_or_update_many": db_query_insert_or_update_many.op,
+    ...         "db_query_lookup": db_query_lookup.op,
+    ...         "get_single": GetSingle.imp.op,
+    ...     },
+    ...     configs={
+    ...         "db_query_insert_or_update_many": DatabaseQueryConfig(database=sdb),
+    ...         "db_query_lookup": DatabaseQueryConfig(database=sdb),
+    ...     },
+    ...     seed=[],
+    ... )
+    >>>
+    >>> inputs = {
+    ...     "insert_or_update": [
+    ...         Input(
+    ...             value="myTable",
+    ...             definition=db_query_insert_or_update_many.op.inputs["table_name"],
+    ...         ),
+    ...         Input(
+    ...             value=people,
+    ...             definition=db_query_insert_or_update_many.op.inputs["data"],
+    ...         ),
+    ...     ],
+    ...     "lookup": [
+    ...         Input(
+    ...             value="myTable",
+    ...             definition=db_query_lookup.op.inputs["table_name"],
+    ...         ),
+    ...         Input(
+    ...             value=["firstName", "lastName", "age"],
+    ...             definition=db_query_lookup.op.inputs["cols"],
+    ...         ),
+    ...         Input(value=[], definition=db_query_lookup.op.inputs["conditions"],),
+    ...         Input(
+    ...             value=[db_query_lookup.op.outputs["lookups"].name],
+    ...             definition=GetSingle.op.inputs["spec"],
+    ...         ),
+    ...     ],
+    ... }
+    >>>
+    >>> async def main():
+    ...     async for ctx, result in MemoryOrchestrator.run(dataflow, inputs):
+    ...         if result:
+    ...             print(result)
+    >>>
+    >>> asyncio.run(main())
+    {'query_lookups': [{'firstName': 'John', 'lastName': 'Doe', 'age': 16}, {'firstName': 'John', 'lastName': 'Wick', 'age': 38}]}
+    >>>
+    >>> for person in people:
+    ...     person["age"] += 1
+    >>>
+    >>> asyncio.run(main())
+    {'query_lookups': [{'firstName': 'John', 'lastName': 'Doe', 'age': 17}, {'firstName': 'John', 'lastName': 'Wick', 'age': 39}]}
+    """
+    await self.dbctx.insert_or_update_many(table_name=table_name, data=data)
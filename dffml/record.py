@@ -18,6 +18,8 @@ class NoSuchFeature(KeyError):
 
 class RecordPrediction(dict):
 
+    __slots__ = ()
+
     EXPORTED = ["value", "confidence"]
 
     def __init__(self, *, confidence: float = 0.0, value: Any = None) -> None:
@@ -50,6 +52,17 @@ class RecordPrediction(dict):
 
 class RecordData(object):
 
+    # The features and prediction dicts are only created when they're first
+    # accessed, and last_updated is only set once the record is evaluated or
+    # predicted, so that records which are only loaded stay small
+    __slots__ = (
+        "key",
+        "_features",
+        "_prediction",
+        "_last_updated",
+        "_last_updated_default",
+    )
+
     DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
     EXPORTED = ["key", "features", "prediction"]
 
@@ -61,40 +74,73 @@ class RecordData(object):
         prediction: Optional[Dict[str, Any]] = None,
         last_updated: Optional[datetime] = None,
     ) -> None:
-        # If the record is not evaluated or predicted then don't report out a new
-        # value for last_updated
-        self.last_updated_default = datetime.now()
         if key is None:
             key = ""
-        if features is None:
-            features = {}
-        if prediction is None:
-            prediction = {}
-        if last_updated is None:
-            last_updated = self.last_updated_default
         if isinstance(last_updated, str):
             last_updated = datetime.strptime(last_updated, self.DATE_FORMAT)
-        for _key, _val in prediction.items():
-            prediction[_key] = RecordPrediction(**_val)
+        if prediction:
+            for _key, _val in prediction.items():
+                if not isinstance(_val, RecordPrediction):
+                    prediction[_key] = RecordPrediction(**_val)
         self.key = key
-        self.features = features
-        self.prediction = prediction
-        self.last_updated = last_updated
+        self._features = features
+        self._prediction = prediction
+        self._last_updated = last_updated
+        self._last_updated_default = None
+
+    @property
+    def features(self) -> Dict[str, Any]:
+        if self._features is None:
+            self._features = {}
+        return self._features
+
+    @features.setter
+    def features(self, features: Dict[str, Any]):
+        self._features = features
+
+    @property
+    def prediction(self) -> Dict[str, RecordPrediction]:
+        if self._prediction is None:
+            self._prediction = {}
+        return self._prediction
+
+    @prediction.setter
+    def prediction(self, prediction: Dict[str, RecordPrediction]):
+        self._prediction = prediction
+
+    @property
+    def last_updated_default(self) -> datetime:
+        # If the record is not evaluated or predicted then don't report out a
+        # new value for last_updated
+        if self._last_updated_default is None:
+            self._last_updated_default = datetime.now()
+        return self._last_updated_default
+
+    @property
+    def last_updated(self) -> datetime:
+        if self._last_updated is None:
+            return self.last_updated_default
+        return self._last_updated
+
+    @last_updated.setter
+    def last_updated(self, last_updated: datetime):
+        self._last_updated = last_updated
 
     def dict(self):
-        data = {
-            key: getattr(self, key, [])
-            for key in self.EXPORTED
-            if not isinstance(getattr(self, key, {}), dict)
-            or (
-                isinstance(getattr(self, key, {}), dict)
-                and getattr(self, key, {})
-            )
-        }
+        data = {"key": self.key}
+        if self._features:
+            data["features"] = self._features
+        if self._prediction:
+            data["prediction"] = self._prediction
         # Do not report if there has been no change since instantiation to
         # a default time value
-        if self.last_updated != self.last_updated_default:
-            data["last_updated"] = self.last_updated.strftime(self.DATE_FORMAT)
+        if (
+            self._last_updated is not None
+            and self._last_updated != self._last_updated_default
+        ):
+            data["last_updated"] = self._last_updated.strftime(
+                self.DATE_FORMAT
+            )
         return data
 
     def __repr__(self):
@@ -106,6 +152,8 @@ class Record(object):
     Manages feature independent information and actions for a record.
     """
 
+    __slots__ = ("data", "_extra")
+
     RECORD_DATA = RecordData
 
     def __init__(
@@ -116,17 +164,27 @@ class Record(object):
         extra: Optional[Dict[str, Any]] = None,
     ) -> None:
         if data is None:
-            data = {}
-        if extra is None:
-            extra = {}
-        data["key"] = key
-        if "extra" in data:
-            # Prefer extra from init arguments to extra stored in data
-            data["extra"].update(extra)
-            extra = data["extra"]
-            del data["extra"]
-        self.data = self.RECORD_DATA(**data)
-        self.extra = extra
+            self.data = self.RECORD_DATA(key=key)
+        else:
+            data["key"] = key
+            if "extra" in data:
+                # Prefer extra from init arguments to extra stored in data
+                if extra:
+                    data["extra"].update(extra)
+                extra = data["extra"]
+                del data["extra"]
+            self.data = self.RECORD_DATA(**data)
+        self._extra = extra
+
+    @property
+    def extra(self) -> Dict[str, Any]:
+        if self._extra is None:
+            self._extra = {}
+        return self._extra
+
+    @extra.setter
+    def extra(self, extra: Dict[str, Any]):
+        self._extra = extra
 
     def dict(self):
         # TODO(p2) Remove dict method in favor of export
@@ -134,7 +192,7 @@ class Record(object):
 
     def export(self):
         data = self.data.dict()
-        data["extra"] = self.extra
+        data["extra"] = self._extra if self._extra is not None else {}
         return data
 
     def __repr__(self):
@@ -142,8 +200,8 @@ class Record(object):
 
     def __str__(self):
         header = self.key
-        if len(self.extra.keys()):
-            header += " " + str(self.extra)
+        if self._extra:
+            header += " " + str(self._extra)
 
         return "\n".join(
             [header]
@@ -170,10 +228,36 @@ class Record(object):
         ).rstrip()
 
     def merge(self, record: "Record"):
-        data = self.data.dict()
-        merge(data, record.data.dict())
-        self.data = self.RECORD_DATA(**data)
-        self.extra.update(record.extra)  # type: ignore
+        """
+        Add the features, predictions and extra information of another record
+        to this one. Values already set on this record are kept.
+
+        Examples
+        --------
+
+        >>> from dffml import *
+        >>>
+        >>> example = Record("example", data=dict(features=dict(dead="beef")))
+        >>> example.merge(Record("example", data=dict(features=dict(dead="face", feed="face"))))
+        >>> print(example.features())
+        {'dead': 'beef', 'feed': 'face'}
+        """
+        data = self.data
+        other = record.data
+        if other._features:
+            merge(data.features, other._features)
+        if other._prediction:
+            for target, prediction in other._prediction.items():
+                if target in data.prediction:
+                    merge(data.prediction[target], prediction)
+                else:
+                    data.prediction[target] = RecordPrediction(**prediction)
+        # Take the other record's last_updated if this record hasn't been
+        # evaluated or predicted since it was created
+        if data._last_updated is None and other._last_updated is not None:
+            data._last_updated = other._last_updated
+        if record._extra:
+            self.extra.update(record._extra)  # type: ignore
 
     @property
     def key(self) -> str:
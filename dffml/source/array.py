@@ -0,0 +1,171 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 Intel Corporation
+"""
+Stores the features of records as columns of NumPy arrays
+"""
+import importlib
+from typing import Any, Dict, List, Set, Optional, AsyncIterator
+
+from ..base import config, field
+from ..record import Record
+from .source import BaseSource, BaseSourceContext
+from ..util.entrypoint import entrypoint
+
+
+class ArraySourceContext(BaseSourceContext):
+    async def update(self, record: Record):
+        self.parent.set_row(record)
+
+    async def records(self) -> AsyncIterator[Record]:
+        for key in list(self.parent.keys):
+            yield self.parent.get_row(key)
+
+    async def record(self, key: str) -> Record:
+        if key not in self.parent.index:
+            return Record(key)
+        return self.parent.get_row(key)
+
+    async def arrays(self, features: List[str]) -> Optional[Dict[str, Any]]:
+        return self.parent.arrays(features)
+
+
+@config
+class ArraySourceConfig:
+    records: List[Record] = field(
+        "Records to store, each must have the same features", default=None
+    )
+    features: Dict[str, Any] = field(
+        "Arrays of the values of each feature, used as is when they are "
+        "already NumPy arrays",
+        default=None,
+    )
+    keys: List[str] = field(
+        "Keys of the records in features, defaults to their row numbers",
+        default=None,
+    )
+
+
+@entrypoint("array")
+class ArraySource(BaseSource):
+    """
+    Stores the value of each feature for every record in a NumPy array. Models
+    can use the arrays directly instead of iterating over records, see
+    :py:meth:`arrays <dffml.source.source.BaseSourceContext.arrays>`.
+
+    Records are created from the arrays as they are requested. Every record in
+    the source must have the same features.
+    """
+
+    CONFIG = ArraySourceConfig
+    CONTEXT = ArraySourceContext
+
+    def __init__(self, config: ArraySourceConfig) -> None:
+        super().__init__(config)
+        self.np = importlib.import_module("numpy")
+        self.keys: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.columns: Dict[str, Any] = {}
+        # Records added by update which haven't been copied into columns yet
+        self.pending: List[Record] = []
+        self.predictions: Dict[str, Dict[str, Any]] = {}
+        self.extra: Dict[str, Dict[str, Any]] = {}
+        self.feature_names: Optional[Set[str]] = None
+        if self.config.features:
+            self.columns = {
+                name: self.np.asarray(values)
+                for name, values in self.config.features.items()
+            }
+            lengths = set(map(len, self.columns.values()))
+            if len(lengths) != 1:
+                raise ValueError(
+                    f"Feature arrays have different lengths: {lengths}"
+                )
+            self.keys = self.config.keys
+            if self.keys is None:
+                self.keys = list(map(str, range(lengths.pop())))
+            elif len(self.keys) != len(next(iter(self.columns.values()))):
+                raise ValueError("keys and feature arrays differ in length")
+            self.keys = list(self.keys)
+            self.feature_names = set(self.columns)
+            self.index = {key: row for row, key in enumerate(self.keys)}
+        for record in self.config.records or []:
+            self.set_row(record)
+
+    @property
+    def rows(self) -> int:
+        """
+        Number of records which are stored in columns
+        """
+        return len(self.keys) - len(self.pending)
+
+    def set_row(self, record: Record):
+        names = set(record.features())
+        if self.feature_names is None:
+            self.feature_names = names
+        elif names != self.feature_names:
+            raise ValueError(
+                f"{record.key} has features {sorted(names)}, records in "
+                f"{self!r} must have the features {sorted(self.feature_names)}"
+            )
+        self.predictions.pop(record.key, None)
+        if record.data.prediction:
+            self.predictions[record.key] = dict(record.data.prediction)
+        self.extra.pop(record.key, None)
+        if record.extra:
+            self.extra[record.key] = dict(record.extra)
+        row = self.index.get(record.key)
+        if row is None:
+            self.index[record.key] = len(self.keys)
+            self.keys.append(record.key)
+            self.pending.append(record)
+        elif row >= self.rows:
+            self.pending[row - self.rows] = record
+        else:
+            for name, value in record.features().items():
+                column = self.columns[name]
+                value = self.np.asarray(value)
+                if not self.np.can_cast(value.dtype, column.dtype, "safe"):
+                    column = self.columns[name] = column.astype(
+                        self.np.result_type(column, value)
+                    )
+                column[row] = value
+
+    def get_row(self, key: str) -> Record:
+        row = self.index[key]
+        if row >= self.rows:
+            features = dict(self.pending[row - self.rows].features())
+        else:
+            features = {
+                name: column[row].tolist()
+                for name, column in self.columns.items()
+            }
+        data = {"features": features}
+        if key in self.predictions:
+            data["prediction"] = dict(self.predictions[key])
+        if key in self.extra:
+            data["extra"] = dict(self.extra[key])
+        return Record(key, data=data)
+
+    def arrays(self, features: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the columns for the requested features, or None if there is no
+        column for one of them
+        """
+        if self.pending:
+            pending = {
+                name: self.np.array(
+                    [record.feature(name) for record in self.pending]
+                )
+                for name in self.pending[0].features()
+            }
+            if not self.columns:
+                self.columns = pending
+            else:
+                self.columns = {
+                    name: self.np.concatenate([column, pending[name]])
+                    for name, column in self.columns.items()
+                }
+            self.pending = []
+        if not all(name in self.columns for name in features):
+            return None
+        return {name: self.columns[name] for name in features}
@@ -3,19 +3,36 @@
 """
 Loads records from a csv file, using columns as features
 """
+import os
+import re
 import csv
 import ast
+import json
+import errno
+import pickle
 import itertools
 import asyncio
-from typing import Dict
+import tempfile
+from typing import (
+    Any,
+    Dict,
+    List,
+    Set,
+    Tuple,
+    Optional,
+    Iterator,
+    AsyncIterator,
+)
 from dataclasses import dataclass
 from contextlib import asynccontextmanager
 
 from ..record import Record
-from .memory import MemorySource
-from .file import FileSource, FileSourceConfig
+from .source import BaseSourceContext
+from .memory import MemorySource, MemorySourceContext
+from .file import FileSource, FileSourceConfig, COMPRESSED_EXTENSIONS
 from ..base import config
 from ..util.entrypoint import entrypoint
+from ..util.asynchelper import aclosing
 from ..configloader.configloader import ConfigLoaders
 
 csv.register_dialect("strip", skipinitialspace=True)
@@ -39,6 +56,80 @@ class OpenCSVFile:
             return bool(self.active < 1)
 
 
+# Number of rows looked at to decide how to parse each column
+SCHEMA_SAMPLE_ROWS = 1000
+# Anything ast.literal_eval can parse starts with one of these characters
+LITERAL_START = set("0123456789+-.([{'\"bBrRuUTFN\\ \t\n\r\f\v")
+FLOAT_LITERAL = re.compile(
+    r"[-+]?(?:[0-9]+\.[0-9]*|\.[0-9]+|[0-9]+(?=[eE]))(?:[eE][-+]?[0-9]+)?"
+)
+
+
+def convert_literal(value: str) -> Any:
+    """
+    Parse a cell as a Python literal, or leave it as a string if it isn't one
+    """
+    try:
+        return ast.literal_eval(value)
+    except (SyntaxError, ValueError):
+        return value
+
+
+def convert_int(value: str) -> Any:
+    try:
+        converted = int(value)
+    except ValueError:
+        return convert_literal(value)
+    # int() accepts things literal_eval doesn't, such as leading zeros
+    if str(converted) != value:
+        return convert_literal(value)
+    return converted
+
+
+def convert_float(value: str) -> Any:
+    if FLOAT_LITERAL.fullmatch(value):
+        return float(value)
+    return convert_int(value)
+
+
+def convert_str(value: str) -> Any:
+    if value[0] not in LITERAL_START:
+        return value
+    return convert_literal(value)
+
+
+# Each converter gives the same result as convert_literal for any cell, the
+# column type only decides which one is tried first
+CSV_CONVERTERS = {
+    "int": convert_int,
+    "float": convert_float,
+    "str": convert_str,
+}
+
+
+def infer_schema(
+    columns: List[str], rows: List[Dict[str, str]]
+) -> Dict[str, str]:
+    """
+    Pick the column type for each of columns which parses the values in rows
+    the fastest.
+    """
+    schema = {}
+    for name in columns:
+        values = [row[name] for row in rows if row.get(name)]
+        if values and all(
+            isinstance(convert_int(value), int) for value in values
+        ):
+            schema[name] = "int"
+        elif values and all(
+            isinstance(convert_float(value), (int, float)) for value in values
+        ):
+            schema[name] = "float"
+        else:
+            schema[name] = "str"
+    return schema
+
+
 CSV_SOURCE_CONFIG_DEFAULT_KEY = "key"
 CSV_SOURCE_CONFIG_DEFAULT_tag = "untagged"
 CSV_SOURCE_CONFIG_DEFAULT_tag_COLUMN = "tag"
@@ -51,6 +142,87 @@ class CSVSourceConfig(FileSourceConfig):
     tag: str = CSV_SOURCE_CONFIG_DEFAULT_tag
     tagcol: str = CSV_SOURCE_CONFIG_DEFAULT_tag_COLUMN
     loadfiles: str = CSV_SOURCE_CONFIG_DEFAULT_LOADFILES_NAME
+    stream: bool = False
+    cache_schema: bool = False
+    journal_size: int = 10000
+
+
+class CSVSourceContext(MemorySourceContext):
+    async def update(self, record: Record):
+        if not self.parent.config.stream:
+            return await super().update(record)
+        self.parent.journal(record)
+
+    async def records(self) -> AsyncIterator[Record]:
+        if not self.parent.config.stream:
+            async for record in super().records():
+                yield record
+            return
+        # Journaled records which have been seen in the file
+        seen = set()
+        async for tag, record in self.parent.stream_csv():
+            if tag != self.parent.config.tag:
+                continue
+            journaled = self.parent.journaled(record.key)
+            if journaled is not None:
+                record = journaled
+                seen.add(record.key)
+            yield record
+        # Records which were added by update and are not yet in the file
+        for record in self.parent.journal_records(exclude=seen):
+            yield record
+
+    async def records_batched(
+        self, batch_size: int
+    ) -> AsyncIterator[List[Record]]:
+        if not self.parent.config.stream:
+            async for batch in super().records_batched(batch_size):
+                yield batch
+            return
+        # In stream mode mem is only the journal, group records as they're
+        # read from the file
+        async for batch in BaseSourceContext.records_batched(self, batch_size):
+            yield batch
+
+    async def records_by_keys(self, keys: List[str]) -> Dict[str, Record]:
+        if not self.parent.config.stream:
+            return await super().records_by_keys(keys)
+        # Journaled records take precedence, find the rest in one pass over
+        # the file rather than one pass per key
+        found = {}
+        for key in keys:
+            journaled = self.parent.journaled(key)
+            if journaled is not None:
+                found[key] = journaled
+        wanted = set(keys).difference(found)
+        if wanted:
+            async with aclosing(self.parent.stream_csv()) as rows:
+                async for tag, record in rows:
+                    if tag == self.parent.config.tag and record.key in wanted:
+                        found[record.key] = record
+                        wanted.discard(record.key)
+                        if not wanted:
+                            break
+        return {key: found.get(key, Record(key)) for key in keys}
+
+    async def record(self, key: str) -> Record:
+        if not self.parent.config.stream:
+            return await super().record(key)
+        journaled = self.parent.journaled(key)
+        if journaled is not None:
+            return journaled
+        if self.parent.config.filename.endswith(COMPRESSED_EXTENSIONS):
+            # Compressed files can't be seeked, each lookup reads the file
+            # until the record is found
+            async with aclosing(self.parent.stream_csv()) as rows:
+                async for tag, record in rows:
+                    if tag == self.parent.config.tag and record.key == key:
+                        return record
+            return Record(key)
+        offsets = await self.parent.record_offsets()
+        if key not in offsets:
+            return Record(key)
+        return await self.parent.read_record_at(key, offsets[key])
 
 
 # CSVSource is a bit of a mess
@@ -58,9 +230,21 @@ class CSVSourceConfig(FileSourceConfig):
 class CSVSource(FileSource, MemorySource):
     """
     Uses a CSV file as the source of record feature data
+
+    If stream is set, the file is not loaded into memory. Records are read row
+    by row each time they are requested and updated records are kept in a
+    journal. Up to journal_size journaled records are kept in memory, the
+    rest are moved to a temporary file. The journal is appended to the file
+    on close if its records are all new and fit under the header. If it
+    replaces existing rows or adds new columns the file is rewritten on
+    close, which reads and writes every row once. The first lookup of a
+    record by key reads the whole file to find where each row starts,
+    lookups after that only read the row. Lookups in compressed files read
+    the file until the record is found every time.
     """
 
     CONFIG = CSVSourceConfig
+    CONTEXT = CSVSourceContext
 
     # Headers we've added to track data other than feature data for a record
     CSV_HEADERS = ["prediction", "confidence"]
@@ -98,83 +282,151 @@ class CSVSource(FileSource, MemorySource):
             open_file.write_back_tag = True
         # Store all the records by their tag in write_out
         open_file.write_out = {}
+        async for tag, record in self.csv_records(dict_reader):
+            # Add the record to our internal memory representation
+            open_file.write_out.setdefault(tag, {})
+            open_file.write_out[tag][record.key] = record
+
+    async def csv_records(
+        self, dict_reader: csv.DictReader
+    ) -> AsyncIterator[Tuple[str, Record]]:
+        """
+        Parses rows from a csv.DictReader into Record instances, yielding each
+        one along with its tag
+        """
+        fieldnames = dict_reader.fieldnames or []
+        # Columns holding prediction data we as the CSV source added
+        meta_columns = [
+            name
+            for name in fieldnames
+            if name.startswith(
+                tuple(header + "_" for header in self.CSV_HEADERS)
+            )
+        ]
+        feature_columns = [
+            name
+            for name in fieldnames
+            if name not in (self.config.key, self.config.tagcol)
+            and name not in meta_columns
+        ]
+        target_names = [
+            name[len("prediction_") :]
+            for name in meta_columns
+            if name.startswith("prediction_")
+        ]
+        rows = iter(dict_reader)
+        if not self.config.loadfiles:
+            # Decide how to parse each feature column from the first rows. The
+            # schema is kept until the source is closed so that it's only
+            # inferred once per open.
+            schema = self.schema
+            if schema is None or not set(feature_columns).issubset(schema):
+                schema = self.load_schema()
+            if schema is None or not set(feature_columns).issubset(schema):
+                sample = list(itertools.islice(rows, SCHEMA_SAMPLE_ROWS))
+                rows = itertools.chain(sample, rows)
+                schema = infer_schema(feature_columns, sample)
+                self.save_schema(schema)
+            self.schema = schema
+            converters = [
+                (name, CSV_CONVERTERS[schema[name]])
+                for name in feature_columns
+            ]
         # If there is no key track row index to be used as key by tag
         index = {}
-        for row in dict_reader:
-            # Grab tag from row
-            tag = row.get(self.config.tagcol, self.config.tag)
-            # Load via ConfigLoaders if loadfiles parameter is given
+        for row in rows:
+            tag, key = self.row_tag_key(row, index)
+            # Record data we are going to parse from this row (must include
+            # features).
+            record_data = {}
+            # Set the features
+            features = {}
             if self.config.loadfiles:
+                # Load via ConfigLoaders if loadfiles parameter is given
                 async with self.CONFIG_LOADER as cfgl:
                     _, cfgl_data = await cfgl.load_file(
                         row[self.config.loadfiles]
                     )
-            if self.config.tagcol in row:
-                del row[self.config.tagcol]
-            index.setdefault(tag, 0)
-            # Grab key from row
-            key = row.get(self.config.key, str(index[tag]))
-            if self.config.key in row:
-                del row[self.config.key]
+                for name in feature_columns:
+                    features[name] = cfgl_data
+                for name in meta_columns:
+                    if not row[name]:
+                        features[name] = cfgl_data
             else:
-                index[tag] += 1
-            # Record data we are going to parse from this row (must include
-            # features).
-            record_data = {}
-            # Parse headers we as the CSV source added
-            csv_meta = {}
-            row_keys = []
-            # getting all keys starting with "prediction","confidence"
-            for header in self.CSV_HEADERS:
-                row_keys.extend(
-                    list(
-                        filter(
-                            lambda x: x.startswith(header + "_"), row.keys()
-                        )
-                    )
-                )
-            # pop all prediction data from row and save in csv_meta
-            for header in row_keys:
-                value = row.get(header, None)
-                if value is not None and value != "":
-                    csv_meta[header] = row[header]
-                    # Remove from feature data
-                    del row[header]
-            # Set the features
-            features = {}
-            for _key, _value in row.items():
-                if self.config.loadfiles:
-                    _value = cfgl_data
-                if _value != "":
-                    try:
-                        features[_key] = ast.literal_eval(_value)
-                    except (SyntaxError, ValueError):
-                        features[_key] = _value
+                for name, convert in converters:
+                    value = row[name]
+                    if value:
+                        features[name] = convert(value)
             if features:
                 record_data["features"] = features
-
-            # Getting all prediction target names
-            target_keys = filter(
-                lambda x: x.startswith("prediction_"), csv_meta.keys()
-            )
-            target_keys = map(
-                lambda x: x.replace("prediction_", ""), target_keys
-            )
-
+            # Parse predictions from the headers we as the CSV source added
             predictions = {
                 target_name: {
-                    "value": str(csv_meta["prediction_" + target_name]),
-                    "confidence": float(csv_meta["confidence_" + target_name]),
+                    "value": str(row["prediction_" + target_name]),
+                    "confidence": float(row["confidence_" + target_name]),
                 }
-                for target_name in target_keys
+                for target_name in target_names
+                if row["prediction_" + target_name]
             }
             record_data.update({"prediction": predictions})
             # If there was no data in the row, skip it
             if not record_data and key == str(index[tag] - 1):
                 continue
-            # Add the record to our internal memory representation
-            open_file.write_out.setdefault(tag, {})
-            open_file.write_out[tag][key] = Record(key, data=record_data)
+            yield tag, Record(key, data=record_data)
+
+    def row_tag_key(
+        self, row: Dict[str, str], index: Dict[str, int]
+    ) -> Tuple[str, str]:
+        """
+        Tag and key of a row. Rows without a key are numbered by tag, index
+        maps tags to the number of rows without a key seen so far.
+        """
+        # Grab tag from row
+        tag = row.get(self.config.tagcol, self.config.tag)
+        index.setdefault(tag, 0)
+        # Grab key from row
+        key = row.get(self.config.key, str(index[tag]))
+        if self.config.key not in row:
+            index[tag] += 1
+        return tag, key
+
+    def schema_filename(self) -> str:
+        return self.config.filename + ".schema.json"
+
+    def load_schema(self) -> Optional[Dict[str, str]]:
+        """
+        Column types cached next to the file, if caching is enabled and the
+        file hasn't changed since they were saved.
+        """
+        if not self.config.cache_schema:
+            return None
+        try:
+            with open(self.schema_filename()) as fd:
+                cached = json.load(fd)
+            stat = os.stat(self.config.filename)
+        except (OSError, ValueError):
+            return None
+        if cached.get("mtime_ns") != stat.st_mtime_ns or cached.get(
+            "size"
+        ) != (stat.st_size):
+            return None
+        return cached.get("columns")
+
+    def save_schema(self, schema: Dict[str, str]):
+        if not self.config.cache_schema or not os.path.isfile(
+            self.config.filename
+        ):
+            return
+        stat = os.stat(self.config.filename)
+        with open(self.schema_filename(), "w") as fd:
+            json.dump(
+                {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "columns": schema,
+                },
+                fd,
+            )
 
     async def load_fd(self, fd):
         """
@@ -195,26 +447,14 @@ class CSVSource(FileSource, MemorySource):
             # Bail if not last open source for this file
             if not (await open_file.dec()):
                 return
-            # Add our headers
-            fieldnames = (
-                [] if not open_file.write_back_key else [self.config.key]
-            )
-            fieldnames.append(self.config.tagcol)
-            # Get all the feature names
-            feature_fieldnames = set()
-            prediction_fieldnames = set()
-            for tag, records in open_file.write_out.items():
-                for record in records.values():
-                    feature_fieldnames |= set(record.data.features.keys())
-                    prediction_fieldnames |= set(record.data.prediction.keys())
-            fieldnames += sorted(list(feature_fieldnames))
-            fieldnames += itertools.chain(
-                *list(
-                    map(
-                        lambda key: ("prediction_" + key, "confidence_" + key),
-                        list(prediction_fieldnames),
-                    )
-                )
+            fieldnames = self.fieldnames(
+                itertools.chain(
+                    *[
+                        records.values()
+                        for records in open_file.write_out.values()
+                    ]
+                ),
+                write_back_key=open_file.write_back_key,
             )
             self.logger.debug(f"fieldnames: {fieldnames}")
             # Write out the file
@@ -222,22 +462,332 @@ class CSVSource(FileSource, MemorySource):
             writer.writeheader()
             for tag, records in open_file.write_out.items():
                 for record in records.values():
-                    record_data = record.dict()
-                    row = {name: "" for name in fieldnames}
-                    # Always write the tag
-                    row[self.config.tagcol] = tag
-                    # Write the key if it existed
-                    if open_file.write_back_key:
-                        row[self.config.key] = record.key
-                    # Write the features
-                    for key, value in record_data.get("features", {}).items():
-                        row[key] = value
-                    # Write the prediction
-                    if "prediction" in record_data:
-                        for key, value in record_data["prediction"].items():
-                            row["prediction_" + key] = value["value"]
-                            row["confidence_" + key] = value["confidence"]
-                    writer.writerow(row)
+                    writer.writerow(
+                        self.record_row(
+                            fieldnames,
+                            tag,
+                            record,
+                            write_back_key=open_file.write_back_key,
+                        )
+                    )
             del self.OPEN_CSV_FILES[self.config.filename]
             self.logger.debug(f"{self.config.filename} written")
         self.logger.debug("%r saved %d records", self, len(self.mem))
+
+    def fieldnames(
+        self, records: List[Record], write_back_key: bool = True
+    ) -> List[str]:
+        """
+        Column names needed to write out the given records
+        """
+        # Get all the feature names
+        feature_fieldnames = set()
+        prediction_fieldnames = set()
+        for record in records:
+            feature_fieldnames |= set(record.data.features.keys())
+            prediction_fieldnames |= set(record.data.prediction.keys())
+        return self.columns(
+            feature_fieldnames,
+            prediction_fieldnames,
+            write_back_key=write_back_key,
+        )
+
+    def columns(
+        self,
+        feature_fieldnames: Set[str],
+        prediction_fieldnames: Set[str],
+        write_back_key: bool = True,
+    ) -> List[str]:
+        """
+        Column names needed to write out records with the given features and
+        predictions
+        """
+        # Add our headers
+        fieldnames = [] if not write_back_key else [self.config.key]
+        fieldnames.append(self.config.tagcol)
+        fieldnames += sorted(list(feature_fieldnames))
+        fieldnames += itertools.chain(
+            *list(
+                map(
+                    lambda key: ("prediction_" + key, "confidence_" + key),
+                    list(prediction_fieldnames),
+                )
+            )
+        )
+        return fieldnames
+
+    def record_row(
+        self,
+        fieldnames: List[str],
+        tag: str,
+        record: Record,
+        write_back_key: bool = True,
+    ) -> Dict[str, str]:
+        """
+        Create the row to be written to the CSV file for a record
+        """
+        record_data = record.dict()
+        row = {name: "" for name in fieldnames}
+        # Always write the tag
+        row[self.config.tagcol] = tag
+        # Write the key if it existed
+        if write_back_key:
+            row[self.config.key] = record.key
+        # Write the features
+        for key, value in record_data.get("features", {}).items():
+            row[key] = value
+        # Write the prediction
+        if "prediction" in record_data:
+            for key, value in record_data["prediction"].items():
+                row["prediction_" + key] = value["value"]
+                row["confidence_" + key] = value["confidence"]
+        return row
+
+    async def _open(self):
+        # Column types and where rows start are found again each open
+        self.schema = None
+        self.header = None
+        self.offsets = None
+        # Journaled records moved out of memory, by where they are in spill,
+        # and the names of their features and predictions
+        self.spill = None
+        self.spilled = {}
+        self.spilled_features = set()
+        self.spilled_predictions = set()
+        if not self.config.stream:
+            return await super()._open()
+        if not os.path.isfile(self.config.filename):
+            if not self.config.allowempty:
+                raise FileNotFoundError(
+                    errno.ENOENT,
+                    os.strerror(errno.ENOENT),
+                    self.config.filename,
+                )
+        # In stream mode mem is the journal of updated records
+        self.mem = {}
+
+    async def _close(self):
+        if not self.config.stream:
+            return await super()._close()
+        journaled = len(self.spilled.keys() | self.mem.keys())
+        try:
+            if self.config.readwrite and journaled:
+                await self.write_journal()
+        finally:
+            if self.spill is not None:
+                self.spill.close()
+            self.spill = None
+            self.spilled = {}
+            self.spilled_features = set()
+            self.spilled_predictions = set()
+            self.mem = {}
+        self.logger.debug("%r saved %d records", self, journaled)
+
+    def journal(self, record: Record):
+        """
+        Add an updated record to the journal. Once journal_size records are
+        in memory they are moved to the spill file.
+        """
+        self.mem[record.key] = record
+        if len(self.mem) < self.config.journal_size:
+            return
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile()
+        self.spill.seek(0, os.SEEK_END)
+        for key, record in self.mem.items():
+            self.spilled[key] = self.spill.tell()
+            pickle.dump(record, self.spill, pickle.HIGHEST_PROTOCOL)
+            # Kept so that the columns the journal needs are known without
+            # reading it back
+            self.spilled_features.update(record.data.features.keys())
+            self.spilled_predictions.update(record.data.prediction.keys())
+        self.logger.debug("%r spilled %d records", self, len(self.mem))
+        self.mem = {}
+
+    def journaled(self, key: str) -> Optional[Record]:
+        """
+        Journaled record with key, or None if it hasn't been updated
+        """
+        if key in self.mem:
+            return self.mem[key]
+        if key not in self.spilled:
+            return None
+        self.spill.seek(self.spilled[key])
+        return pickle.load(self.spill)
+
+    def journal_records(
+        self, exclude: Set[str] = frozenset()
+    ) -> Iterator[Record]:
+        """
+        Every journaled record, other than those with keys in exclude
+        """
+        for key in list(self.spilled):
+            if key not in self.mem and key not in exclude:
+                yield self.journaled(key)
+        for key, record in list(self.mem.items()):
+            if key not in exclude:
+                yield record
+
+    async def stream_csv(self) -> AsyncIterator[Tuple[str, Record]]:
+        """
+        Read records (and their tags) from the file one row at a time
+        """
+        if not os.path.isfile(self.config.filename):
+            return
+        with self.opener() as fd:
+            async for tag, record in self.csv_records(
+                csv.DictReader(fd, dialect="strip")
+            ):
+                yield tag, record
+
+    async def record_offsets(self) -> Dict[str, int]:
+        """
+        Maps the keys of records with our tag to the position their row starts
+        at in the file. Found by reading the file the first time it's called
+        after opening.
+        """
+        if self.offsets is not None:
+            return self.offsets
+        self.offsets = {}
+        if not os.path.isfile(self.config.filename):
+            return self.offsets
+        if self.schema is None and not self.config.loadfiles:
+            # Rows read on their own are parsed with the schema inferred from
+            # the start of the file
+            async with aclosing(self.stream_csv()) as rows:
+                async for _tag_record in rows:
+                    break
+        with self.opener() as fd:
+            # The position of the file can't be told while iterating over it,
+            # so rows are read with readline
+            dict_reader = csv.DictReader(
+                iter(fd.readline, ""), dialect="strip"
+            )
+            self.header = dict_reader.fieldnames
+            index = {}
+            while True:
+                offset = fd.tell()
+                row = next(dict_reader, None)
+                if row is None:
+                    break
+                tag, key = self.row_tag_key(row, index)
+                if tag == self.config.tag:
+                    self.offsets[key] = offset
+        return self.offsets
+
+    async def read_record_at(self, key: str, offset: int) -> Record:
+        """
+        Parse the record with key from the row at offset in the file
+        """
+        with self.opener() as fd:
+            fd.seek(offset)
+            dict_reader = csv.DictReader(
+                iter(fd.readline, ""), fieldnames=self.header, dialect="strip"
+            )
+            async with aclosing(self.csv_records(dict_reader)) as rows:
+                async for _tag, record in rows:
+                    # Keys of rows without a key column are their row number
+                    record.data.key = key
+                    return record
+        return Record(key)
+
+    async def write_journal(self):
+        """
+        Write records updated while in stream mode to the file. If they can
+        be written by appending rows that's what we do, otherwise the file is
+        rewritten one row at a time to a temporary file which replaces it.
+        """
+        fieldnames = []
+        # Keys of journaled records which already have a row in the file
+        existing = set()
+        if self.offsets is not None:
+            fieldnames = self.header or []
+            existing = {
+                key
+                for key in self.offsets
+                if key in self.mem or key in self.spilled
+            }
+        elif os.path.isfile(self.config.filename):
+            with self.opener() as fd:
+                dict_reader = csv.DictReader(fd, dialect="strip")
+                fieldnames = dict_reader.fieldnames or []
+                index = {}
+                for row in dict_reader:
+                    # Only the tag and key are needed, not the parsed record
+                    tag, key = self.row_tag_key(row, index)
+                    if tag == self.config.tag and (
+                        key in self.mem or key in self.spilled
+                    ):
+                        existing.add(key)
+        write_back_key = not fieldnames or self.config.key in fieldnames
+        feature_fieldnames = set(self.spilled_features)
+        prediction_fieldnames = set(self.spilled_predictions)
+        for record in self.mem.values():
+            feature_fieldnames.update(record.data.features.keys())
+            prediction_fieldnames.update(record.data.prediction.keys())
+        needed = self.columns(
+            feature_fieldnames,
+            prediction_fieldnames,
+            write_back_key=write_back_key,
+        )
+        if (
+            fieldnames
+            and not existing
+            and set(needed).issubset(fieldnames)
+            and not self.config.filename.endswith(COMPRESSED_EXTENSIONS)
+        ):
+            # Journaled records are all new and fit under the existing header
+            with open(self.config.filename, "a") as fd:
+                writer = csv.DictWriter(fd, fieldnames=fieldnames)
+                for record in self.journal_records():
+                    writer.writerow(
+                        self.record_row(
+                            fieldnames,
+                            self.config.tag,
+                            record,
+                            write_back_key=write_back_key,
+                        )
+                    )
+            self.logger.debug(f"{self.config.filename} appended")
+            return
+        # Columns already in the file followed by any new ones
+        fieldnames = list(fieldnames)
+        if self.config.tagcol not in fieldnames:
+            fieldnames.append(self.config.tagcol)
+        fieldnames += [name for name in needed if name not in fieldnames]
+        dirname, basename = os.path.split(self.config.filename)
+        tmpname = os.path.join(dirname, ".tmp." + basename)
+        with self.closer(tmpname) as fd:
+            writer = csv.DictWriter(fd, fieldnames=fieldnames)
+            writer.writeheader()
+            if os.path.isfile(self.config.filename):
+                with self.opener() as read_fd:
+                    index = {}
+                    for row in csv.DictReader(read_fd, dialect="strip"):
+                        # Figure out the tag and key the same way csv_records
+                        # does to find rows replaced by journaled records
+                        tag, key = self.row_tag_key(row, index)
+                        if tag == self.config.tag and key in existing:
+                            row = self.record_row(
+                                fieldnames,
+                                tag,
+                                self.journaled(key),
+                                write_back_key=write_back_key,
+                            )
+                        else:
+                            row[self.config.tagcol] = tag
+                            # Values past the end of the header of rows longer
+                            # than it are under None, they have no column
+                            row.pop(None, None)
+                        writer.writerow(row)
+            for record in self.journal_records(exclude=existing):
+                writer.writerow(
+                    self.record_row(
+                        fieldnames,
+                        self.config.tag,
+                        record,
+                        write_back_key=write_back_key,
+                    )
+                )
+        os.replace(tmpname, self.config.filename)
+        self.logger.debug(f"{self.config.filename} rewritten")
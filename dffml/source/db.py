@@ -1,5 +1,5 @@
 import collections
-from typing import Type, AsyncIterator, List
+from typing import Any, Type, AsyncIterator, Dict, List
 
 from ..base import config, BaseConfig
 from ..db.base import BaseDatabase, Condition
@@ -17,6 +17,20 @@ class DbSourceConfig(BaseConfig):
 
 class DbSourceContext(BaseSourceContext):
     async def update(self, record: Record):
+        async with self.parent.db() as db_ctx:
+            await db_ctx.insert_or_update(
+                self.parent.config.table_name, self.convert_to_row(record)
+            )
+        self.logger.debug("update: %s", await self.record(record.key))
+
+    async def update_many(self, records: List[Record]):
+        async with self.parent.db() as db_ctx:
+            await db_ctx.insert_or_update_many(
+                self.parent.config.table_name,
+                [self.convert_to_row(record) for record in records],
+            )
+
+    def convert_to_row(self, record: Record) -> Dict[str, Any]:
         model_columns = self.parent.config.model_columns
         key_value_pairs = collections.OrderedDict()
         for key in model_columns:
@@ -40,18 +54,27 @@ class DbSourceContext(BaseSourceContext):
                 else:
                     key_value_pairs[key] = 1
             else:
-                key_value_pairs[key] = record.data.__dict__[key]
-        async with self.parent.db() as db_ctx:
-            await db_ctx.insert_or_update(
-                self.parent.config.table_name, key_value_pairs
-            )
-        self.logger.debug("update: %s", await self.record(record.key))
+                key_value_pairs[key] = getattr(record.data, key)
+        return key_value_pairs
 
     async def records(self) -> AsyncIterator[Record]:
         async with self.parent.db() as db_ctx:
             async for result in db_ctx.lookup(self.parent.config.table_name):
                 yield self.convert_to_record(result)
 
+    async def records_batched(
+        self, batch_size: int
+    ) -> AsyncIterator[List[Record]]:
+        batch = []
+        async with self.parent.db() as db_ctx:
+            async for result in db_ctx.lookup(self.parent.config.table_name):
+                batch.append(self.convert_to_record(result))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
     def convert_to_record(self, result):
         modified_record = {
             "key": "",
@@ -72,6 +95,18 @@ class DbSourceContext(BaseSourceContext):
                 modified_record[key] = value
         return Record(modified_record["key"], data=modified_record["data"])
 
+    async def records_by_keys(self, keys: List[str]) -> Dict[str, Record]:
+        found = {}
+        async with self.parent.db() as db_ctx:
+            async for result in db_ctx.lookup(
+                self.parent.config.table_name,
+                cols=None,  # None turns into *. We want all rows
+                conditions=[[Condition("key", "IN", list(set(keys)))]],
+            ):
+                record = self.convert_to_record(result)
+                found[record.key] = record
+        return {key: found.get(key, Record(key)) for key in keys}
+
     async def record(self, key: str):
         record = Record(key)
         async with self.parent.db() as db_ctx:
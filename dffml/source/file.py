@@ -6,14 +6,86 @@ import abc
 import bz2
 import gzip
 import lzma
+import queue
 import errno
 import zipfile
+import importlib
+import threading
 from contextlib import contextmanager
 
 from ..base import config
 from .source import BaseSource
 from ..util.entrypoint import entrypoint
 
+# Files with these extensions can't be appended to
+COMPRESSED_EXTENSIONS = (".gz", ".bz2", ".xz", ".lzma", ".zip", ".zst")
+
+
+class ThreadedReader(io.RawIOBase):
+    """
+    Reads from a file object in a background thread, so that a compressed
+    file is decompressed while the data already read is being parsed. At most
+    BUFFERS chunks are read ahead of the reader.
+    """
+
+    CHUNK_SIZE: int = 2 ** 20
+    BUFFERS: int = 8
+
+    def __init__(self, fileobj) -> None:
+        super().__init__()
+        self.fileobj = fileobj
+        self.chunks = queue.Queue(self.BUFFERS)
+        self.chunk = memoryview(b"")
+        self.eof = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.read_ahead, daemon=True)
+        self.thread.start()
+
+    def read_ahead(self):
+        try:
+            while not self.stopped.is_set():
+                chunk = self.fileobj.read(self.CHUNK_SIZE)
+                self.put(chunk)
+                if not chunk:
+                    return
+        except Exception as error:
+            self.put(error)
+
+    def put(self, item):
+        # Don't block forever if the reader was closed before reaching the end
+        while not self.stopped.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self.chunk:
+            if self.eof:
+                return 0
+            item = self.chunks.get()
+            if isinstance(item, Exception):
+                raise item
+            if not item:
+                self.eof = True
+                return 0
+            self.chunk = memoryview(item)
+        size = min(len(buffer), len(self.chunk))
+        buffer[:size] = self.chunk[:size]
+        self.chunk = self.chunk[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self.stopped.set()
+            self.thread.join()
+            self.fileobj.close()
+        super().close()
+
 
 @config
 class FileSourceConfig:
@@ -21,6 +93,7 @@ class FileSourceConfig:
     tag: str = "untagged"
     readwrite: bool = False
     allowempty: bool = False
+    compresslevel: int = None
 
 
 @entrypoint("file")
@@ -62,47 +135,95 @@ class FileSource(BaseSource):
                     os.strerror(errno.ENOENT),
                     self.config.filename,
                 )
-        if self.config.filename[::-1].startswith((".gz")[::-1]):
-            opener = gzip.open(self.config.filename, self.READMODE_COMPRESSED)
-        elif self.config.filename[::-1].startswith((".bz2")[::-1]):
-            opener = bz2.open(self.config.filename, self.READMODE_COMPRESSED)
-        elif self.config.filename[::-1].startswith(
-            (".xz")[::-1]
-        ) or self.config.filename[::-1].startswith((".lzma")[::-1]):
-            opener = lzma.open(self.config.filename, self.READMODE_COMPRESSED)
-        elif self.config.filename[::-1].startswith((".zip")[::-1]):
-            opener = self.zip_opener_helper()
-        else:
-            opener = open(self.config.filename, self.READMODE)
-        with opener as fd:
+        with self.opener() as fd:
             await self.load_fd(fd)
 
     async def _close(self):
         if self.config.readwrite:
-            if self.config.filename[::-1].startswith((".gz")[::-1]):
-                close = gzip.open(
-                    self.config.filename, self.WRITEMODE_COMPRESSED
-                )
-            elif self.config.filename[::-1].startswith((".bz2")[::-1]):
-                close = bz2.open(
-                    self.config.filename, self.WRITEMODE_COMPRESSED
-                )
-            elif self.config.filename[::-1].startswith(
-                (".xz")[::-1]
-            ) or self.config.filename[::-1].startswith((".lzma")[::-1]):
-                close = lzma.open(
-                    self.config.filename, self.WRITEMODE_COMPRESSED
-                )
-            elif self.config.filename[::-1].startswith((".zip")[::-1]):
-                close = self.zip_closer_helper()
-            else:
-                close = open(self.config.filename, "w+")
-            with close as fd:
+            with self.closer() as fd:
                 await self.dump_fd(fd)
 
+    def opener(self, filename: str = None):
+        """
+        Open the file (or filename if given) for reading, decompressing it if
+        its extension says it's compressed. Compressed files are decompressed
+        in a background thread.
+        """
+        if filename is None:
+            filename = self.config.filename
+        if filename[::-1].startswith((".gz")[::-1]):
+            fileobj = gzip.open(filename, "rb")
+        elif filename[::-1].startswith((".bz2")[::-1]):
+            fileobj = bz2.open(filename, "rb")
+        elif filename[::-1].startswith((".xz")[::-1]) or filename[
+            ::-1
+        ].startswith((".lzma")[::-1]):
+            fileobj = lzma.open(filename, "rb")
+        elif filename[::-1].startswith((".zst")[::-1]):
+            zstandard = importlib.import_module("zstandard")
+            fileobj = zstandard.ZstdDecompressor().stream_reader(
+                open(filename, "rb")
+            )
+        elif filename[::-1].startswith((".zip")[::-1]):
+            return self.zip_opener_helper(filename)
+        else:
+            return open(filename, self.READMODE)
+        fd = io.BufferedReader(ThreadedReader(fileobj))
+        if "b" not in self.READMODE_COMPRESSED:
+            fd = io.TextIOWrapper(fd)
+        return fd
+
+    def closer(self, filename: str = None):
+        """
+        Open the file (or filename if given) for writing, compressing it if
+        its extension says it should be compressed.
+        """
+        if filename is None:
+            filename = self.config.filename
+        compresslevel = getattr(self.config, "compresslevel", None)
+        kwargs = {}
+        if compresslevel is not None:
+            kwargs["compresslevel"] = compresslevel
+        if filename[::-1].startswith((".gz")[::-1]):
+            return gzip.open(filename, self.WRITEMODE_COMPRESSED, **kwargs)
+        elif filename[::-1].startswith((".bz2")[::-1]):
+            return bz2.open(filename, self.WRITEMODE_COMPRESSED, **kwargs)
+        elif filename[::-1].startswith((".xz")[::-1]) or filename[
+            ::-1
+        ].startswith((".lzma")[::-1]):
+            if compresslevel is not None:
+                kwargs = {"preset": compresslevel}
+            return lzma.open(filename, self.WRITEMODE_COMPRESSED, **kwargs)
+        elif filename[::-1].startswith((".zst")[::-1]):
+            return self.zstd_closer_helper(filename)
+        elif filename[::-1].startswith((".zip")[::-1]):
+            return self.zip_closer_helper(filename)
+        else:
+            return open(filename, "w+")
+
+    @contextmanager
+    def zstd_closer_helper(self, filename: str = None):
+        if filename is None:
+            filename = self.config.filename
+        zstandard = importlib.import_module("zstandard")
+        compresslevel = getattr(self.config, "compresslevel", None)
+        # Compress using as many threads as there are CPUs
+        compressor = zstandard.ZstdCompressor(
+            level=3 if compresslevel is None else compresslevel, threads=-1
+        )
+        with open(filename, "wb") as fileobj:
+            with compressor.stream_writer(fileobj) as zstd_fd:
+                if "b" in self.WRITEMODE_COMPRESSED:
+                    yield zstd_fd
+                    return
+                with io.TextIOWrapper(zstd_fd, write_through=True) as fd:
+                    yield fd
+
     @contextmanager
-    def zip_opener_helper(self):
-        with zipfile.ZipFile(self.config.filename) as archive:
+    def zip_opener_helper(self, filename: str = None):
+        if filename is None:
+            filename = self.config.filename
+        with zipfile.ZipFile(filename) as archive:
             with archive.open(
                 self.__class__.__qualname__, mode=self.READMODE
             ) as zip_fd:
@@ -110,9 +231,14 @@ class FileSource(BaseSource):
                     yield fd
 
     @contextmanager
-    def zip_closer_helper(self):
+    def zip_closer_helper(self, filename: str = None):
+        if filename is None:
+            filename = self.config.filename
         with zipfile.ZipFile(
-            self.config.filename, self.WRITEMODE, compression=zipfile.ZIP_BZIP2
+            filename,
+            self.WRITEMODE,
+            compression=zipfile.ZIP_BZIP2,
+            compresslevel=getattr(self.config, "compresslevel", None),
         ) as archive:
             with archive.open(
                 self.__class__.__qualname__,
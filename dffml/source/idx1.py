@@ -3,21 +3,103 @@
 """
 Loads records from an IDX1 file
 """
+import io
 import struct
+import importlib
+import collections.abc
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 from ..record import Record
 from ..base import config, field
-from .memory import MemorySource
+from .source import BaseSourceContext
+from .memory import MemorySource, MemorySourceContext
 from .file import BinaryFileSource
 from ..util.entrypoint import entrypoint
 
 
+class IDXRecords(collections.abc.Mapping):
+    """
+    Records backed by an array with a row for each record. Records are created
+    when they are accessed, their feature is a view of the row. Records added
+    by update are kept in a dict.
+    """
+
+    def __init__(self, feature: str, array: Any) -> None:
+        self.feature = feature
+        self.array = array
+        self.updated: Dict[str, Record] = {}
+
+    def row(self, key: str) -> Optional[int]:
+        if not key.isdigit() or str(int(key)) != key:
+            return None
+        index = int(key)
+        if index >= len(self.array):
+            return None
+        return index
+
+    def __getitem__(self, key: str) -> Record:
+        if key in self.updated:
+            return self.updated[key]
+        index = self.row(key)
+        if index is None:
+            raise KeyError(key)
+        value = self.array[index]
+        if not value.ndim:
+            # Labels are scalars
+            value = value.item()
+        return Record(key, data={"features": {self.feature: value}})
+
+    def __setitem__(self, key: str, record: Record):
+        self.updated[key] = record
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self.array)):
+            yield str(index)
+        for key in self.updated:
+            if self.row(key) is None:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.array) + sum(
+            1 for key in self.updated if self.row(key) is None
+        )
+
+    def arrays(self, features: List[str]) -> Optional[Dict[str, Any]]:
+        if self.updated or features != [self.feature]:
+            return None
+        return {self.feature: self.array}
+
+
+class IDXSourceContext(MemorySourceContext):
+    async def records_batched(
+        self, batch_size: int
+    ) -> AsyncIterator[List[Record]]:
+        if not isinstance(self.parent.mem, IDXRecords):
+            async for batch in super().records_batched(batch_size):
+                yield batch
+            return
+        # Don't create every record up front
+        async for batch in BaseSourceContext.records_batched(self, batch_size):
+            yield batch
+
+    async def arrays(self, features: List[str]) -> Optional[Dict[str, Any]]:
+        if not isinstance(self.parent.mem, IDXRecords):
+            return None
+        return self.parent.mem.arrays(features)
+
+
 @config
 class IDXSourceConfig:
     filename: str
     feature: str = field("Name of the feature the data will be referenced as")
     readwrite: bool = False
     allowempty: bool = False
+    mmap: bool = field(
+        "Memory map the file (or read it into one array if it's compressed) "
+        "and create records from it when they're accessed. Features are NumPy "
+        "views of the file",
+        default=False,
+    )
 
 
 class IDX1SourceConfig(IDXSourceConfig):
@@ -31,11 +113,39 @@ class IDX1Source(BinaryFileSource, MemorySource):
     """
 
     CONFIG = IDX1SourceConfig
+    CONTEXT = IDXSourceContext
+
+    def load_array(
+        self, xfile, dtype: str, offset: int, shape: Tuple[int, ...]
+    ) -> IDXRecords:
+        """
+        Memory map the data in the file, or read it into an array if the file
+        is compressed, since compressed files can't be mapped.
+        """
+        np = importlib.import_module("numpy")
+        if isinstance(getattr(xfile, "raw", None), io.FileIO):
+            array = np.memmap(
+                self.config.filename,
+                dtype=dtype,
+                mode="r",
+                offset=offset,
+                shape=shape,
+            )
+        else:
+            array = np.frombuffer(
+                xfile.read(), dtype=dtype, count=int(np.prod(shape))
+            ).reshape(shape)
+        self.logger.debug("%r mapped %d records", self, shape[0])
+        return IDXRecords(self.config.feature, array)
 
     async def load_fd(self, xfile):
         # Reading the binary datafile's details
         magic, size = struct.unpack(">II", xfile.read(8))
 
+        if self.config.mmap:
+            self.mem = self.load_array(xfile, ">b", 8, (size,))
+            return
+
         # Reading the rest of binary datafile one byte at a time
         self.mem = {}
         for i in range(size):
@@ -27,6 +27,10 @@ class IDX3Source(IDX1Source):
         magic, size = struct.unpack(">II", xfile.read(8))
         nrows, ncols = struct.unpack(">II", xfile.read(8))
 
+        if self.config.mmap:
+            self.mem = self.load_array(xfile, ">B", 16, (size, nrows * ncols))
+            return
+
         self.mem = {}
         inner_array_size = nrows * ncols
         for i in range(0, size):
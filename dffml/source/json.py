@@ -1,20 +1,31 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2019 Intel Corporation
+import os
+import re
 import json
 import asyncio
+import dataclasses
 from dataclasses import dataclass
 from contextlib import asynccontextmanager
-from typing import Dict
+from typing import Dict, List, Tuple, Iterator, AsyncIterator
 
+from ..base import config, field
 from ..record import Record
-from .memory import MemorySource
-from .file import FileSource, FileSourceConfig
+from .source import BaseSourceContext
+from .memory import MemorySource, MemorySourceContext
+from .file import FileSource, FileSourceConfig, COMPRESSED_EXTENSIONS
 from ..util.entrypoint import entrypoint
+from ..util.asynchelper import aclosing
 
 from .log import LOGGER
 
 LOGGER = LOGGER.getChild("json")
 
+# Start of the lines dump_line writes, tag and key are JSON strings
+LINE_TAG_KEY = re.compile(
+    r'\{"tag": ("(?:[^"\\]|\\.)*"), "key": ("(?:[^"\\]|\\.)*")'
+)
+
 
 class JSONSourceConfig(FileSourceConfig):
     pass  # pragma: no cov
@@ -89,3 +100,273 @@ class JSONSource(FileSource, MemorySource):
                 json.dump(records, fd)
                 self.logger.debug(f"{self.config.filename} written")
         LOGGER.debug("%r saved %d records", self, len(self.mem))
+
+
+@config
+class JSONLinesSourceConfig(FileSourceConfig):
+    compact: float = field(
+        "Rewrite the file without the lines of records which were updated "
+        "later in the file once more than this fraction of its lines are "
+        "outdated",
+        default=0.5,
+    )
+
+
+@dataclass
+class OpenJSONLinesFile(OpenJSONFile):
+    # Records updated by sources which have closed, by tag, written when the
+    # last source using the file closes
+    journal: Dict[str, Dict[str, Record]] = dataclasses.field(
+        default_factory=dict
+    )
+    lines: int = 0
+    outdated: int = 0
+
+
+class JSONLinesSourceContext(MemorySourceContext):
+    async def records(self) -> AsyncIterator[Record]:
+        # Journaled records which have been seen in the file
+        seen = set()
+        async for _lineno, record in self.parent.stream_records():
+            if record.key in self.parent.mem:
+                record = self.parent.mem[record.key]
+                seen.add(record.key)
+            yield record
+        # Records which were added by update and are not in the file
+        for key, record in list(self.parent.mem.items()):
+            if key not in seen:
+                yield record
+
+    async def records_batched(
+        self, batch_size: int
+    ) -> AsyncIterator[List[Record]]:
+        async for batch in BaseSourceContext.records_batched(self, batch_size):
+            yield batch
+
+    async def records_by_keys(self, keys: List[str]) -> Dict[str, Record]:
+        found = {
+            key: self.parent.mem[key] for key in keys if key in self.parent.mem
+        }
+        index = self.parent.index()
+        wanted = set(key for key in keys if key in index).difference(found)
+        if wanted and self.parent.seekable():
+            found.update(self.parent.read_records_at(list(wanted)))
+        elif wanted:
+            async with aclosing(self.parent.stream_records()) as records:
+                async for _position, record in records:
+                    if record.key in wanted:
+                        found[record.key] = record
+                        wanted.discard(record.key)
+                        if not wanted:
+                            break
+        return {key: found.get(key, Record(key)) for key in keys}
+
+    async def record(self, key: str) -> Record:
+        return (await self.records_by_keys([key]))[key]
+
+
+@entrypoint("jsonl")
+class JSONLinesSource(JSONSource):
+    """
+    Reads records from a JSON Lines file one line at a time instead of
+    loading the whole file. Each line is a record along with its tag.
+
+    Updated records are kept in memory and appended to the file when the last
+    source using it is closed. Records may have more than one line, the last
+    one is used. Once too many lines are outdated, the file is rewritten
+    without them.
+
+    Where the last line of each record starts is found when the file is
+    opened, so looking up a record reads one line. Compressed files can't be
+    seeked, looking up records in them reads the file up to the last record
+    looked up.
+    """
+
+    CONFIG = JSONLinesSourceConfig
+    CONTEXT = JSONLinesSourceContext
+
+    @asynccontextmanager
+    async def _open_json(self, fd=None):
+        async with self.OPEN_JSON_FILES_LOCK:
+            if self.config.filename not in self.OPEN_JSON_FILES:
+                self.logger.debug(f"{self.config.filename} first open")
+                open_file = OpenJSONLinesFile(
+                    data={}, active=1, lock=asyncio.Lock()
+                )
+                self.OPEN_JSON_FILES[self.config.filename] = open_file
+                if fd is not None:
+                    self.index_lines(fd, open_file)
+            else:
+                self.logger.debug(f"{self.config.filename} already open")
+                await self.OPEN_JSON_FILES[self.config.filename].inc()
+            yield self.OPEN_JSON_FILES[self.config.filename]
+
+    def parse_line(self, line: str) -> Tuple[str, Record]:
+        data = json.loads(line)
+        tag = data.pop("tag", self.config.tag)
+        key = data.pop("key")
+        return tag, Record(key, data=data)
+
+    def line_tag_key(self, line: str) -> Tuple[str, str]:
+        """
+        Tag and key of the record on a line, without parsing the rest of it
+        when it was written by dump_line
+        """
+        match = LINE_TAG_KEY.match(line)
+        if match is not None:
+            return json.loads(match.group(1)), json.loads(match.group(2))
+        data = json.loads(line)
+        return data.get("tag", self.config.tag), data["key"]
+
+    def dump_line(self, tag: str, record: Record) -> str:
+        return json.dumps({"tag": tag, **record.export()}) + "\n"
+
+    def seekable(self) -> bool:
+        return not self.config.filename.endswith(COMPRESSED_EXTENSIONS)
+
+    def lines(self, fd) -> Iterator[Tuple[int, str]]:
+        """
+        Lines of the file along with their position, which is the byte they
+        start at if the file can be seeked or their line number if not
+        """
+        if not self.seekable():
+            yield from enumerate(fd)
+            return
+        # Telling the position of text files is slow, lines are read from the
+        # binary file under it and their lengths are added up instead
+        position = 0
+        for line in fd.buffer:
+            yield position, line.decode(fd.encoding)
+            position += len(line)
+
+    def index_lines(self, fd, open_file: OpenJSONLinesFile):
+        """
+        Find the last line of each record. data maps each tag to a dict
+        of the keys of the records with that tag and the position of their
+        last line.
+        """
+        for position, line in self.lines(fd):
+            open_file.lines += 1
+            if not line.strip():
+                continue
+            tag, key = self.line_tag_key(line)
+            index = open_file.data.setdefault(tag, {})
+            if key in index:
+                open_file.outdated += 1
+            index[key] = position
+
+    def index(self) -> Dict[str, int]:
+        """
+        Position of the last line of each record with our tag in the file
+        """
+        return self.OPEN_JSON_FILES[self.config.filename].data.get(
+            self.config.tag, {}
+        )
+
+    async def stream_records(self) -> AsyncIterator[Tuple[int, Record]]:
+        """
+        Read records with our tag from the file one line at a time, skipping
+        lines of records which were updated later in the file
+        """
+        index = self.index()
+        if not index:
+            return
+        with self.opener() as fd:
+            for position, line in self.lines(fd):
+                if not line.strip():
+                    continue
+                tag, key = self.line_tag_key(line)
+                if tag == self.config.tag and index[key] == position:
+                    yield position, self.parse_line(line)[1]
+
+    def read_records_at(self, keys: List[str]) -> Dict[str, Record]:
+        """
+        Read the records with the given keys from the last line of each, by
+        seeking to where it starts
+        """
+        index = self.index()
+        found = {}
+        with self.opener() as fd:
+            for key in sorted(keys, key=index.__getitem__):
+                fd.buffer.seek(index[key])
+                line = fd.buffer.readline().decode(fd.encoding)
+                _tag, record = self.parse_line(line)
+                found[key] = record
+        return found
+
+    async def load_fd(self, fd):
+        async with self._open_json(fd) as open_file:
+            # mem is the journal of updated records
+            self.mem = dict(open_file.journal.get(self.config.tag, {}))
+        self.logger.debug("%r opened %d lines", self, open_file.lines)
+
+    async def _empty_file_init(self):
+        async with self._open_json() as open_file:
+            return dict(open_file.journal.get(self.config.tag, {}))
+
+    async def _close(self):
+        async with self.OPEN_JSON_FILES_LOCK:
+            open_file = self.OPEN_JSON_FILES[self.config.filename]
+            if self.config.readwrite:
+                open_file.journal.setdefault(self.config.tag, {})
+                open_file.journal[self.config.tag].update(self.mem)
+            # Bail if not last open source for this file
+            if await open_file.dec():
+                del self.OPEN_JSON_FILES[self.config.filename]
+                if any(open_file.journal.values()):
+                    self.write_journal(open_file)
+        self.logger.debug("%r saved %d records", self, len(self.mem))
+        self.mem = {}
+
+    def ends_with_newline(self) -> bool:
+        with open(self.config.filename, "rb") as fd:
+            if not fd.seek(0, os.SEEK_END):
+                return True
+            fd.seek(-1, os.SEEK_END)
+            return fd.read(1) == b"\n"
+
+    def write_journal(self, open_file: OpenJSONLinesFile):
+        """
+        Append updated records to the file, or rewrite it if too many of its
+        lines would be outdated or it can't be appended to.
+        """
+        records = sum(map(len, open_file.journal.values()))
+        outdated = open_file.outdated + sum(
+            1
+            for tag, journal in open_file.journal.items()
+            for key in journal
+            if key in open_file.data.get(tag, {})
+        )
+        if (
+            os.path.isfile(self.config.filename)
+            and outdated <= self.config.compact * (open_file.lines + records)
+            and not self.config.filename.endswith(COMPRESSED_EXTENSIONS)
+        ):
+            with open(self.config.filename, "a") as fd:
+                if not self.ends_with_newline():
+                    fd.write("\n")
+                for tag, journal in open_file.journal.items():
+                    for record in journal.values():
+                        fd.write(self.dump_line(tag, record))
+            self.logger.debug(f"{self.config.filename} appended")
+            return
+        dirname, basename = os.path.split(self.config.filename)
+        tmpname = os.path.join(dirname, ".tmp." + basename)
+        with self.closer(tmpname) as fd:
+            if os.path.isfile(self.config.filename):
+                with self.opener() as read_fd:
+                    for position, line in self.lines(read_fd):
+                        if not line.strip():
+                            continue
+                        tag, key = self.line_tag_key(line)
+                        journal = open_file.journal.get(tag, {})
+                        if (
+                            open_file.data[tag][key] == position
+                            and key not in journal
+                        ):
+                            fd.write(line.rstrip("\r\n") + "\n")
+            for tag, journal in open_file.journal.items():
+                for record in journal.values():
+                    fd.write(self.dump_line(tag, record))
+        os.replace(tmpname, self.config.filename)
+        self.logger.debug(f"{self.config.filename} rewritten")
@@ -19,6 +19,16 @@ class MemorySourceContext(BaseSourceContext):
         for record in self.parent.mem.values():
             yield record
 
+    async def records_batched(
+        self, batch_size: int
+    ) -> AsyncIterator[List[Record]]:
+        records = list(self.parent.mem.values())
+        for i in range(0, len(records), batch_size):
+            yield records[i : i + batch_size]
+
+    async def records_by_keys(self, keys: List[str]) -> Dict[str, Record]:
+        return {key: self.parent.mem.get(key, Record(key)) for key in keys}
+
     async def record(self, key: str) -> Record:
         return self.parent.mem.get(key, Record(key))
 
@@ -5,7 +5,7 @@ Source subclasses are responsible for generating an integer value given an open
 source project's source URL.
 """
 import abc
-from typing import AsyncIterator, List, Optional, Callable
+from typing import Any, AsyncIterator, Dict, List, Optional, Callable
 
 from ..base import (
     BaseDataFlowFacilitatorObjectContext,
@@ -51,6 +51,33 @@ class BaseSourceContext(BaseDataFlowFacilitatorObjectContext):
         {'key': 'one', 'features': {'feed': 'face'}, 'extra': {}}
         """
 
+    async def update_many(self, records: List[Record]):
+        """
+        Updates each of the given records. Sources which can write many records
+        at once should override this, by default it calls
+        :py:meth:`update <dffml.source.source.BaseSourceContext.update>` for
+        each record.
+
+        Examples
+        --------
+
+        >>> import asyncio
+        >>> from dffml import *
+        >>>
+        >>> async def main():
+        ...     async with MemorySource(records=[]) as source:
+        ...         async with source() as ctx:
+        ...             await ctx.update_many([Record("one"), Record("two")])
+        ...             async for record in ctx.records():
+        ...                 print(record.key)
+        >>>
+        >>> asyncio.run(main())
+        one
+        two
+        """
+        for record in records:
+            await self.update(record)
+
     @abc.abstractmethod
     async def records(self) -> AsyncIterator[Record]:
         """
@@ -74,6 +101,78 @@ class BaseSourceContext(BaseDataFlowFacilitatorObjectContext):
         # mypy ignores AsyncIterator[Record], therefore this is needed
         yield Record("")  # pragma: no cover
 
+    async def records_batched(
+        self, batch_size: int
+    ) -> AsyncIterator[List[Record]]:
+        """
+        Returns lists of up to batch_size records retrieved from self.src.
+        Sources which can retrieve many records at once should override this,
+        by default it groups the records from
+        :py:meth:`records <dffml.source.source.BaseSourceContext.records>`.
+
+        Examples
+        --------
+
+        >>> import asyncio
+        >>> from dffml import *
+        >>>
+        >>> async def main():
+        ...     async with MemorySource(records=[Record(str(i)) for i in range(5)]) as source:
+        ...         async with source() as ctx:
+        ...             async for batch in ctx.records_batched(2):
+        ...                 print([record.key for record in batch])
+        >>>
+        >>> asyncio.run(main())
+        ['0', '1']
+        ['2', '3']
+        ['4']
+        """
+        batch = []
+        async for record in self.records():
+            batch.append(record)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def records_by_keys(self, keys: List[str]) -> Dict[str, Record]:
+        """
+        Returns a dict mapping each of the given keys to its record. Keys which
+        aren't present in the source map to an empty record. Sources which can
+        look up many keys at once should override this, by default it calls
+        :py:meth:`record <dffml.source.source.BaseSourceContext.record>` for
+        each key.
+
+        Examples
+        --------
+
+        >>> import asyncio
+        >>> from dffml import *
+        >>>
+        >>> async def main():
+        ...     async with MemorySource(records=[Record("example", data=dict(features=dict(dead="beef")))]) as source:
+        ...         async with source() as ctx:
+        ...             records = await ctx.records_by_keys(["example", "one"])
+        ...             for key, record in records.items():
+        ...                 print(key, record.export())
+        >>>
+        >>> asyncio.run(main())
+        example {'key': 'example', 'features': {'dead': 'beef'}, 'extra': {}}
+        one {'key': 'one', 'extra': {}}
+        """
+        return {key: await self.record(key) for key in keys}
+
+    async def arrays(self, features: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns a dict mapping each of the given feature names to an array of
+        the values of that feature for every record in the source, in the same
+        order for each feature. Models can use this to skip iterating over
+        records. Returns None if the source doesn't store its records as
+        arrays, which is the default.
+        """
+        return None
+
     @abc.abstractmethod
     async def record(self, key: str):
         """
@@ -114,6 +213,10 @@ class BaseSource(BaseDataFlowFacilitatorObject):
 
 
 class SourcesContext(AsyncContextManagerListContext):
+    # Number of records read from the first source whose keys are looked up in
+    # the other sources at once
+    JOIN_BATCH_SIZE: int = 500
+
     async def update(self, record: Record):
         """
         Updates a record for a source
@@ -122,22 +225,60 @@ class SourcesContext(AsyncContextManagerListContext):
         for source in self:
             await source.update(record)
 
+    async def update_many(self, records: List[Record]):
+        """
+        Updates many records in each source
+        """
+        for source in self:
+            await source.update_many(records)
+
     async def records(
         self, validation: Optional[Callable[[Record], bool]] = None
     ) -> AsyncIterator[Record]:
         """
         Retrieves records from all sources
         """
+        async for batch in self.records_batched(
+            self.JOIN_BATCH_SIZE, validation=validation
+        ):
+            for record in batch:
+                yield record
+
+    async def records_batched(
+        self,
+        batch_size: int,
+        validation: Optional[Callable[[Record], bool]] = None,
+    ) -> AsyncIterator[List[Record]]:
+        """
+        Retrieves lists of up to batch_size records from all sources. Records
+        are read from the first source and the other sources are asked for all
+        the keys in a batch at once.
+        """
         for source in self:
-            async for record in source.records():
+            async for batch in source.records_batched(batch_size):
+                keys = [record.key for record in batch]
                 # NOTE In Python 3.7.3 self[1:] works, however in Python >
                 # 3.7.3 only self.data works
                 for other_source in self.data[1:]:
-                    record.merge(await other_source.record(record.key))
-                if validation is None or validation(record):
-                    yield record
+                    others = await other_source.records_by_keys(keys)
+                    for record in batch:
+                        record.merge(others[record.key])
+                if validation is not None:
+                    batch = list(filter(validation, batch))
+                if batch:
+                    yield batch
             break
 
+    async def arrays(self, features: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns arrays of the values of the given features if there is only one
+        source and it stores its records as arrays, otherwise None. See
+        :py:meth:`arrays <dffml.source.source.BaseSourceContext.arrays>`.
+        """
+        if len(self.data) != 1:
+            return None
+        return await self.data[0].arrays(features)
+
     async def record(self, key: str):
         """
         Retrieve and or register record will all sources
@@ -165,14 +306,25 @@ class Sources(AsyncContextManagerList):
 
 
 class ValidationSourcesContext(SourcesContext):
-    async def records(
-        self, validation: Optional[Callable[[Record], bool]] = None
-    ) -> AsyncIterator[Record]:
-        async for record in super().records():
-            if self.parent.validation(record) and (
+    async def arrays(self, features: List[str]) -> Optional[Dict[str, Any]]:
+        # Arrays would include records which don't pass validation
+        return None
+
+    async def records_batched(
+        self,
+        batch_size: int,
+        validation: Optional[Callable[[Record], bool]] = None,
+    ) -> AsyncIterator[List[Record]]:
+        # records() gets its records from here too
+        def valid(record: Record) -> bool:
+            return self.parent.validation(record) and (
                 validation is None or validation(record)
-            ):
-                yield record
+            )
+
+        async for batch in super().records_batched(
+            batch_size, validation=valid
+        ):
+            yield batch
 
 
 class ValidationSources(Sources):
@@ -7,7 +7,7 @@ running concurrent tasks.
 import inspect
 import asyncio
 from collections import UserList
-from contextlib import AsyncExitStack
+from contextlib import AsyncExitStack, asynccontextmanager
 from typing import (
     Dict,
     Any,
@@ -184,3 +184,17 @@ def context_stacker(
             await self._stack.aclose()
 
     return ContextStacker
+
+
+@asynccontextmanager
+async def aclosing(agen: AsyncIterator) -> AsyncIterator:
+    """
+    Close an async generator once the block is exited, like
+    ``contextlib.aclosing`` in Python 3.10. Breaking out of an ``async for``
+    leaves the generator suspended, so anything it has open, such as a file,
+    would stay open until the generator is garbage collected.
+    """
+    try:
+        yield agen
+    finally:
+        await agen.aclose()
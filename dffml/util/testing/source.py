@@ -92,6 +92,40 @@ class SourceTest(abc.ABC):
                     self.assertEqual(
                         records[empty_key].features(), empty_record.features()
                     )
+                with self.subTest(batched=[full_key, empty_key]):
+                    batches = [
+                        [record.key for record in batch]
+                        async for batch in sourceContext.records_batched(1)
+                    ]
+                    self.assertEqual(len(batches), 2)
+                    self.assertEqual(
+                        sorted(sum(batches, [])), sorted([full_key, empty_key])
+                    )
+                with self.subTest(by_keys=[full_key, empty_key, "missing"]):
+                    records = await sourceContext.records_by_keys(
+                        [full_key, empty_key, "missing"]
+                    )
+                    self.assertEqual(
+                        list(records), [full_key, empty_key, "missing"]
+                    )
+                    self.assertEqual(
+                        records[full_key].features(), full_record.features()
+                    )
+                    self.assertEqual(
+                        records[empty_key].features(), empty_record.features()
+                    )
+                    self.assertFalse(records["missing"].features())
+                with self.subTest(update_many=[full_key, empty_key]):
+                    features = dict(empty_record.features(), PetalWidth=1.5)
+                    await sourceContext.update_many(
+                        [
+                            Record(key, data={"features": features})
+                            for key in [full_key, empty_key]
+                        ]
+                    )
+                    for key in [full_key, empty_key]:
+                        record = await sourceContext.record(key)
+                        self.assertEqual(record.features(), features)
 
 
 class FileSourceTest(SourceTest):
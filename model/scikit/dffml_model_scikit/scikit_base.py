@@ -75,17 +75,28 @@ class ScikitContext(ModelContext):
         pass
 
     async def train(self, sources: Sources):
-        data = []
-        async for record in sources.with_features(
+        arrays = await sources.arrays(
             self.features + [self.parent.config.predict.NAME]
-        ):
-            feature_data = record.features(
+        )
+        if arrays is not None:
+            xdata = self.np.column_stack(
+                [arrays[feature] for feature in self.features]
+            )
+            ydata = arrays[self.parent.config.predict.NAME]
+        else:
+            data = []
+            async for record in sources.with_features(
                 self.features + [self.parent.config.predict.NAME]
+            ):
+                feature_data = record.features(
+                    self.features + [self.parent.config.predict.NAME]
+                )
+                data.append(feature_data)
+            df = self.pd.DataFrame(data)
+            xdata = self.np.array(
+                df.drop([self.parent.config.predict.NAME], 1)
             )
-            data.append(feature_data)
-        df = self.pd.DataFrame(data)
-        xdata = self.np.array(df.drop([self.parent.config.predict.NAME], 1))
-        ydata = self.np.array(df[self.parent.config.predict.NAME])
+            ydata = self.np.array(df[self.parent.config.predict.NAME])
         self.logger.info("Number of input records: {}".format(len(xdata)))
         self.clf.fit(xdata, ydata)
         self.joblib.dump(self.clf, str(self._filepath))
@@ -144,12 +155,18 @@ class ScikitContextUnsprvised(ScikitContext):
         return self
 
     async def train(self, sources: Sources):
-        data = []
-        async for record in sources.with_features(self.features):
-            feature_data = record.features(self.features)
-            data.append(feature_data)
-        df = self.pd.DataFrame(data)
-        xdata = self.np.array(df)
+        arrays = await sources.arrays(self.features)
+        if arrays is not None:
+            xdata = self.np.column_stack(
+                [arrays[feature] for feature in self.features]
+            )
+        else:
+            data = []
+            async for record in sources.with_features(self.features):
+                feature_data = record.features(self.features)
+                data.append(feature_data)
+            df = self.pd.DataFrame(data)
+            xdata = self.np.array(df)
         self.logger.info("Number of input records: {}".format(len(xdata)))
         self.clf.fit(xdata)
         self.joblib.dump(self.clf, str(self._filepath))
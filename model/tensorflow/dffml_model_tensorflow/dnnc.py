@@ -234,6 +234,29 @@ class DNNClassifierModelContext(TensorflowModelContext):
         return self._model
 
     async def sources_to_array(self, sources: Sources):
+        arrays = await sources.arrays(
+            self.features + [self.parent.config.predict.NAME]
+        )
+        if arrays is not None:
+            labels = arrays[self.parent.config.predict.NAME].tolist()
+            # Only rows classified as one of the classifications are used
+            keep = self.np.array(
+                [label in self.classifications for label in labels],
+                dtype=bool,
+            )
+            if not keep.any():
+                raise ValueError("No records to train on")
+            y_cols = self.np.array(
+                [
+                    self.classifications[label]
+                    for label in labels
+                    if label in self.classifications
+                ]
+            )
+            x_cols = {
+                feature: arrays[feature][keep] for feature in self.features
+            }
+            return x_cols, y_cols
         x_cols: Dict[str, Any] = {feature: [] for feature in self.features}
         y_cols = []
         for record in [
@@ -57,6 +57,11 @@ class DNNRegressionModelContext(TensorflowModelContext):
         return self._model
 
     async def sources_to_array(self, sources: Sources):
+        arrays = await sources.arrays(self.all_features)
+        if arrays is not None:
+            x_cols = {feature: arrays[feature] for feature in self.features}
+            y_cols = arrays[self.parent.config.predict.NAME]
+            return x_cols, y_cols
         x_cols: Dict[str, Any] = {feature: [] for feature in self.features}
         y_cols = []
 
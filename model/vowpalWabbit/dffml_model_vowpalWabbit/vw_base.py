@@ -252,18 +252,28 @@ class VWContext(ModelContext):
             class_cost = [
                 feature.NAME for feature in self.parent.config.class_cost
             ]
-        async for record in sources.with_features(
+        cols = (
             self.features
             + [self.parent.config.predict.NAME]
             + self.parent.config.extra_cols
-        ):
-            feature_data = record.features(
-                self.features
-                + [self.parent.config.predict.NAME]
-                + self.parent.config.extra_cols
+        )
+        arrays = await sources.arrays(cols)
+        if arrays is not None:
+            # Features with more than one value per record are kept as one
+            # column, like they are when built from records
+            vw_data = pd.DataFrame(
+                {
+                    name: arrays[name]
+                    if arrays[name].ndim == 1
+                    else list(arrays[name])
+                    for name in cols
+                }
             )
-            data.append(feature_data)
-        vw_data = pd.DataFrame(data)
+        else:
+            async for record in sources.with_features(cols):
+                feature_data = record.features(cols)
+                data.append(feature_data)
+            vw_data = pd.DataFrame(data)
         if self.parent.config.convert_to_vw:
             vw_data = df_to_vw_format(
                 vw_data,
@@ -0,0 +1,75 @@
+"""
+Time taken to write predictions for records back to a DbSource backed by
+SQLite, calling update for each record versus calling update_many once per
+batch of records.
+
+Usage::
+
+    $ python scripts/benchmarks/db_source_update.py 100000 10000
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+from dffml import (
+    Record,
+    DbSource,
+    DbSourceConfig,
+    SqliteDatabase,
+    SqliteDatabaseConfig,
+)
+
+COLS = {
+    "key": "varchar(100) NOT NULL PRIMARY KEY",
+    "feature_number": "float DEFAULT NULL",
+    "odd_value": "int DEFAULT NULL",
+    "odd_confidence": "float DEFAULT NULL",
+}
+
+
+def make_records(count: int):
+    records = []
+    for i in range(count):
+        record = Record(str(i), data={"features": {"number": i}})
+        record.predicted("odd", i % 2, 1.0)
+        records.append(record)
+    return records
+
+
+async def run(filename: str, records, batch_size: int = 0) -> float:
+    db = SqliteDatabase(SqliteDatabaseConfig(filename=filename))
+    async with db:
+        async with db() as db_ctx:
+            await db_ctx.create_table("benchmark", COLS)
+    source = DbSource(
+        DbSourceConfig(db=db, table_name="benchmark", model_columns=list(COLS))
+    )
+    async with source:
+        async with source() as sctx:
+            start = time.perf_counter()
+            if not batch_size:
+                for record in records:
+                    await sctx.update(record)
+            else:
+                for i in range(0, len(records), batch_size):
+                    await sctx.update_many(records[i : i + batch_size])
+            return time.perf_counter() - start
+
+
+def main(count: str = "100000", batch_size: str = "10000"):
+    records = make_records(int(count))
+    with tempfile.TemporaryDirectory() as tempdir:
+        for name, size in [("update", 0), ("update_many", int(batch_size))]:
+            total = asyncio.run(
+                run(os.path.join(tempdir, f"{name}.db"), records, size)
+            )
+            print(
+                f"{name}: {len(records)} records in {total:.2f}s"
+                f" ({len(records) / total:.0f} records/s)"
+            )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,106 @@
+"""
+Throughput of concurrent lookups and writes going through the
+``db_query_lookup`` and ``db_query_insert_or_update`` operations on an
+SqliteDatabase. Each context of the dataflow looks up a range of rows, and one
+in every ``write_every`` contexts also writes a row.
+
+Runs once with a single connection (``readers=0``, rollback journal) and once
+with a pool of reader connections in WAL mode.
+
+Usage::
+
+    $ python scripts/benchmarks/db_sqlite_concurrency.py 100000 1000 4
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+from dffml import (
+    DataFlow,
+    Input,
+    MemoryOrchestrator,
+    SqliteDatabase,
+    SqliteDatabaseConfig,
+    DatabaseQueryConfig,
+    db_query_lookup,
+    db_query_insert_or_update,
+)
+
+TABLE = "benchmark"
+ROWS_PER_LOOKUP = 1000
+
+
+async def setup(filename: str, rows: int):
+    sdb = SqliteDatabase(SqliteDatabaseConfig(filename=filename, readers=0))
+    async with sdb, sdb() as db_ctx:
+        await db_ctx.create_table(
+            TABLE, {"key": "INTEGER NOT NULL PRIMARY KEY", "value": "real"}
+        )
+        await db_ctx.insert_many(
+            TABLE, [{"key": i, "value": i / 2} for i in range(rows)]
+        )
+
+
+async def run(sdb: SqliteDatabase, rows: int, contexts: int, write_every: int):
+    dataflow = DataFlow(
+        operations={
+            "lookup": db_query_lookup.op,
+            "insert_or_update": db_query_insert_or_update.op,
+        },
+        configs={
+            "lookup": DatabaseQueryConfig(database=sdb),
+            "insert_or_update": DatabaseQueryConfig(database=sdb),
+        },
+    )
+    inputs = {}
+    for i in range(contexts):
+        start = (i * ROWS_PER_LOOKUP) % rows
+        inputs[str(i)] = [
+            Input(
+                value=TABLE, definition=db_query_lookup.op.inputs["table_name"]
+            ),
+            Input(value=[], definition=db_query_lookup.op.inputs["cols"]),
+            Input(
+                value=[
+                    [["key", ">=", start]],
+                    [["key", "<", start + ROWS_PER_LOOKUP]],
+                ],
+                definition=db_query_lookup.op.inputs["conditions"],
+            ),
+        ]
+        if i % write_every == 0:
+            inputs[str(i)].append(
+                Input(
+                    value={"key": start, "value": -1},
+                    definition=db_query_insert_or_update.op.inputs["data"],
+                )
+            )
+    start = time.perf_counter()
+    async for _ctx, _results in MemoryOrchestrator.run(dataflow, inputs):
+        pass
+    return time.perf_counter() - start
+
+
+def main(rows: str = "100000", contexts: str = "1000", write_every: str = "4"):
+    rows, contexts, write_every = int(rows), int(contexts), int(write_every)
+    with tempfile.TemporaryDirectory() as tempdir:
+        for name, config in [
+            ("single connection", dict(readers=0, journal_mode="DELETE")),
+            ("WAL with 4 readers", dict(readers=4, journal_mode="WAL")),
+        ]:
+            filename = os.path.join(tempdir, name.replace(" ", "_") + ".db")
+            asyncio.run(setup(filename, rows))
+            sdb = SqliteDatabase(
+                SqliteDatabaseConfig(filename=filename, **config)
+            )
+            total = asyncio.run(run(sdb, rows, contexts, write_every))
+            print(
+                f"{name}: {contexts} contexts in {total:.2f}s"
+                f" ({contexts / total:.0f} contexts/s)"
+            )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
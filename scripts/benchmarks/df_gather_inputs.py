@@ -0,0 +1,70 @@
+"""
+Scheduling cost per input of the memory orchestrator for a context which keeps
+receiving new inputs one input set at a time (similar to an operation yielding
+every commit in a git log). With ``--expand`` all the inputs are instead output
+at once by an operation which expands its output.
+
+Usage::
+
+    $ python scripts/benchmarks/df_gather_inputs.py 500 1000 2000 4000
+    $ python scripts/benchmarks/df_gather_inputs.py --expand 10000 100000
+"""
+import sys
+import time
+import asyncio
+
+from dffml import op, Definition, DataFlow, Input, MemoryOrchestrator
+
+COUNT = Definition(name="count", primitive="int")
+COMMIT = Definition(name="commit", primitive="int")
+AUTHOR = Definition(name="author", primitive="str")
+
+
+@op(inputs={"count": COUNT}, outputs={"commit": COMMIT, "author": AUTHOR})
+async def commits(count):
+    for i in range(count):
+        yield {"commit": i, "author": str(i % 7)}
+
+
+@op(
+    inputs={"count": COUNT},
+    outputs={"commit": COMMIT, "author": AUTHOR},
+    expand=["commit"],
+)
+async def all_commits(count):
+    return {"commit": list(range(count)), "author": "0"}
+
+
+@op(inputs={"commit": COMMIT}, outputs={})
+async def inspect_commit(commit):
+    return None
+
+
+DATAFLOW = DataFlow.auto(commits, inspect_commit)
+EXPAND_DATAFLOW = DataFlow.auto(all_commits, inspect_commit)
+
+
+async def run_once(dataflow: DataFlow, count: int) -> float:
+    async with MemoryOrchestrator.withconfig({}) as orchestrator:
+        async with orchestrator(dataflow) as octx:
+            start = time.perf_counter()
+            async for _ctx, _results in octx.run(
+                {"bench": [Input(value=count, definition=COUNT)]}
+            ):
+                pass
+            return time.perf_counter() - start
+
+
+async def main(*args: str):
+    dataflow = DATAFLOW
+    if args and args[0] == "--expand":
+        dataflow = EXPAND_DATAFLOW
+        args = args[1:]
+    print(f"{'inputs':>8} {'total (s)':>10} {'per input (us)':>15}")
+    for count in map(int, args or [500, 1000, 2000, 4000]):
+        elapsed = await run_once(dataflow, count)
+        print(f"{count:>8} {elapsed:>10.3f} {elapsed / count * 1e6:>15.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*sys.argv[1:]))
@@ -0,0 +1,72 @@
+"""
+Memory used per input by the memory orchestrator for a dataflow which fans
+out. One operation expands a count into that many numbers, each of which is
+squared by another operation, so every number results in two inputs and one
+parameter set.
+
+Peak is the most memory used while the dataflow was running. Retained is the
+memory still used once it completed, with the context kept around
+(``keep_ctxs``), which is mostly the inputs themselves.
+
+Usage::
+
+    $ python scripts/benchmarks/df_memory.py 10000 100000
+"""
+import sys
+import asyncio
+import tracemalloc
+from typing import Tuple
+
+from dffml import op, Definition, DataFlow, Input, MemoryOrchestrator
+from dffml.util.cli.arg import parse_unknown
+
+COUNT = Definition(name="count", primitive="int")
+NUMBER = Definition(name="number", primitive="int")
+SQUARED = Definition(name="squared", primitive="int")
+
+
+@op(inputs={"count": COUNT}, outputs={"number": NUMBER}, expand=["number"])
+async def fan_out(count):
+    return {"number": list(range(count))}
+
+
+@op(inputs={"number": NUMBER}, outputs={"squared": SQUARED})
+async def square(number):
+    return {"squared": number * number}
+
+
+DATAFLOW = DataFlow.auto(fan_out, square)
+
+
+async def run_once(count: int) -> Tuple[int, int]:
+    async with MemoryOrchestrator.withconfig(
+        parse_unknown("-orchestrator-keep_ctxs")
+    ) as orchestrator:
+        async with orchestrator(DATAFLOW) as octx:
+            tracemalloc.start()
+            try:
+                async for _ctx, _results in octx.run(
+                    {"bench": [Input(value=count, definition=COUNT)]}
+                ):
+                    pass
+                retained, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            return peak, retained
+
+
+async def main(*args: str):
+    print(
+        f"{'numbers':>8} {'peak (MiB)':>11} {'per input (B)':>14}"
+        f" {'retained (MiB)':>15} {'per input (B)':>14}"
+    )
+    for count in map(int, args or [10000, 100000]):
+        peak, retained = await run_once(count)
+        print(
+            f"{count:>8} {peak / 2 ** 20:>11.1f} {peak / (count * 2):>14.0f}"
+            f" {retained / 2 ** 20:>15.1f} {retained / (count * 2):>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*sys.argv[1:]))
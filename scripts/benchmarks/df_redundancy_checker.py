@@ -0,0 +1,100 @@
+"""
+Cost per parameter set of checking and recording which parameter sets an
+operation has already been run with, using the memory redundancy checker.
+Parameter sets are checked once all at once (``batch``), and once each on
+their own the way ``gather_inputs`` checks them as it generates them
+(``single``). Each of those runs checks every parameter set twice, the second
+time all of them are redundant.
+
+Usage::
+
+    $ python scripts/benchmarks/df_redundancy_checker.py 10 1000 100000
+"""
+import sys
+import time
+import asyncio
+
+from dffml import (
+    op,
+    Definition,
+    Input,
+    Parameter,
+    StringInputSetContext,
+    BaseConfig,
+    BaseRedundancyCheckerConfig,
+    MemoryKeyValueStore,
+    MemoryRedundancyChecker,
+    MemoryParameterSet,
+    MemoryParameterSetConfig,
+)
+
+NUMBER = Definition(name="number", primitive="int")
+LETTER = Definition(name="letter", primitive="str")
+
+
+@op(inputs={"number": NUMBER, "letter": LETTER}, outputs={})
+async def pair(number, letter):
+    return None
+
+
+OPERATION = pair.op._replace(instance_name=pair.op.name)
+
+
+def parameter_sets(count: int):
+    ctx = StringInputSetContext("bench")
+    return [
+        MemoryParameterSet(
+            MemoryParameterSetConfig(
+                ctx=ctx,
+                parameters=[
+                    Parameter(
+                        key=key,
+                        value=i,
+                        origin=Input(value=i, definition=definition),
+                        definition=definition,
+                    )
+                    for key, definition in pair.op.inputs.items()
+                ],
+            )
+        )
+        for i in range(count)
+    ]
+
+
+async def run_once(count: int, batch: bool) -> float:
+    to_check = parameter_sets(count)
+    async with MemoryRedundancyChecker(
+        BaseRedundancyCheckerConfig(
+            key_value_store=MemoryKeyValueStore(BaseConfig())
+        )
+    ) as rchecker:
+        async with rchecker() as rctx:
+            start = time.perf_counter()
+            for _ in range(2):
+                if batch:
+                    async for _parameter_set, _taken in rctx.take_if_non_existant(
+                        OPERATION, *to_check
+                    ):
+                        pass
+                    continue
+                for parameter_set in to_check:
+                    async for _parameter_set, _taken in rctx.take_if_non_existant(
+                        OPERATION, parameter_set
+                    ):
+                        pass
+            return time.perf_counter() - start
+
+
+async def main(*args: str):
+    print(f"{'parameter sets':>14} {'batch (us)':>11} {'single (us)':>12}")
+    for count in map(int, args or [10, 1000, 100000]):
+        batch = await run_once(count, True)
+        single = await run_once(count, False)
+        print(
+            f"{count:>14} {batch / (count * 2) * 1e6:>11.1f}"
+            f" {single / (count * 2) * 1e6:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*sys.argv[1:]))
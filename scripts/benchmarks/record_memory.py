@@ -0,0 +1,58 @@
+"""
+Memory used per record by records as a MemorySource would hold them, for
+records with only a key, records loaded with features, and records which have
+also been given a prediction.
+
+Usage::
+
+    $ python scripts/benchmarks/record_memory.py 100000 1000000
+"""
+import sys
+import tracemalloc
+
+from dffml import Record
+
+FEATURES = ["feed", "face", "dead", "beef"]
+
+
+def key_only(i: int) -> Record:
+    return Record(str(i))
+
+
+def with_features(i: int) -> Record:
+    return Record(str(i), data={"features": {name: i for name in FEATURES}})
+
+
+def predicted(i: int) -> Record:
+    record = with_features(i)
+    record.predicted("label", i % 2, 1.0)
+    return record
+
+
+def measure(make, count: int) -> int:
+    tracemalloc.start()
+    try:
+        records = {str(i): make(i) for i in range(count)}
+        used, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(records) == count
+    return used
+
+
+def main(*args: str):
+    print(
+        f"{'records':>8} {'kind':>14} {'total (MiB)':>12}"
+        f" {'per record (B)':>15}"
+    )
+    for count in map(int, args or [100000]):
+        for make in [key_only, with_features, predicted]:
+            used = measure(make, count)
+            print(
+                f"{count:>8} {make.__name__:>14} {used / 2 ** 20:>12.1f}"
+                f" {used / count:>15.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
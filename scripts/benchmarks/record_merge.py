@@ -0,0 +1,48 @@
+"""
+Time taken to merge the records of two sources, as SourcesContext does when
+it's given more than one source. Each record in the first source has one
+feature and a prediction, the matching record in the second source has
+another feature.
+
+Usage::
+
+    $ python scripts/benchmarks/record_merge.py 1000000
+"""
+import sys
+import time
+
+from dffml import Record
+
+
+def main(count: str = "1000000"):
+    count = int(count)
+    first = [
+        Record(
+            str(i),
+            data={
+                "features": {"number": i},
+                "prediction": {"odd": {"value": i % 2, "confidence": 1.0}},
+            },
+        )
+        for i in range(count)
+    ]
+    second = [
+        Record(str(i), data={"features": {"square": i * i}})
+        for i in range(count)
+    ]
+    start = time.perf_counter()
+    for record, other in zip(first, second):
+        record.merge(other)
+    total = time.perf_counter() - start
+    assert first[-1].features() == {
+        "number": count - 1,
+        "square": (count - 1) ** 2,
+    }
+    print(
+        f"{count} merges in {total:.2f}s"
+        f" ({total / count * 1e6:.2f}us per merge)"
+    )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,91 @@
+"""
+Peak memory and time to first record when iterating over all the records in a
+large CSV file, with the default CSVSource which loads the whole file on open,
+and with the streaming CSVSource (``stream``) which reads it row by row.
+
+Each mode runs in its own process so that peak RSS isn't shared between them.
+Baseline is the peak RSS of that process before the source was opened.
+
+Usage::
+
+    $ python scripts/benchmarks/source_csv.py 1000000 memory stream
+"""
+import os
+import sys
+import csv
+import time
+import random
+import asyncio
+import resource
+import tempfile
+import multiprocessing
+
+from dffml import CSVSource, CSVSourceConfig
+
+FEATURES = ["feed", "face", "dead", "beef"]
+
+
+def maxrss() -> int:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def generate(filename: str, rows: int):
+    with open(filename, "w") as fd:
+        writer = csv.writer(fd)
+        writer.writerow(["key", "tag", "count", "label"] + FEATURES)
+        for i in range(rows):
+            writer.writerow(
+                [str(i), "untagged", random.randint(0, 100), f"label{i % 10}"]
+                + [random.random() for _feature in FEATURES]
+            )
+
+
+async def iterate(filename: str, stream: bool):
+    config = {"filename": filename}
+    if stream:
+        config["stream"] = True
+    baseline = maxrss()
+    start = time.perf_counter()
+    first = None
+    count = 0
+    async with CSVSource(CSVSourceConfig(**config)) as source:
+        async with source() as sctx:
+            async for _record in sctx.records():
+                if first is None:
+                    first = time.perf_counter() - start
+                count += 1
+    return count, baseline, maxrss(), first, time.perf_counter() - start
+
+
+def child(conn, filename: str, mode: str):
+    conn.send(asyncio.run(iterate(filename, mode == "stream")))
+    conn.close()
+
+
+def main(rows: str = "1000000", *modes: str):
+    rows = int(rows)
+    ctx = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = os.path.join(tempdir, "records.csv")
+        generate(filename, rows)
+        print(f"{rows} rows, {os.stat(filename).st_size / 2 ** 20:.1f} MiB")
+        print(
+            f"{'mode':>8} {'baseline (MiB)':>15} {'peak (MiB)':>11}"
+            f" {'first (s)':>10} {'total (s)':>10}"
+        )
+        for mode in modes or ["memory", "stream"]:
+            parent_conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(target=child, args=(child_conn, filename, mode))
+            proc.start()
+            count, baseline, peak, first, total = parent_conn.recv()
+            proc.join()
+            assert count == rows, f"{mode} read {count} of {rows} records"
+            print(
+                f"{mode:>8} {baseline / 2 ** 20:>15.1f}"
+                f" {peak / 2 ** 20:>11.1f} {first:>10.3f} {total:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,84 @@
+"""
+Time taken to write and then read back a CSV file of the given size (in MiB)
+with each compression codec FileSource supports. Reads go through
+FileSource.opener, which decompresses in a background thread while rows are
+parsed, and are compared against parsing rows straight from the codec's own
+open function.
+
+Codecs whose libraries aren't installed (``zstandard`` for ``.zst``) are
+skipped.
+
+Usage::
+
+    $ python scripts/benchmarks/source_file_codecs.py 1024 6 gz bz2 xz zst
+"""
+import os
+import bz2
+import csv
+import sys
+import gzip
+import lzma
+import time
+import random
+import tempfile
+import importlib.util
+
+from dffml import CSVSource, CSVSourceConfig
+
+CODECS = {
+    "gz": lambda filename: gzip.open(filename, "rt"),
+    "bz2": lambda filename: bz2.open(filename, "rt"),
+    "xz": lambda filename: lzma.open(filename, "rt"),
+    "zst": lambda filename: importlib.import_module("zstandard").open(
+        filename, "rt"
+    ),
+}
+
+
+def parse(fd) -> int:
+    return sum(1 for _row in csv.reader(fd))
+
+
+def main(size: str = "1024", compresslevel: str = "6", *codecs):
+    size = int(size) * 2 ** 20
+    if not codecs:
+        codecs = list(CODECS)
+    with tempfile.TemporaryDirectory() as tempdir:
+        for codec in codecs:
+            if codec == "zst" and not importlib.util.find_spec("zstandard"):
+                print(f"{codec}: skipped, zstandard is not installed")
+                continue
+            filename = os.path.join(tempdir, f"benchmark.csv.{codec}")
+            source = CSVSource(
+                CSVSourceConfig(
+                    filename=filename, compresslevel=int(compresslevel)
+                )
+            )
+            random.seed(0)
+            start = time.perf_counter()
+            with source.closer() as fd:
+                written = 0
+                while written < size:
+                    row = [str(written), random.random(), random.random()]
+                    written += fd.write(",".join(map(str, row)) + "\n")
+            write = time.perf_counter() - start
+            compressed = os.stat(filename).st_size
+            start = time.perf_counter()
+            with CODECS[codec](filename) as fd:
+                rows = parse(fd)
+            direct = time.perf_counter() - start
+            start = time.perf_counter()
+            with source.opener() as fd:
+                assert parse(fd) == rows
+            threaded = time.perf_counter() - start
+            print(
+                f"{codec}: ratio {size / compressed:.2f}"
+                f" write {write:.2f}s"
+                f" read {direct:.2f}s"
+                f" threaded read {threaded:.2f}s"
+            )
+            os.unlink(filename)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,86 @@
+"""
+Time taken and Python function calls made to create the text and values of
+SQL queries with SqliteDatabaseContext, with the query text cache and with the
+cache cleared before every query (which is how long creating the text took
+before it was cached). Function calls are counted with cProfile, they don't
+vary from run to run like the timings do.
+
+Usage::
+
+    $ python scripts/benchmarks/sql_query_text.py 20000
+"""
+import sys
+import time
+import pstats
+import cProfile
+
+from dffml import SqliteDatabaseContext
+
+ROUNDS = 5
+
+CACHED = [
+    SqliteDatabaseContext.condition_expression,
+    SqliteDatabaseContext.insert_query_text,
+    SqliteDatabaseContext.insert_or_update_query_text,
+    SqliteDatabaseContext.update_query_text,
+    SqliteDatabaseContext.lookup_query_text,
+]
+
+
+def clear():
+    for method in CACHED:
+        method.cache_clear()
+
+
+def main(count: str = "20000"):
+    count = int(count)
+    db_ctx = SqliteDatabaseContext(None)
+    data = {"key": 10, "firstName": "John", "lastName": "Doe", "age": 16}
+    conditions = [
+        [["firstName", "=", "John"], ["lastName", "=", "Miles"]],
+        [["age", "<", 38], ["key", "IN", [10, 11, 12]]],
+    ]
+    queries = {
+        "insert_or_update_query": lambda: db_ctx.insert_or_update_query(
+            "myTable", data, [["key"]]
+        ),
+        "update_query": lambda: db_ctx.update_query(
+            "myTable", data, conditions
+        ),
+        "lookup_query": lambda: db_ctx.lookup_query(
+            "myTable", ["firstName", "age"], conditions
+        ),
+    }
+    for name, query in queries.items():
+        timings = {}
+        for cache in ["uncached", "cached"]:
+            # Fastest of several rounds, the slower ones were interrupted
+            rounds = []
+            for _round in range(ROUNDS):
+                start = time.perf_counter()
+                for _i in range(count):
+                    if cache == "uncached":
+                        clear()
+                    query()
+                rounds.append(time.perf_counter() - start)
+            if cache == "uncached":
+                clear()
+            profile = cProfile.Profile()
+            profile.enable()
+            query()
+            profile.disable()
+            timings[cache] = (
+                min(rounds),
+                pstats.Stats(profile).total_calls,
+            )
+        print(
+            f"{name}: "
+            + ", ".join(
+                f"{cache} {total / count * 1e6:.2f}us {calls} calls"
+                for cache, (total, calls) in timings.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -73,11 +73,13 @@ setup(
         "dffml.source": [
             "csv = dffml.source.csv:CSVSource",
             "json = dffml.source.json:JSONSource",
+            "jsonl = dffml.source.json:JSONLinesSource",
             "memory = dffml.source.memory:MemorySource",
             "idx1 = dffml.source.idx1:IDX1Source",
             "idx3 = dffml.source.idx3:IDX3Source",
             "db = dffml.source.db:DbSource",
             "ini = dffml.source.ini:INISource",
+            "array = dffml.source.array:ArraySource",
         ],
         "dffml.port": ["json = dffml.port.json:JSON"],
         "dffml.service.cli": ["dev = dffml.service.dev:Develop"],
@@ -110,6 +112,8 @@ setup(
             "db_query_remove = dffml.operation.db:db_query_remove",
             "db_query_insert_or_update = dffml.operation.db:db_query_insert_or_update",
             "db_query_lookup = dffml.operation.db:db_query_lookup",
+            "db_query_insert_many = dffml.operation.db:db_query_insert_many",
+            "db_query_insert_or_update_many = dffml.operation.db:db_query_insert_or_update_many",
         ],
         "dffml.kvstore": ["memory = dffml.df.memory:MemoryKeyValueStore"],
         "dffml.input.network": ["memory = dffml.df.memory:MemoryInputNetwork"],
@@ -1,10 +1,12 @@
 import ssl
-from typing import Dict, Any, List, Optional, AsyncIterator
+import functools
+import itertools
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 
 import aiomysql
 
 from dffml.db.base import BaseDatabase, Conditions
-from dffml.db.sql import SQLDatabaseContext
+from dffml.db.sql import SQLDatabaseContext, QUERY_CACHE_SIZE
 from dffml.base import config
 from dffml.util.entrypoint import entrypoint
 
@@ -22,6 +24,24 @@ class MySQLDatabaseConfig:
 class MySQLDatabaseContext(SQLDatabaseContext):
     BIND_DECLARATION: str = "%s"
 
+    @classmethod
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def insert_or_update_query_text(
+        cls,
+        table_name: str,
+        cols: Tuple[str],
+        unique_cols: Tuple[Tuple[str, ...], ...],
+    ) -> str:
+        # MySQL updates the row if any unique key conflicts, so unique_cols
+        # isn't needed. VALUES() refers to the value the row would have
+        # inserted, when executemany sends many rows as one INSERT it's each
+        # row's own.
+        return (
+            cls.insert_query_text(table_name, cols)
+            + " ON DUPLICATE KEY UPDATE "
+            + " ,".join([f"`{col}` = VALUES(`{col}`)" for col in cols])
+        )
+
     async def create_table(
         self, table_name: str, cols: Dict[str, str]
     ) -> None:
@@ -34,6 +54,18 @@ class MySQLDatabaseContext(SQLDatabaseContext):
         self.logger.debug(query)
         await self.conn.execute(query, list(data.values()))
 
+    async def insert_many(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> None:
+        for cols, rows in itertools.groupby(data, key=tuple):
+            query, _query_values = self.insert_query(
+                table_name, dict.fromkeys(cols)
+            )
+            self.logger.debug(query)
+            await self.conn.executemany(
+                query, [list(row.values()) for row in rows]
+            )
+
     async def update(
         self,
         table_name: str,
@@ -67,16 +99,23 @@ class MySQLDatabaseContext(SQLDatabaseContext):
         await self.conn.execute(query, query_values)
 
     async def insert_or_update(self, table_name: str, data: Dict[str, Any]):
-        col_exp = ", ".join([f"`{col}`" for col in data])
-        query = (
-            f"INSERT INTO {table_name} "
-            + f"( {col_exp} )"
-            + f" VALUES( {', '.join([self.BIND_DECLARATION] * len(data))} ) "
-            + " ON DUPLICATE KEY UPDATE "
-            + " ,".join([f"`{col}` = {self.BIND_DECLARATION}" for col in data])
+        query, query_values = self.insert_or_update_query(
+            table_name, data, []
         )
-        vals = list(data.values()) * 2
-        await self.conn.execute(query, vals)
+        self.logger.debug(query)
+        await self.conn.execute(query, query_values)
+
+    async def insert_or_update_many(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> None:
+        for cols, rows in itertools.groupby(data, key=tuple):
+            query, _query_values = self.insert_or_update_query(
+                table_name, dict.fromkeys(cols), []
+            )
+            self.logger.debug(query)
+            await self.conn.executemany(
+                query, [list(row.values()) for row in rows]
+            )
 
     async def __aenter__(self) -> "MySQLDatabaseContext":
         self.__conn = self.parent.db.cursor(aiomysql.DictCursor)
@@ -1,6 +1,7 @@
+import re
 import ssl
 import collections
-from typing import AsyncIterator, NamedTuple, Dict, List
+from typing import AsyncIterator, NamedTuple, Dict, List, Any, Optional
 
 import aiomysql
 
@@ -22,11 +23,91 @@ class MySQLSourceConfig(BaseConfig, NamedTuple):
     record_query: str
     model_columns: List[str]
     ca: str = None
+    records_keys_query: str = None
+    pool_size: int = 10
+    flush_size: int = 1
+    fetch_size: int = 1000
+
+
+def executemany_query(update_query: str) -> Optional[str]:
+    """
+    Rewrites an ``update_query`` which binds each value again after ``ON
+    DUPLICATE KEY UPDATE`` so that each value is bound once. The values bound
+    after it are replaced with ``VALUES()`` of the column they were bound
+    for, so that rows can be sent with ``executemany`` as one multi row
+    ``INSERT``. Queries which already bind each value once are kept as they
+    are. Returns ``None`` if the query can't be rewritten.
+    """
+    head, *tail = re.split(
+        r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b",
+        update_query,
+        maxsplit=1,
+        flags=re.IGNORECASE,
+    )
+    # aiomysql only sends one multi row INSERT if VALUES is followed by
+    # whitespace
+    head = re.sub(r"\bVALUES\s*\(", "VALUES (", head, flags=re.IGNORECASE)
+    if not tail:
+        return head
+    if "%s" not in tail[0]:
+        return head + "ON DUPLICATE KEY UPDATE" + tail[0]
+    match = re.search(r"\(([^()]*)\)\s*VALUES", head, flags=re.IGNORECASE)
+    if match is None:
+        return None
+    cols = [col.strip() for col in match.group(1).split(",")]
+    parts = tail[0].split("%s")
+    if len(parts) != len(cols) + 1:
+        return None
+    return (
+        head
+        + "ON DUPLICATE KEY UPDATE"
+        + "".join(part + f"VALUES({col})" for part, col in zip(parts, cols))
+        + parts[-1]
+    )
 
 
 class MySQLSourceContext(BaseSourceContext):
+    def __init__(self, parent):
+        super().__init__(parent)
+        # Rows of updated records which haven't been written yet
+        self.pending: List[List[Any]] = []
+        # Connection records are streamed from, outside of the pool
+        self.stream_db = None
+        self.streaming = False
+
     async def update(self, record: Record):
-        update_query = self.parent.config.update_query
+        # Records are written as they're updated unless flush_size is more
+        # than 1, then they're buffered until flush_size are waiting or the
+        # source is read from or closed
+        self.pending.append(self.convert_to_row(record))
+        if len(self.pending) >= self.parent.config.flush_size:
+            await self.flush()
+
+    async def update_many(self, records: List[Record]):
+        self.pending.extend(map(self.convert_to_row, records))
+        await self.flush()
+
+    async def flush(self):
+        """
+        Writes the rows of updated records which haven't been written yet and
+        commits them.
+        """
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+        update_query = self.parent.update_many_query
+        if update_query is not None:
+            # executemany sends all the rows in one multi row INSERT
+            await self.conn.executemany(update_query, rows)
+        else:
+            # The query couldn't be rewritten to bind each value once
+            update_query = self.parent.config.update_query
+            for row in rows:
+                await self.conn.execute(update_query, row + row)
+        await self.db.commit()
+        self.logger.debug("update: wrote %d records", len(rows))
+
+    def convert_to_row(self, record: Record) -> List[Any]:
         model_columns = self.parent.config.model_columns.split()
         key_value_pairs = collections.OrderedDict()
         for key in model_columns:
@@ -52,13 +133,8 @@ class MySQLSourceContext(BaseSourceContext):
                 else:
                     key_value_pairs[key] = 1
             else:
-                key_value_pairs[key] = record.data.__dict__[key]
-        db = self.conn
-        await db.execute(
-            update_query,
-            (list(key_value_pairs.values()) + list(key_value_pairs.values())),
-        )
-        self.logger.debug("update: %s", await self.record(record.key))
+                key_value_pairs[key] = getattr(record.data, key)
+        return list(key_value_pairs.values())
 
     def convert_to_record(self, result):
         modified_record = {
@@ -81,13 +157,62 @@ class MySQLSourceContext(BaseSourceContext):
         return Record(modified_record["key"], data=modified_record["data"])
 
     async def records(self) -> AsyncIterator[Record]:
+        async for batch in self.records_batched(self.parent.config.fetch_size):
+            for record in batch:
+                yield record
+
+    async def records_batched(
+        self, batch_size: int
+    ) -> AsyncIterator[List[Record]]:
+        await self.flush()
         query = self.parent.config.records_query
-        await self.conn.execute(query)
-        result = await self.conn.fetchall()
-        for record in result:
-            yield self.convert_to_record(record)
+        if self.streaming:
+            # Already streaming on this context, the client buffers the rows
+            async with self.db.cursor(aiomysql.DictCursor) as conn:
+                await conn.execute(query)
+                while True:
+                    results = await conn.fetchmany(batch_size)
+                    if not results:
+                        break
+                    yield list(map(self.convert_to_record, results))
+            return
+        # Rows are streamed from the server instead of all being buffered by
+        # the client. The server side cursor needs a connection to itself
+        # until every row has been read, so that the context's connection can
+        # still be used while iterating. It's not taken from the pool so that
+        # contexts don't wait on each other for connections.
+        if self.stream_db is None:
+            self.stream_db = await self.parent.connect()
+        self.streaming = True
+        try:
+            async with self.stream_db.cursor(aiomysql.SSDictCursor) as conn:
+                await conn.execute(query)
+                while True:
+                    results = await conn.fetchmany(batch_size)
+                    if not results:
+                        break
+                    yield list(map(self.convert_to_record, results))
+        finally:
+            self.streaming = False
+
+    async def records_by_keys(self, keys: List[str]) -> Dict[str, Record]:
+        query = self.parent.config.records_keys_query
+        if query is None:
+            return await super().records_by_keys(keys)
+        await self.flush()
+        unique_keys = list(set(keys))
+        await self.conn.execute(
+            query.format(keys=", ".join(["%s"] * len(unique_keys))),
+            unique_keys,
+        )
+        found = {}
+        for result in await self.conn.fetchall():
+            record = self.convert_to_record(result)
+            found[record.key] = record
+        return {key: found.get(key, Record(key)) for key in keys}
 
     async def record(self, key: str):
+        await self.flush()
         query = self.parent.config.record_query
         record = Record(key)
         db = self.conn
@@ -115,13 +240,21 @@ class MySQLSourceContext(BaseSourceContext):
         return record
 
     async def __aenter__(self) -> "MySQLSourceContext":
-        self.__conn = self.parent.db.cursor(aiomysql.DictCursor)
+        # Each context has a connection of its own from the pool
+        self.__db = self.parent.pool.acquire()
+        self.db = await self.__db.__aenter__()
+        self.__conn = self.db.cursor(aiomysql.DictCursor)
         self.conn = await self.__conn.__aenter__()
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.flush()
         await self.__conn.__aexit__(exc_type, exc_value, traceback)
-        await self.parent.db.commit()
+        await self.db.commit()
+        await self.__db.__aexit__(exc_type, exc_value, traceback)
+        if self.stream_db is not None:
+            self.stream_db.close()
+            self.stream_db = None
 
 
 @entrypoint("mysql")
@@ -139,8 +272,7 @@ class MySQLSource(BaseSource):
             ssl_ctx = ssl.create_default_context(cafile=self.config.ca)
         else:
             self.logger.critical("Insecure connection to MySQL")
-        # Connect to MySQL
-        self.pool = await aiomysql.create_pool(
+        self.connect_kwargs = dict(
             host=self.config.host,
             port=self.config.port,
             user=self.config.user,
@@ -148,12 +280,28 @@ class MySQLSource(BaseSource):
             db=self.config.db,
             ssl=ssl_ctx,
         )
-        self.__db = self.pool.acquire()
-        self.db = await self.__db.__aenter__()
+        self.update_many_query = executemany_query(self.config.update_query)
+        if self.update_many_query is None:
+            self.logger.warning(
+                "update_query binds values after ON DUPLICATE KEY UPDATE "
+                "which couldn't be matched to the columns they were bound "
+                "for, records will be written one at a time instead of with "
+                "executemany: %s",
+                self.config.update_query,
+            )
+        # Connect to MySQL
+        self.pool = await aiomysql.create_pool(
+            maxsize=self.config.pool_size, **self.connect_kwargs
+        )
         return self
 
+    async def connect(self) -> aiomysql.Connection:
+        """
+        Connection to MySQL which isn't part of the pool
+        """
+        return await aiomysql.connect(**self.connect_kwargs)
+
     async def __aexit__(self, exc_type, exc_value, traceback):
-        await self.__db.__aexit__(exc_type, exc_value, traceback)
         self.pool.close()
         await self.pool.wait_closed()
 
@@ -182,6 +330,16 @@ class MySQLSource(BaseSource):
                 help="SELECT `key` as key, data_1 as feature_1, data_2 as feature_2 FROM record_data WHERE `key`=%s",
             ),
         )
+        cls.config_set(
+            args,
+            above,
+            "records-keys-query",
+            Arg(
+                type=str,
+                help="SELECT `key` as key, data_1 as feature_1, data_2 as feature_2 FROM record_data WHERE `key` IN ({keys})",
+                default=None,
+            ),
+        )
         cls.config_set(
             args,
             above,
@@ -203,6 +361,37 @@ class MySQLSource(BaseSource):
             "ca",
             Arg(type=str, help="Path to server TLS certificate", default=None),
         )
+        cls.config_set(
+            args,
+            above,
+            "pool-size",
+            Arg(
+                type=int,
+                help="Maximum connections in the pool, each context uses one",
+                default=10,
+            ),
+        )
+        cls.config_set(
+            args,
+            above,
+            "flush-size",
+            Arg(
+                type=int,
+                help="Updated records buffered before they are written, 1 "
+                "writes each record as it's updated",
+                default=1,
+            ),
+        )
+        cls.config_set(
+            args,
+            above,
+            "fetch-size",
+            Arg(
+                type=int,
+                help="Number of rows records fetches from MySQL at a time",
+                default=1000,
+            ),
+        )
         return args
 
     @classmethod
@@ -218,4 +407,10 @@ class MySQLSource(BaseSource):
             update_query=cls.config_get(config, above, "update-query"),
             model_columns=cls.config_get(config, above, "model-columns"),
             ca=cls.config_get(config, above, "ca"),
+            records_keys_query=cls.config_get(
+                config, above, "records-keys-query"
+            ),
+            pool_size=cls.config_get(config, above, "pool-size"),
+            flush_size=cls.config_get(config, above, "flush-size"),
+            fetch_size=cls.config_get(config, above, "fetch-size"),
         )
@@ -44,6 +44,7 @@ CREATE TABLE `record_data` (
             record_query="select * from record_data where `key`=%s",
             update_query="""insert into record_data (`key`,`feature_PetalLength`,`feature_PetalWidth`, `feature_SepalLength`, `feature_SepalWidth`, `target_name_confidence`, `target_name_value`) values (%s,%s,%s,%s,%s,%s,%s) ON DUPLICATE KEY UPDATE `key`=%s,  `feature_PetalLength`=%s, `feature_PetalWidth`=%s, `feature_SepalLength`=%s, `feature_SepalWidth`=%s, `target_name_confidence`=%s, `target_name_value`=%s""",
             records_query="select * from record_data",
+            records_keys_query="select * from record_data where `key` in ({keys})",
             model_columns="key feature_PetalLength feature_PetalWidth feature_SepalLength feature_SepalWidth target_name_confidence target_name_value",
             ca=cls.ca,
         )
@@ -77,3 +78,16 @@ CREATE TABLE `record_data` (
         """
         Tags not implemented
         """
+
+
+class TestMySQLSourceExecutemany(TestMySQLSource):
+    async def setUpSource(self):
+        # Values are bound once, so updates are written with executemany.
+        # flush_size is less than the number of records SourceTest updates.
+        return MySQLSource(
+            self.source_config._replace(
+                update_query="""insert into record_data (`key`,`feature_PetalLength`,`feature_PetalWidth`, `feature_SepalLength`, `feature_SepalWidth`, `target_name_confidence`, `target_name_value`) values (%s,%s,%s,%s,%s,%s,%s) ON DUPLICATE KEY UPDATE `feature_PetalLength`=VALUES(`feature_PetalLength`), `feature_PetalWidth`=VALUES(`feature_PetalWidth`), `feature_SepalLength`=VALUES(`feature_SepalLength`), `feature_SepalWidth`=VALUES(`feature_SepalWidth`), `target_name_confidence`=VALUES(`target_name_confidence`), `target_name_value`=VALUES(`target_name_value`)""",
+                flush_size=2,
+                fetch_size=2,
+            )
+        )
@@ -0,0 +1,283 @@
+import asyncio
+from unittest.mock import patch
+
+import aiomysql
+
+from dffml.record import Record
+from dffml.util.asynctestcase import AsyncTestCase, AsyncExitStackTestCase
+
+from dffml_source_mysql.source import (
+    MySQLSourceConfig,
+    MySQLSource,
+    executemany_query,
+)
+
+UPDATE_QUERY = (
+    "INSERT INTO record_data (`key`, feature_a) VALUES(%s, %s) "
+    "ON DUPLICATE KEY UPDATE `key`=%s, feature_a=%s"
+)
+
+
+class FakeCursor:
+    def __init__(self, connection, cursor_class):
+        self.connection = connection
+        self.cursor_class = cursor_class
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        pass
+
+    async def execute(self, query, args=None):
+        self.connection.calls.append(("execute", query, args))
+        self.rows = list(self.connection.rows)
+
+    async def executemany(self, query, args):
+        self.connection.calls.append(("executemany", query, args))
+
+    async def fetchmany(self, size):
+        self.connection.calls.append(("fetchmany", self.cursor_class, size))
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    async def fetchone(self):
+        rows = await self.fetchmany(1)
+        return rows[0] if rows else None
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+        self.closed = False
+
+    def cursor(self, cursor_class):
+        return FakeCursor(self, cursor_class)
+
+    async def commit(self):
+        self.calls.append(("commit",))
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool:
+    def __init__(self, maxsize, rows):
+        self.free = asyncio.Queue()
+        for _i in range(maxsize):
+            self.free.put_nowait(FakeConnection(rows))
+
+    def acquire(self):
+        return FakeAcquire(self)
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+class FakeAcquire:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        # Waits for a connection like the pool does when all are in use
+        self.connection = await self.pool.free.get()
+        return self.connection
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.pool.free.put_nowait(self.connection)
+
+
+class TestExecutemanyQuery(AsyncTestCase):
+    def test_rewrite(self):
+        query = executemany_query(UPDATE_QUERY)
+        self.assertEqual(
+            query,
+            "INSERT INTO record_data (`key`, feature_a) VALUES (%s, %s) "
+            "ON DUPLICATE KEY UPDATE `key`=VALUES(`key`), "
+            "feature_a=VALUES(feature_a)",
+        )
+        # Sent by aiomysql as one multi row INSERT
+        self.assertIsNotNone(aiomysql.cursors.RE_INSERT_VALUES.match(query))
+
+    def test_bound_once(self):
+        for query in [
+            "INSERT INTO t (a) VALUES (%s)",
+            "INSERT INTO t (a) VALUES (%s) "
+            "ON DUPLICATE KEY UPDATE a=VALUES(a)",
+        ]:
+            with self.subTest(query=query):
+                self.assertEqual(executemany_query(query), query)
+                self.assertEqual(
+                    executemany_query(query.replace("VALUES (", "VALUES(")),
+                    query,
+                )
+
+    def test_not_rewritable(self):
+        self.assertIsNone(
+            executemany_query(
+                "INSERT INTO t (a, b) VALUES(%s, %s) "
+                "ON DUPLICATE KEY UPDATE a=%s"
+            )
+        )
+
+
+class TestMySQLSourceBatch(AsyncExitStackTestCase):
+    ROWS = [{"key": str(i), "feature_a": i} for i in range(5)]
+
+    async def setUp(self):
+        await super().setUp()
+        self.stream_connections = []
+
+        async def create_pool(maxsize, **kwargs):
+            return FakePool(maxsize, self.ROWS)
+
+        async def connect(**kwargs):
+            connection = FakeConnection(self.ROWS)
+            self.stream_connections.append(connection)
+            return connection
+
+        self._stack.enter_context(
+            patch.object(aiomysql, "create_pool", new=create_pool)
+        )
+        self._stack.enter_context(
+            patch.object(aiomysql, "connect", new=connect)
+        )
+
+    def source(self, **kwargs):
+        return MySQLSource(
+            MySQLSourceConfig(
+                host="127.0.0.1",
+                port=3306,
+                user="user",
+                password="pass",
+                db="db",
+                update_query=UPDATE_QUERY,
+                records_query="SELECT * FROM record_data",
+                record_query="SELECT * FROM record_data WHERE `key`=%s",
+                model_columns="key feature_a",
+                **kwargs,
+            )
+        )
+
+    def records(self, count):
+        return [
+            Record(str(i), data={"features": {"a": i}}) for i in range(count)
+        ]
+
+    async def test_update(self):
+        async with self.source() as source, source() as sctx:
+            for record in self.records(2):
+                await sctx.update(record)
+            # Each record is written as it's updated
+            self.assertEqual(
+                sctx.db.calls,
+                [
+                    ("executemany", source.update_many_query, [["0", 0]]),
+                    ("commit",),
+                    ("executemany", source.update_many_query, [["1", 1]]),
+                    ("commit",),
+                ],
+            )
+
+    async def test_update_flush_size(self):
+        async with self.source(flush_size=2) as source:
+            async with source() as sctx:
+                db = sctx.db
+                for record in self.records(3):
+                    await sctx.update(record)
+                self.assertEqual(
+                    db.calls,
+                    [
+                        (
+                            "executemany",
+                            source.update_many_query,
+                            [["0", 0], ["1", 1]],
+                        ),
+                        ("commit",),
+                    ],
+                )
+            self.assertEqual(
+                db.calls[2:],
+                [
+                    ("executemany", source.update_many_query, [["2", 2]]),
+                    ("commit",),
+                    ("commit",),
+                ],
+            )
+
+    async def test_update_many(self):
+        async with self.source() as source, source() as sctx:
+            await sctx.update_many(self.records(3))
+            self.assertEqual(
+                sctx.db.calls,
+                [
+                    (
+                        "executemany",
+                        source.update_many_query,
+                        [["0", 0], ["1", 1], ["2", 2]],
+                    ),
+                    ("commit",),
+                ],
+            )
+
+    async def test_update_not_rewritable(self):
+        query = (
+            "INSERT INTO record_data (`key`, feature_a) VALUES(%s, %s) "
+            "ON DUPLICATE KEY UPDATE feature_a=%s"
+        )
+        source = self.source()
+        source = MySQLSource(source.config._replace(update_query=query))
+        with self.assertLogs(level="WARNING") as logs:
+            await self._astack.enter_async_context(source)
+        warnings = [
+            record.getMessage()
+            for record in logs.records
+            if record.levelname == "WARNING"
+        ]
+        self.assertEqual(len(warnings), 1)
+        self.assertIn(query, warnings[0])
+        async with source() as sctx:
+            self.assertIsNone(source.update_many_query)
+            await sctx.update_many(self.records(2))
+            self.assertEqual(
+                sctx.db.calls,
+                [
+                    ("execute", query, ["0", 0, "0", 0]),
+                    ("execute", query, ["1", 1, "1", 1]),
+                    ("commit",),
+                ],
+            )
+
+    async def test_records_stream(self):
+        # Contexts stream on a connection outside of the pool, so a pool with
+        # a connection for each context is enough
+        async with self.source(pool_size=2, fetch_size=2) as source:
+            async with source() as first, source() as second:
+                await first.update(self.records(1)[0])
+                keys = []
+                async for record in first.records():
+                    keys.append((await second.record(record.key)).key)
+                self.assertEqual(keys, [str(i) for i in range(5)])
+                # Updates are written before reading
+                self.assertEqual(first.db.calls[0][0], "executemany")
+            self.assertEqual(len(self.stream_connections), 1)
+            stream = self.stream_connections[0]
+            self.assertTrue(stream.closed)
+            self.assertEqual(
+                [call for call in stream.calls if call[0] == "fetchmany"],
+                [("fetchmany", aiomysql.SSDictCursor, 2)] * 4,
+            )
+
+    async def test_records_nested(self):
+        async with self.source(pool_size=1) as source, source() as sctx:
+            keys = [
+                (outer.key, [inner.key async for inner in sctx.records()])
+                async for outer in sctx.records()
+            ]
+            self.assertEqual(len(keys), 5)
+            self.assertEqual(len(self.stream_connections), 1)
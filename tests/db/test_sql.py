@@ -0,0 +1,66 @@
+from dffml.db.sql import SQLDatabaseContext
+from dffml.db.sqlite import SqliteDatabaseContext
+from dffml.util.asynctestcase import AsyncTestCase
+
+
+class TestSQLDatabaseContext(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db_ctx = SqliteDatabaseContext(None)
+
+    def test_make_condition_expression(self):
+        self.assertEqual(
+            SQLDatabaseContext.make_condition_expression(
+                self.db_ctx.make_conditions(
+                    [
+                        [["firstName", "=", "John"], ["key", "IN", [1, 2]]],
+                        [["age", "<", "38"]],
+                    ]
+                )
+            ),
+            {
+                "expression": "((`firstName` = ? ) OR (`key` IN ( ?, ? ) ))"
+                " AND ((`age` < ? ))",
+                "values": ["John", 1, 2, "38"],
+            },
+        )
+        self.assertIsNone(SQLDatabaseContext.make_condition_expression([]))
+
+    def test_query_text_cached(self):
+        first, first_values = self.db_ctx.update_query(
+            "myTable", {"age": 16}, [[["firstName", "=", "John"]]]
+        )
+        second, second_values = self.db_ctx.update_query(
+            "myTable", {"age": 17}, [[["firstName", "=", "Jane"]]]
+        )
+        self.assertIs(first, second)
+        self.assertEqual(first_values, [16, "John"])
+        self.assertEqual(second_values, [17, "Jane"])
+        first, _values = self.db_ctx.insert_query("myTable", {"age": 16})
+        second, _values = self.db_ctx.insert_query("myTable", {"age": 17})
+        self.assertIs(first, second)
+
+    def test_query_text_shape(self):
+        one, one_values = self.db_ctx.lookup_query(
+            "myTable", ["age"], [[["key", "IN", [1]]]]
+        )
+        two, two_values = self.db_ctx.lookup_query(
+            "myTable", ["age"], [[["key", "IN", [1, 2]]]]
+        )
+        self.assertEqual(
+            one, "SELECT `age` FROM myTable  WHERE ((`key` IN ( ? ) ))"
+        )
+        self.assertEqual(
+            two, "SELECT `age` FROM myTable  WHERE ((`key` IN ( ?, ? ) ))"
+        )
+        self.assertEqual(one_values, [1])
+        self.assertEqual(two_values, [1, 2])
+        query, values = self.db_ctx.remove_query("myTable")
+        self.assertEqual(query, "DELETE FROM myTable ")
+        self.assertEqual(values, [])
+
+    def test_sanitized(self):
+        with self.assertRaises(ValueError):
+            self.db_ctx.lookup_query("myTable; DROP", ["age"])
+        with self.assertRaises(ValueError):
+            self.db_ctx.insert_query("myTable", {"age; DROP": 16})
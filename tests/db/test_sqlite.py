@@ -1,6 +1,10 @@
+import asyncio
 import os
+import threading
 import tempfile
+from unittest.mock import patch
 
+import dffml.db.sqlite
 from dffml.util.asynctestcase import AsyncTestCase
 from dffml.db.sqlite import SqliteDatabase, SqliteDatabaseConfig
 
@@ -56,6 +60,19 @@ class TestSqlDatabase(AsyncTestCase):
             results = [row async for row in db_ctx.lookup(self.table_name)]
             self.assertEqual(results, self.data_dicts)
 
+    async def test_1_set_get_in(self):
+        conditions = [[["key", "IN", [10, 12]]]]
+        async with self.sdb() as db_ctx:
+            results = [
+                row
+                async for row in db_ctx.lookup(
+                    self.table_name, ["firstName"], conditions
+                )
+            ]
+            self.assertEqual(
+                results, [{"firstName": "John"}, {"firstName": "Bill"}]
+            )
+
     async def test_2_update(self):
         data = {"age": 35}
         conditions = [
@@ -100,3 +117,238 @@ class TestSqlDatabase(AsyncTestCase):
             await db_ctx.insert_or_update(self.table_name, data)
             results = [row async for row in db_ctx.lookup(self.table_name)]
             self.assertEqual(results, expected)
+
+    async def test_5_insert_many(self):
+        async with self.sdb() as db_ctx:
+            await db_ctx.insert_many(self.table_name, self.data_dicts[:2])
+            results = [row async for row in db_ctx.lookup(self.table_name)]
+            self.assertEqual(
+                results,
+                self.data_dicts[:2]
+                + [
+                    {
+                        "key": 12,
+                        "firstName": "Biller",
+                        "lastName": "Miles",
+                        "age": 40.0,
+                    }
+                ],
+            )
+
+    async def test_6_insert_or_update_many(self):
+        data = [
+            {"key": 10, "age": 17},
+            {"key": 11, "age": 38},
+            {"key": 13, "firstName": "Jane"},
+        ]
+        async with self.sdb() as db_ctx:
+            await db_ctx.insert_or_update_many(self.table_name, data)
+            results = [
+                row
+                async for row in db_ctx.lookup(
+                    self.table_name, ["key", "firstName", "age"]
+                )
+            ]
+            self.assertEqual(
+                results,
+                [
+                    {"key": 10, "firstName": "John", "age": 17},
+                    {"key": 11, "firstName": "John", "age": 38},
+                    {"key": 12, "firstName": "Biller", "age": 40},
+                    {"key": 13, "firstName": "Jane", "age": None},
+                ],
+            )
+
+    async def test_7_insert_or_update_many_unique(self):
+        table_name = "myUniqueTable"
+        async with self.sdb() as db_ctx:
+            await db_ctx.create_table(
+                table_name, {"name": "text UNIQUE", "age": "real"}
+            )
+            await db_ctx.insert_or_update_many(
+                table_name, [{"name": "John", "age": 16}]
+            )
+            await db_ctx.insert_or_update_many(
+                table_name,
+                [{"name": "John", "age": 17}, {"name": "Jane", "age": 20}],
+            )
+            results = [row async for row in db_ctx.lookup(table_name)]
+            self.assertEqual(
+                results,
+                [{"name": "John", "age": 17}, {"name": "Jane", "age": 20}],
+            )
+
+    async def test_7_insert_or_update_many_primary_key_and_unique(self):
+        for upsert_clauses in [None, 1, 0]:
+            table_name = f"myKeyUniqueTable{upsert_clauses}"
+            with self.subTest(upsert_clauses=upsert_clauses), patch.object(
+                dffml.db.sqlite, "UPSERT_CLAUSES", new=upsert_clauses
+            ):
+                async with self.sdb() as db_ctx:
+                    await db_ctx.create_table(
+                        table_name,
+                        {
+                            "key": "INTEGER NOT NULL PRIMARY KEY",
+                            "name": "text UNIQUE",
+                            "age": "real",
+                        },
+                    )
+                    await db_ctx.insert_or_update_many(
+                        table_name,
+                        [
+                            {"key": 1, "name": "John", "age": 16},
+                            {"key": 2, "name": "Jane", "age": 20},
+                        ],
+                    )
+                    await db_ctx.insert_or_update_many(
+                        table_name,
+                        [
+                            # Conflicts on the primary key
+                            {"key": 1, "name": "Johnny", "age": 17},
+                            # Conflicts on name, which isn't the primary key
+                            {"key": 3, "name": "Jane", "age": 21},
+                        ],
+                    )
+                    # Same for a single row
+                    await db_ctx.insert_or_update(
+                        table_name, {"name": "Johnny", "age": 18}
+                    )
+                    results = [row async for row in db_ctx.lookup(table_name)]
+                    self.assertEqual(
+                        results,
+                        [
+                            {"key": 1, "name": "Johnny", "age": 18},
+                            {"key": 3, "name": "Jane", "age": 21},
+                        ],
+                    )
+
+    async def test_8_lookup_streams(self):
+        sdb = SqliteDatabase(
+            SqliteDatabaseConfig(filename=self.database_name, fetch_size=1)
+        )
+        async with sdb, sdb() as db_ctx:
+            results = []
+            async for row in db_ctx.lookup(self.table_name, ["key"]):
+                results.append(row["key"])
+                # The lock isn't held while rows are being consumed
+                await asyncio.wait_for(
+                    db_ctx.update(
+                        self.table_name,
+                        {"age": row["key"]},
+                        [[["key", "=", row["key"]]]],
+                    ),
+                    timeout=1,
+                )
+            self.assertEqual(results, [10, 11, 12, 13])
+            results = [
+                row async for row in db_ctx.lookup(self.table_name, ["age"])
+            ]
+            self.assertEqual(
+                results, [{"age": 10}, {"age": 11}, {"age": 12}, {"age": 13}]
+            )
+
+
+class TestSqliteDatabaseConnections(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.database_name = os.path.join(self.tempdir.name, "test.db")
+
+    def tearDown(self):
+        super().tearDown()
+        self.tempdir.cleanup()
+
+    async def test_pragmas(self):
+        sdb = SqliteDatabase(
+            SqliteDatabaseConfig(
+                filename=self.database_name, readers=2, cache_size=-4096
+            )
+        )
+        async with sdb:
+            self.assertEqual(sdb.readers.qsize(), 2)
+            for db in [sdb.db] + list(sdb.readers._queue):
+                self.assertEqual(
+                    db.execute("PRAGMA journal_mode").fetchone()[0], "wal"
+                )
+                self.assertEqual(
+                    db.execute("PRAGMA cache_size").fetchone()[0], -4096
+                )
+
+    async def test_invalid_pragma(self):
+        sdb = SqliteDatabase(
+            SqliteDatabaseConfig(
+                filename=self.database_name, synchronous="OFF; DROP"
+            )
+        )
+        with self.assertRaisesRegex(ValueError, "synchronous"):
+            async with sdb:
+                pass
+
+    async def test_concurrent_lookups(self):
+        sdb = SqliteDatabase(
+            SqliteDatabaseConfig(
+                filename=self.database_name, readers=2, fetch_size=1
+            )
+        )
+        async with sdb, sdb() as db_ctx:
+            await db_ctx.create_table("myTable", {"key": "int"})
+            await db_ctx.insert_many(
+                "myTable", [{"key": i} for i in range(3)]
+            )
+            first = db_ctx.lookup("myTable")
+            second = db_ctx.lookup("myTable")
+            # Both lookups hold a reader while iterating
+            self.assertEqual(await first.__anext__(), {"key": 0})
+            self.assertEqual(await second.__anext__(), {"key": 0})
+            self.assertEqual(sdb.readers.qsize(), 0)
+            self.assertEqual(
+                [row["key"] async for row in first]
+                + [row["key"] async for row in second],
+                [1, 2, 1, 2],
+            )
+            self.assertEqual(sdb.readers.qsize(), 2)
+
+    async def test_memory(self):
+        sdb = SqliteDatabase(SqliteDatabaseConfig(filename=":memory:"))
+        async with sdb, sdb() as db_ctx:
+            self.assertIsNone(sdb.readers)
+            await db_ctx.create_table("myTable", {"key": "int"})
+            await db_ctx.insert("myTable", {"key": 1})
+            self.assertEqual(
+                [row async for row in db_ctx.lookup("myTable")], [{"key": 1}]
+            )
+
+    async def test_enter_nested(self):
+        sdb = SqliteDatabase(SqliteDatabaseConfig(filename=self.database_name))
+        async with sdb:
+            db = sdb.db
+            async with sdb:
+                self.assertIs(sdb.db, db)
+            self.assertIsNotNone(sdb.readers)
+        self.assertIsNone(sdb.readers)
+        self.assertIsNone(sdb.executor)
+        self.assertIsNone(sdb.readers_executor)
+
+    async def test_cancel_lookup(self):
+        sdb = SqliteDatabase(SqliteDatabaseConfig(filename=self.database_name))
+        async with sdb, sdb() as db_ctx:
+            await db_ctx.create_table("myTable", {"key": "int"})
+            await db_ctx.insert("myTable", {"key": 1})
+            # Lookups wait for this write to finish
+            event = threading.Event()
+            write = asyncio.create_task(sdb.write(lambda db: event.wait()))
+            await asyncio.sleep(0)
+
+            async def lookup():
+                return [row async for row in db_ctx.lookup("myTable")]
+
+            cancelled = asyncio.create_task(lookup())
+            waiting = asyncio.create_task(lookup())
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await cancelled
+            event.set()
+            self.assertTrue(await write)
+            self.assertEqual(await waiting, [{"key": 1}])
+
@@ -1,10 +1,32 @@
+import os
+import asyncio
+import itertools
+import threading
+import tracemalloc
 from unittest.mock import patch
 from typing import NamedTuple
 
 from dffml.util.cli.arg import Arg, parse_unknown
 from dffml.util.entrypoint import entrypoint
-from dffml.df.base import BaseKeyValueStore, BaseRedundancyCheckerConfig
-from dffml.df.memory import MemoryKeyValueStore, MemoryRedundancyChecker
+from dffml.high_level import run
+from dffml.df.types import Definition, Input, DataFlow, Operation, Execution
+from dffml.df.exceptions import NotPicklable
+from dffml.df.base import (
+    op,
+    OperationException,
+    BaseConfig,
+    BaseKeyValueStore,
+    BaseKeyValueStoreContext,
+    BaseRedundancyCheckerConfig,
+)
+from dffml.df.memory import (
+    MemoryKeyValueStore,
+    MemoryRedundancyChecker,
+    MemoryInputNetwork,
+    MemoryInputNetworkContext,
+    MemoryOrchestrator,
+)
+from dffml.operation.output import GetMulti, GetSingle
 from dffml.util.asynctestcase import AsyncTestCase
 
 
@@ -38,6 +60,28 @@ def load_kvstore_with_args(loading=None):
     return [KeyValueStoreWithArguments]
 
 
+class GetSetKeyValueStoreContext(BaseKeyValueStoreContext):
+    def __init__(self):
+        self.memory = {}
+
+    async def get(self, key):
+        return self.memory.get(key)
+
+    async def set(self, key, value):
+        self.memory[key] = value
+
+
+class TestBaseKeyValueStoreContext(AsyncTestCase):
+    async def test_delete(self):
+        kvctx = GetSetKeyValueStoreContext()
+        await kvctx.set("a", b"1")
+        await kvctx.set("b", b"2")
+        await kvctx.delete("a", "c")
+        self.assertIsNone(await kvctx.get("a"))
+        self.assertIsNone(await kvctx.get("c"))
+        self.assertEqual(await kvctx.get("b"), b"2")
+
+
 class TestMemoryRedundancyChecker(AsyncTestCase):
     @patch.object(BaseKeyValueStore, "load", load_kvstore_with_args)
     def test_args(self):
@@ -90,3 +134,411 @@ class TestMemoryRedundancyChecker(AsyncTestCase):
             type(was.key_value_store.config), KeyValueStoreWithArgumentsConfig
         )
         self.assertEqual(was.key_value_store.config.filename, "somefile")
+
+
+COUNT = Definition(name="count", primitive="int")
+NUMBER = Definition(name="number", primitive="int")
+LETTER = Definition(name="letter", primitive="str")
+PAIR = Definition(name="pair", primitive="str")
+ENABLED = Definition(name="enabled", primitive="bool")
+
+
+@op(inputs={"count": COUNT}, outputs={"number": NUMBER, "letter": LETTER})
+async def numbers_and_letters(count):
+    for i in range(count):
+        yield {"number": i, "letter": chr(ord("a") + i)}
+
+
+@op(inputs={"number": NUMBER, "letter": LETTER}, outputs={"pair": PAIR})
+async def pair(number, letter):
+    return {"pair": f"{letter}{number}"}
+
+
+@op(
+    inputs={"number": NUMBER, "letter": LETTER},
+    outputs={"pair": PAIR},
+    conditions=[ENABLED],
+)
+async def pair_if_enabled(number, letter):
+    return {"pair": f"{letter}{number}"}
+
+
+@op(inputs={"letter": LETTER}, outputs={"enabled": ENABLED})
+async def enable_after_last_letter(letter):
+    if letter == "c":
+        return {"enabled": True}
+
+
+class CountingRedundancyCheckerContext:
+    def __init__(self):
+        self.checked = 0
+
+    async def take_if_non_existant(self, operation, *parameter_sets):
+        for parameter_set in parameter_sets:
+            self.checked += 1
+            yield parameter_set, True
+
+
+class TestMemoryInputNetworkContextGatherInputs(AsyncTestCase):
+    async def test_permutations_generated_lazily(self):
+        rctx = CountingRedundancyCheckerContext()
+        dataflow = DataFlow.auto(pair)
+        async with MemoryInputNetwork(BaseConfig()) as input_network:
+            async with input_network() as ictx:
+                ctx = await ictx.sadd(
+                    "lazy",
+                    *[Input(value=i, definition=NUMBER) for i in range(100)],
+                    *[
+                        Input(value=str(i), definition=LETTER)
+                        for i in range(100)
+                    ],
+                )
+                parameter_sets = ictx.gather_inputs(
+                    rctx, dataflow.operations["pair"], dataflow, ctx=ctx
+                )
+                await parameter_sets.__anext__()
+                await parameter_sets.aclose()
+        # Only the permutation which was asked for was created and checked
+        self.assertEqual(rctx.checked, 1)
+
+    def test_delta_product(self):
+        every = [[1, 2, 3], [4, 5], [6, 7]]
+        new = [[3], [5], []]
+        Item = NamedTuple("Item", [("uid", int)])
+        every = [[Item(uid) for uid in items] for items in every]
+        new = [[Item(uid) for uid in items] for items in new]
+        delta = list(MemoryInputNetworkContext.delta_product(every, new))
+        # Every permutation containing a new input, generated only once
+        self.assertEqual(len(delta), len(set(delta)))
+        self.assertEqual(
+            set(delta),
+            set(
+                permutation
+                for permutation in itertools.product(*every)
+                if set(permutation).intersection(itertools.chain(*new))
+            ),
+        )
+
+    async def run_pairs(self, dataflow):
+        dataflow.seed.append(
+            Input(value=[PAIR.name], definition=GetMulti.op.inputs["spec"])
+        )
+        async with MemoryOrchestrator.withconfig({}) as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for _ctx, results in octx.run(
+                    [Input(value=3, definition=COUNT)]
+                ):
+                    return sorted(results[PAIR.name])
+
+    async def test_pairs_with_inputs_which_arrive_later(self):
+        self.assertEqual(
+            await self.run_pairs(
+                DataFlow.auto(numbers_and_letters, pair, GetMulti)
+            ),
+            sorted(
+                f"{letter}{number}"
+                for letter, number in itertools.product("abc", range(3))
+            ),
+        )
+
+    async def test_condition_which_arrives_later(self):
+        self.assertEqual(
+            await self.run_pairs(
+                DataFlow.auto(
+                    numbers_and_letters,
+                    pair_if_enabled,
+                    enable_after_last_letter,
+                    GetMulti,
+                )
+            ),
+            sorted(
+                f"{letter}{number}"
+                for letter, number in itertools.product("abc", range(3))
+            ),
+        )
+
+
+class TestMemoryInputNetworkContextLocking(AsyncTestCase):
+    async def test_contexts_do_not_block_each_other(self):
+        async with MemoryInputNetwork(BaseConfig()) as input_network:
+            async with input_network() as ictx:
+                await ictx.sadd("first", Input(value=1, definition=NUMBER))
+                await ictx.sadd("second", Input(value=2, definition=NUMBER))
+                async with ictx.ctx_lock("first"):
+                    # Would time out if the second context waited on the first
+                    await asyncio.wait_for(
+                        ictx.sadd("second", Input(value=3, definition=NUMBER)),
+                        timeout=1,
+                    )
+                self.assertEqual(ictx.ctx_lock_contended, 0)
+
+    async def test_contention_counted(self):
+        async with MemoryInputNetwork(BaseConfig()) as input_network:
+            async with input_network() as ictx:
+                async with ictx.ctx_lock("first"):
+                    waiting = asyncio.create_task(
+                        ictx.sadd("first", Input(value=1, definition=NUMBER))
+                    )
+                    await asyncio.sleep(0)
+                await waiting
+                self.assertEqual(ictx.ctx_lock_acquired, 2)
+                self.assertEqual(ictx.ctx_lock_contended, 1)
+
+
+class ConcurrencyTracker:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.tasks_peak = 0
+
+    async def track(self):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        # Operations waiting for a slot shouldn't have been created as tasks.
+        # Tasks of dispatched operations are given the operation they run.
+        self.tasks_peak = max(
+            self.tasks_peak,
+            len(
+                [
+                    task
+                    for task in asyncio.all_tasks()
+                    if hasattr(task, "operation") and not task.done()
+                ]
+            ),
+        )
+        await asyncio.sleep(0.01)
+        self.running -= 1
+
+
+TRACKER = ConcurrencyTracker()
+
+
+@op(inputs={"count": COUNT}, outputs={"number": NUMBER}, expand=["number"])
+async def numbers(count):
+    return {"number": list(range(count))}
+
+
+@op(inputs={"number": NUMBER}, outputs={})
+async def track_number(number):
+    await TRACKER.track()
+
+
+@op(inputs={"count": COUNT}, outputs={})
+async def track_count(count):
+    await TRACKER.track()
+
+
+class TestMemoryOrchestratorLimits(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        TRACKER.running = 0
+        TRACKER.peak = 0
+        TRACKER.tasks_peak = 0
+
+    async def run_limited(self, dataflow, contexts, *limit):
+        async with MemoryOrchestrator.withconfig(
+            parse_unknown(*limit)
+        ) as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                return [
+                    ctx_string
+                    async for ctx_string, _results in octx.run(
+                        {
+                            str(i): [Input(value=10, definition=COUNT)]
+                            for i in range(contexts)
+                        }
+                    )
+                ]
+
+    async def test_max_ctxs(self):
+        completed = await self.run_limited(
+            DataFlow.auto(track_count), 5, "-orchestrator-max_ctxs", "2"
+        )
+        self.assertEqual(len(completed), 5)
+        self.assertEqual(TRACKER.peak, 2)
+
+    async def test_max_ops(self):
+        await self.run_limited(
+            DataFlow.auto(numbers, track_number),
+            2,
+            "-orchestrator-max_ops",
+            "3",
+        )
+        self.assertEqual(TRACKER.peak, 3)
+        self.assertEqual(TRACKER.tasks_peak, 3)
+
+    async def test_max_ops_per_instance(self):
+        await self.run_limited(
+            DataFlow.auto(numbers, track_number),
+            2,
+            "-orchestrator-max_ops_per_instance",
+            "4",
+        )
+        self.assertEqual(TRACKER.peak, 4)
+
+    async def test_async_iterator_pulled_as_ctxs_complete(self):
+        pulled = []
+
+        async def input_sets():
+            for i in range(10):
+                pulled.append(i)
+                yield [Input(value=i, definition=COUNT)]
+
+        async with MemoryOrchestrator.withconfig(
+            parse_unknown("-orchestrator-max_ctxs", "2")
+        ) as orchestrator:
+            async with orchestrator(DataFlow.auto(track_count)) as octx:
+                completed = 0
+                async for _ctx, _results in octx.run(input_sets()):
+                    # Only the running contexts and the one waiting for room
+                    # to start have been pulled
+                    self.assertLessEqual(len(pulled), completed + 3)
+                    completed += 1
+        self.assertEqual(completed, 10)
+        self.assertEqual(TRACKER.peak, 2)
+
+    async def test_async_iterator_exception_raised(self):
+        async def input_sets():
+            raise ValueError("no input sets")
+            yield
+
+        async with MemoryOrchestrator.withconfig({}) as orchestrator:
+            async with orchestrator(DataFlow.auto(track_count)) as octx:
+                with self.assertRaisesRegex(ValueError, "no input sets"):
+                    async for _ctx, _results in octx.run(input_sets()):
+                        pass
+
+
+LOCKED = Definition(name="locked", primitive="int", lock=True)
+
+
+@op(inputs={"count": COUNT}, outputs={"locked": LOCKED})
+async def lock_count(count):
+    return {"locked": count}
+
+
+@op(inputs={"locked": LOCKED}, outputs={})
+async def use_locked(locked):
+    pass
+
+
+class TestMemoryOrchestratorContextRemoval(AsyncTestCase):
+    def stored(self, octx):
+        """
+        Number of items stored for contexts in each of the networks
+        """
+        return {
+            "ctxhd": len(octx.ictx.ctxhd),
+            "ctxhd_locks": len(octx.ictx.ctxhd_locks),
+            "input_notification_set": len(octx.ictx.input_notification_set),
+            "ctx_notification_set": len(
+                octx.ictx.ctx_notification_set.notification_items
+            ),
+            "redundancy_keys": len(octx.rctx.kvctx.memory),
+            "locks": len(octx.lctx.locks),
+        }
+
+    async def run_rounds(self, config, rounds, contexts):
+        async with MemoryOrchestrator.withconfig(config) as orchestrator:
+            async with orchestrator(
+                DataFlow.auto(lock_count, use_locked)
+            ) as octx:
+                tracemalloc.start()
+                try:
+                    for i in range(rounds):
+                        async for _ctx, _results in octx.run(
+                            {
+                                f"{i}.{j}": [Input(value=j, definition=COUNT)]
+                                for j in range(contexts)
+                            }
+                        ):
+                            pass
+                        used, _peak = tracemalloc.get_traced_memory()
+                        yield self.stored(octx), used
+                finally:
+                    tracemalloc.stop()
+
+    async def test_steady_state(self):
+        used_by_round = []
+        async for stored, used in self.run_rounds({}, 5, 100):
+            self.assertEqual(set(stored.values()), {0}, stored)
+            used_by_round.append(used)
+        # Memory still allocated after each round doesn't grow with the
+        # number of contexts which have been run
+        self.assertLess(max(used_by_round[1:]), used_by_round[0] * 1.5)
+
+    async def test_keep_ctxs(self):
+        async for stored, _used in self.run_rounds(
+            parse_unknown("-orchestrator-keep_ctxs"), 2, 10
+        ):
+            pass
+        self.assertEqual(stored["ctxhd"], 20)
+        self.assertEqual(stored["redundancy_keys"], 40)
+        self.assertEqual(stored["locks"], 20)
+
+
+RESULT = Definition(name="result", primitive="int")
+
+
+def run_where():
+    return {"pid": os.getpid(), "thread": threading.get_ident()}
+
+
+@op(inputs={"count": COUNT}, outputs={"result": RESULT})
+def inline_where(count):
+    return {"result": run_where()}
+
+
+@op(
+    inputs={"count": COUNT},
+    outputs={"result": RESULT},
+    execution=Execution.THREAD,
+)
+def thread_where(count):
+    return {"result": run_where()}
+
+
+@op(
+    inputs={"count": COUNT},
+    outputs={"result": RESULT},
+    execution=Execution.PROCESS,
+)
+def process_where(count):
+    return {"result": run_where()}
+
+
+class TestMemoryOperationImplementationNetworkExecution(AsyncTestCase):
+    async def run_where(self, operation, value=1):
+        dataflow = DataFlow.auto(operation, GetSingle)
+        dataflow.seed.append(
+            Input(value=[RESULT.name], definition=GetSingle.op.inputs["spec"])
+        )
+        async for _ctx, results in run(
+            dataflow, [Input(value=value, definition=COUNT)]
+        ):
+            return results[RESULT.name]
+
+    async def test_inline(self):
+        self.assertEqual(await self.run_where(inline_where), run_where())
+
+    async def test_thread(self):
+        where = await self.run_where(thread_where)
+        self.assertEqual(where["pid"], os.getpid())
+        self.assertNotEqual(where["thread"], threading.get_ident())
+
+    async def test_process(self):
+        where = await self.run_where(process_where)
+        self.assertNotEqual(where["pid"], os.getpid())
+
+    async def test_process_not_picklable(self):
+        with self.assertRaises(OperationException) as caught:
+            await self.run_where(process_where, value=lambda: None)
+        self.assertIsInstance(caught.exception.__cause__, NotPicklable)
+
+    def test_export(self):
+        exported = process_where.op.export()
+        self.assertEqual(exported["execution"], "process")
+        self.assertEqual(
+            Operation._fromdict(**exported).execution, Execution.PROCESS
+        )
+        self.assertNotIn("execution", inline_where.op.export())
@@ -0,0 +1,82 @@
+import unittest
+import importlib.util
+
+from dffml.record import Record
+from dffml.source.source import Sources, SubsetSources
+from dffml.source.array import ArraySource, ArraySourceConfig
+from dffml.util.asynctestcase import AsyncTestCase
+from dffml.util.testing.source import SourceTest
+
+
+@unittest.skipIf(
+    importlib.util.find_spec("numpy") is None,
+    "numpy is required for ArraySource",
+)
+class ArraySourceTestCase(AsyncTestCase):
+    pass
+
+
+class TestArraySource(ArraySourceTestCase, SourceTest):
+    async def setUpSource(self):
+        return ArraySource(ArraySourceConfig())
+
+
+class TestArraySourceArrays(ArraySourceTestCase):
+    async def test_features(self):
+        import numpy
+
+        number = numpy.arange(4)
+        source = ArraySource(
+            ArraySourceConfig(
+                features={"number": number, "label": ["a", "b", "a", "b"]},
+                keys=["w", "x", "y", "z"],
+            )
+        )
+        async with source as source:
+            async with source() as sctx:
+                record = await sctx.record("y")
+                self.assertEqual(
+                    record.features(), {"number": 2, "label": "a"}
+                )
+                arrays = await sctx.arrays(["number"])
+                self.assertIs(arrays["number"], number)
+                self.assertIsNone(await sctx.arrays(["missing"]))
+
+    async def test_update(self):
+        source = ArraySource(
+            ArraySourceConfig(
+                records=[
+                    Record(str(i), data={"features": {"number": i}})
+                    for i in range(3)
+                ]
+            )
+        )
+        async with source as source:
+            async with source() as sctx:
+                await sctx.update(
+                    Record("1", data={"features": {"number": 1.5}})
+                )
+                record = Record("3", data={"features": {"number": 3}})
+                record.predicted("odd", True, 1.0)
+                await sctx.update(record)
+                arrays = await sctx.arrays(["number"])
+                self.assertEqual(arrays["number"].tolist(), [0, 1.5, 2, 3])
+                self.assertEqual(
+                    [record.key async for record in sctx.records()],
+                    ["0", "1", "2", "3"],
+                )
+                self.assertTrue((await sctx.record("3")).prediction("odd"))
+                with self.assertRaises(ValueError):
+                    await sctx.update(
+                        Record("4", data={"features": {"other": 4}})
+                    )
+
+    async def test_sources(self):
+        source = ArraySource(ArraySourceConfig(features={"number": [0, 1]}))
+        async with Sources(source) as sources:
+            async with sources() as sctx:
+                arrays = await sctx.arrays(["number"])
+                self.assertEqual(arrays["number"].tolist(), [0, 1])
+        async with SubsetSources(source, keys=["0"]) as sources:
+            async with sources() as sctx:
+                self.assertIsNone(await sctx.arrays(["number"]))
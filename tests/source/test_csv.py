@@ -4,8 +4,17 @@ import tempfile
 import os
 import csv
 import random
+from unittest.mock import patch
 
-from dffml.source.csv import CSVSource, CSVSourceConfig
+import dffml.source.csv
+
+from dffml.source.csv import (
+    CSVSource,
+    CSVSourceConfig,
+    CSV_CONVERTERS,
+    convert_literal,
+    infer_schema,
+)
 from dffml.util.testing.source import FileSourceTest
 from dffml.util.asynctestcase import AsyncTestCase
 from dffml.record import Record
@@ -63,6 +72,8 @@ class TestCSVSource(FileSourceTest, AsyncTestCase):
         self.assertFalse(config.readwrite)
         self.assertFalse(config.allowempty)
         self.assertIsNone(config.loadfiles)
+        self.assertFalse(config.stream)
+        self.assertFalse(config.cache_schema)
 
     def test_config_set(self):
         config = CSVSource.config(
@@ -102,3 +113,304 @@ class TestCSVSource(FileSourceTest, AsyncTestCase):
                     record_b = await sctx.record("b")
                     self.assertEqual(record_a.feature("ValueColumn"), 42)
                     self.assertEqual(record_b.feature("ValueColumn"), 420)
+
+    async def test_cache_schema(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            filename = os.path.join(testdir, "test.csv")
+            with open(filename, "w") as fd:
+                fd.write("key,count,ratio,name\n")
+                fd.write("a,42,0.5,feed\n")
+                fd.write("b,,1e3,[1]\n")
+            config = CSVSourceConfig(filename=filename, cache_schema=True)
+            async with CSVSource(config) as source:
+                async with source() as sctx:
+                    records = {
+                        record.key: record.features()
+                        async for record in sctx.records()
+                    }
+            self.assertEqual(
+                records,
+                {
+                    "a": {"count": 42, "ratio": 0.5, "name": "feed"},
+                    "b": {"ratio": 1000.0, "name": [1]},
+                },
+            )
+            source = CSVSource(config)
+            self.assertEqual(
+                source.load_schema(),
+                {"count": "int", "ratio": "float", "name": "str"},
+            )
+            # Changing the file invalidates the cached schema
+            with open(filename, "a") as fd:
+                fd.write("c,1,2,3\n")
+            self.assertIsNone(source.load_schema())
+
+
+class TestCSVConverters(AsyncTestCase):
+    VALUES = [
+        "42",
+        "042",
+        "-0",
+        "1_000",
+        "0.5",
+        "-.5",
+        "1e3",
+        "nan",
+        "inf",
+        "True",
+        "None",
+        "feed",
+        "'feed'",
+        "b'feed'",
+        "[1, 2]",
+        "(1,)",
+        "{'a': 1}",
+        "1j",
+    ]
+
+    def test_same_as_literal_eval(self):
+        for dtype, convert in CSV_CONVERTERS.items():
+            for value in self.VALUES:
+                with self.subTest(dtype=dtype, value=value):
+                    expected = convert_literal(value)
+                    converted = convert(value)
+                    self.assertEqual(type(converted), type(expected))
+                    self.assertEqual(converted, expected)
+
+    def test_infer_schema(self):
+        self.assertEqual(
+            infer_schema(
+                ["int", "float", "str", "empty"],
+                [
+                    {"int": "1", "float": "1", "str": "1", "empty": ""},
+                    {"int": "2", "float": "2.5", "str": "a", "empty": ""},
+                ],
+            ),
+            {"int": "int", "float": "float", "str": "str", "empty": "str"},
+        )
+
+
+class TestCSVSourceStream(TestCSVSource):
+    async def setUpSource(self):
+        return CSVSource(
+            CSVSourceConfig(
+                filename=self.testfile,
+                allowempty=True,
+                readwrite=True,
+                stream=True,
+            )
+        )
+
+    async def write_and_stream(self, records, *update):
+        """
+        Write records to a file with the in memory CSVSource then update it
+        with a streaming CSVSource. Returns the records streamed back.
+        """
+        async with CSVSource(
+            CSVSourceConfig(
+                filename=self.testfile, allowempty=True, readwrite=True
+            )
+        ) as source:
+            async with source() as sctx:
+                for record in records:
+                    await sctx.update(record)
+        source = await self.setUpSource()
+        async with source:
+            async with source() as sctx:
+                for record in update:
+                    await sctx.update(record)
+        async with source:
+            async with source() as sctx:
+                return {record.key: record async for record in sctx.records()}
+
+    async def test_append(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, "test.csv")
+            records = await self.write_and_stream(
+                [Record("0", data={"features": {"feed": 1, "face": 2}})],
+                Record("1", data={"features": {"feed": 3}}),
+            )
+            self.assertEqual(records["0"].features(), {"feed": 1, "face": 2})
+            self.assertEqual(records["1"].features(), {"feed": 3})
+            # Appended rows leave the existing ones untouched
+            with open(self.testfile) as fd:
+                lines = fd.read().split("\n")
+            self.assertEqual(
+                lines[:3],
+                ["key,tag,face,feed", "0,untagged,2,1", "1,untagged,,3"],
+            )
+
+    async def test_rewrite(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, "test.csv")
+            records = await self.write_and_stream(
+                [
+                    Record("0", data={"features": {"feed": 1}}),
+                    Record("1", data={"features": {"feed": 2}}),
+                ],
+                Record("1", data={"features": {"feed": 3, "face": 4}}),
+                Record("2", data={"features": {"face": 5}}),
+            )
+            self.assertEqual(
+                {key: record.features() for key, record in records.items()},
+                {
+                    "0": {"feed": 1},
+                    "1": {"feed": 3, "face": 4},
+                    "2": {"face": 5},
+                },
+            )
+            self.assertFalse(
+                os.path.exists(os.path.join(testdir, ".tmp.test.csv"))
+            )
+
+    async def test_journal(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, "test.csv")
+            source = await self.setUpSource()
+            async with source:
+                async with source() as sctx:
+                    await sctx.update(
+                        Record("0", data={"features": {"feed": 1}})
+                    )
+                    # Updates are visible before being written out
+                    record = await sctx.record("0")
+                    self.assertEqual(record.features(), {"feed": 1})
+                    self.assertFalse(os.path.exists(self.testfile))
+            self.assertTrue(os.path.exists(self.testfile))
+
+    async def test_schema_inferred_once(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, "test.csv")
+            with open(self.testfile, "w") as fd:
+                fd.write("key,count\n0,1\n1,2\n")
+            source = await self.setUpSource()
+            with patch.object(
+                dffml.source.csv,
+                "infer_schema",
+                wraps=dffml.source.csv.infer_schema,
+            ) as inferred:
+                async with source, source() as sctx:
+                    for _i in range(2):
+                        self.assertEqual(
+                            [record.key async for record in sctx.records()],
+                            ["0", "1"],
+                        )
+                        self.assertEqual(
+                            (await sctx.record("1")).features(), {"count": 2}
+                        )
+                self.assertEqual(inferred.call_count, 1)
+                # And again the next time the source is opened
+                async with source, source() as sctx:
+                    await sctx.record("1")
+                self.assertEqual(inferred.call_count, 2)
+
+    async def test_record_offsets(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, "test.csv")
+            with open(self.testfile, "w") as fd:
+                fd.write("tag,count,name\n")
+                fd.write('untagged,1,"multi\nline"\n')
+                fd.write("other,2,b\n")
+                fd.write("\n")
+                fd.write("untagged,3,c\n")
+            source = await self.setUpSource()
+            async with source, source() as sctx:
+                # Rows are looked up where they start in the file
+                for _i in range(2):
+                    self.assertEqual(
+                        (await sctx.record("1")).features(),
+                        {"count": 3, "name": "c"},
+                    )
+                    self.assertEqual(
+                        (await sctx.record("0")).features(),
+                        {"count": 1, "name": "multi\nline"},
+                    )
+                self.assertEqual((await sctx.record("2")).features(), {})
+                self.assertEqual(list(source.offsets), ["0", "1"])
+                self.assertEqual(source.offsets["0"], len("tag,count,name\n"))
+
+    async def test_rewrite_long_row(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, "test.csv")
+            with open(self.testfile, "w") as fd:
+                fd.write("key,tag,feed\n")
+                fd.write("0,untagged,1,extra\n")
+                fd.write("1,untagged\n")
+            source = await self.setUpSource()
+            async with source, source() as sctx:
+                await sctx.update(Record("1", data={"features": {"feed": 2}}))
+            with open(self.testfile) as fd:
+                self.assertEqual(
+                    fd.read().split("\n")[:3],
+                    ["key,tag,feed", "0,untagged,1", "1,untagged,2"],
+                )
+
+    async def test_lookups_close_file(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, "test.csv")
+            with open(self.testfile, "w") as fd:
+                fd.write("key,count\n0,1\n1,2\n2,3\n")
+            source = await self.setUpSource()
+            opened = []
+
+            def opener(*args):
+                fd = CSVSource.opener(source, *args)
+                opened.append(fd)
+                return fd
+
+            with patch.object(source, "opener", new=opener):
+                async with source, source() as sctx:
+                    await sctx.record("1")
+                    await sctx.records_by_keys(["0"])
+                    self.assertTrue(opened)
+                    # Lookups which stop reading early still close the file
+                    self.assertTrue(all(fd.closed for fd in opened))
+
+    async def test_journal_spill(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, "test.csv")
+            with open(self.testfile, "w") as fd:
+                fd.write("key,tag,feed\n0,untagged,0\n1,untagged,1\n")
+            source = await self.setUpSource()
+            source.config = source.config._replace(journal_size=2)
+            async with source, source() as sctx:
+                for i in [1, 2, 3, 0, 4]:
+                    await sctx.update(
+                        Record(str(i), data={"features": {"feed": i * 10}})
+                    )
+                    # At most journal_size records are kept in memory
+                    self.assertLess(len(source.mem), 2)
+                self.assertEqual(len(source.spilled), 4)
+                self.assertEqual(
+                    (await sctx.record("1")).features(), {"feed": 10}
+                )
+                self.assertEqual(
+                    {
+                        record.key: record.feature("feed")
+                        async for record in sctx.records()
+                    },
+                    {str(i): i * 10 for i in range(5)},
+                )
+                # Which journaled records have rows is found without parsing
+                # every row into a record
+                with patch.object(
+                    source, "csv_records", wraps=source.csv_records
+                ) as csv_records:
+                    await source.write_journal()
+                self.assertFalse(csv_records.called)
+                # Written again on close, using the index built by lookups
+                self.assertEqual((await sctx.record("5")).features(), {})
+                self.assertEqual(list(source.offsets), list("01234"))
+            with open(self.testfile) as fd:
+                self.assertEqual(
+                    fd.read().split("\n"),
+                    [
+                        "key,tag,feed",
+                        "0,untagged,0",
+                        "1,untagged,10",
+                        "2,untagged,20",
+                        "3,untagged,30",
+                        "4,untagged,40",
+                        "",
+                    ],
+                )
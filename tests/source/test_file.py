@@ -1,12 +1,16 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2019 Intel Corporation
+import io
+import os
+import gzip
+import tempfile
 from unittest.mock import patch, mock_open
 from contextlib import contextmanager
 from typing import AsyncIterator
 
 from dffml.record import Record
 from dffml.source.source import BaseSourceContext
-from dffml.source.file import FileSource, FileSourceConfig
+from dffml.source.file import FileSource, FileSourceConfig, ThreadedReader
 from dffml.util.cli.arg import Arg, parse_unknown
 from dffml.util.asynctestcase import AsyncTestCase
 
@@ -34,7 +38,7 @@ class FakeFileSource(FileSource):
 
 
 @contextmanager
-def yield_42():
+def yield_42(*args):
     yield 42
 
 
@@ -75,6 +79,10 @@ class TestFileSource(AsyncTestCase):
                                     ),
                                     "config": {},
                                 },
+                                "compresslevel": {
+                                    "plugin": Arg(type=int, default=None),
+                                    "config": {},
+                                },
                             },
                         }
                     },
@@ -136,7 +144,7 @@ class TestFileSource(AsyncTestCase):
             async with FakeFileSource(
                 self.config("testfile.gz", readwrite=False)
             ):
-                m_open.assert_called_once_with("testfile.gz", "rt")
+                m_open.assert_called_once_with("testfile.gz", "rb")
 
     async def test_open_bz2(self):
         m_open = mock_open()
@@ -146,7 +154,7 @@ class TestFileSource(AsyncTestCase):
             async with FakeFileSource(
                 self.config("testfile.bz2", readwrite=False)
             ):
-                m_open.assert_called_once_with("testfile.bz2", "rt")
+                m_open.assert_called_once_with("testfile.bz2", "rb")
 
     async def test_open_lzma(self):
         m_open = mock_open()
@@ -156,7 +164,7 @@ class TestFileSource(AsyncTestCase):
             async with FakeFileSource(
                 self.config("testfile.lzma", readwrite=False)
             ):
-                m_open.assert_called_once_with("testfile.lzma", "rt")
+                m_open.assert_called_once_with("testfile.lzma", "rb")
 
     async def test_open_xz(self):
         m_open = mock_open()
@@ -166,7 +174,7 @@ class TestFileSource(AsyncTestCase):
             async with FakeFileSource(
                 self.config("testfile.xz", readwrite=False)
             ):
-                m_open.assert_called_once_with("testfile.xz", "rt")
+                m_open.assert_called_once_with("testfile.xz", "rb")
 
     async def test_open_zip(self):
         source = FakeFileSource(self.config("testfile.zip", readwrite=False))
@@ -239,6 +247,30 @@ class TestFileSource(AsyncTestCase):
                 pass
             self.assertEqual(source.dumped_fd, 42)
 
+    async def test_close_gz_compresslevel(self):
+        m_open = mock_open()
+        with patch("os.path.exists", return_value=False), patch(
+            "gzip.open", m_open
+        ):
+            async with FakeFileSource(
+                self.config("testfile.gz")._replace(compresslevel=1)
+            ):
+                pass
+            m_open.assert_called_once_with(
+                "testfile.gz", "wt", compresslevel=1
+            )
+
+    async def test_close_xz_compresslevel(self):
+        m_open = mock_open()
+        with patch("os.path.exists", return_value=False), patch(
+            "lzma.open", m_open
+        ):
+            async with FakeFileSource(
+                self.config("testfile.xz")._replace(compresslevel=1)
+            ):
+                pass
+            m_open.assert_called_once_with("testfile.xz", "wt", preset=1)
+
     async def test_close_readonly(self):
         m_open = mock_open()
         with patch("os.path.exists", return_value=False), patch(
@@ -249,3 +281,45 @@ class TestFileSource(AsyncTestCase):
             ):
                 pass
             m_open.assert_not_called()
+
+
+class TestThreadedReader(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.data = b"".join(b"line %d\n" % (i,) for i in range(1000))
+
+    def test_read(self):
+        with patch.object(ThreadedReader, "CHUNK_SIZE", 100):
+            with io.BufferedReader(
+                ThreadedReader(io.BytesIO(self.data))
+            ) as fd:
+                self.assertEqual(fd.readline(), b"line 0\n")
+                self.assertEqual(fd.read(), self.data[len(b"line 0\n") :])
+
+    def test_close_before_end(self):
+        with patch.object(ThreadedReader, "CHUNK_SIZE", 10), patch.object(
+            ThreadedReader, "BUFFERS", 1
+        ):
+            reader = ThreadedReader(io.BytesIO(self.data))
+            with io.BufferedReader(reader) as fd:
+                fd.read(5)
+            self.assertFalse(reader.thread.is_alive())
+
+    def test_error(self):
+        fileobj = io.BytesIO(self.data)
+        fileobj.close()
+        with io.BufferedReader(ThreadedReader(fileobj)) as fd:
+            with self.assertRaises(ValueError):
+                fd.read()
+
+    def test_opener_gz(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "testfile.gz")
+            with gzip.open(filename, "wb") as fd:
+                fd.write(self.data)
+            source = FakeFileSource(self.config(filename))
+            with source.opener() as fd:
+                self.assertEqual(fd.read(), self.data.decode())
+
+    def config(self, filename):
+        return FileSourceConfig(filename=filename)
@@ -1,7 +1,13 @@
+import gzip
 import json
+import struct
 import pathlib
 import hashlib
+import unittest
+import tempfile
+import importlib.util
 
+from dffml.record import Record
 from dffml.util.net import cached_download
 from dffml.util.asynctestcase import AsyncTestCase
 
@@ -57,3 +63,78 @@ class TestIDXSources(AsyncTestCase):
                             ).encode()
                         ).hexdigest()
                         self.assertEqual(is_hash, IDX3_FIRST_LAST[i])
+
+
+@unittest.skipIf(
+    importlib.util.find_spec("numpy") is None,
+    "numpy is required to memory map IDX files",
+)
+class TestIDXSourcesMmap(AsyncTestCase):
+    LABELS = [5, 0, 4]
+    IMAGES = [[0, 1, 2, 3], [4, 5, 6, 7], [252, 253, 254, 255]]
+
+    def setUp(self):
+        super().setUp()
+        self._tempdir = tempfile.TemporaryDirectory()
+        self.tempdir = pathlib.Path(self._tempdir.name)
+        idx1 = struct.pack(">II", 2049, len(self.LABELS)) + bytes(self.LABELS)
+        idx3 = struct.pack(">IIII", 2051, len(self.IMAGES), 2, 2) + bytes(
+            sum(self.IMAGES, [])
+        )
+        for name, contents in [("labels.idx1", idx1), ("images.idx3", idx3)]:
+            (self.tempdir / name).write_bytes(contents)
+            with gzip.open(self.tempdir / (name + ".gz"), "wb") as fd:
+                fd.write(contents)
+
+    def tearDown(self):
+        super().tearDown()
+        self._tempdir.cleanup()
+
+    async def test_idx1(self):
+        for filename in ["labels.idx1", "labels.idx1.gz"]:
+            with self.subTest(filename=filename):
+                async with IDX1Source(
+                    IDX1SourceConfig(
+                        filename=str(self.tempdir / filename),
+                        feature="label",
+                        mmap=True,
+                    )
+                ) as source:
+                    async with source() as sctx:
+                        self.assertEqual(
+                            [
+                                record.feature("label")
+                                async for record in sctx.records()
+                            ],
+                            self.LABELS,
+                        )
+                        arrays = await sctx.arrays(["label"])
+                        self.assertEqual(
+                            arrays["label"].tolist(), self.LABELS
+                        )
+
+    async def test_idx3(self):
+        for filename in ["images.idx3", "images.idx3.gz"]:
+            with self.subTest(filename=filename):
+                async with IDX3Source(
+                    IDX3SourceConfig(
+                        filename=str(self.tempdir / filename),
+                        feature="image",
+                        mmap=True,
+                    )
+                ) as source:
+                    async with source() as sctx:
+                        record = await sctx.record("2")
+                        self.assertEqual(
+                            record.feature("image").tolist(), self.IMAGES[2]
+                        )
+                        self.assertEqual(
+                            len([record async for record in sctx.records()]),
+                            len(self.IMAGES),
+                        )
+                        await sctx.update(Record("new"))
+                        self.assertIsNone(await sctx.arrays(["image"]))
+                        self.assertEqual(
+                            [record.key async for record in sctx.records()],
+                            ["0", "1", "2", "new"],
+                        )
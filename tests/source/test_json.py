@@ -1,6 +1,17 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2019 Intel Corporation
-from dffml.source.json import JSONSource, JSONSourceConfig
+import os
+import json
+import tempfile
+from unittest.mock import patch
+
+from dffml.record import Record
+from dffml.source.json import (
+    JSONSource,
+    JSONSourceConfig,
+    JSONLinesSource,
+    JSONLinesSourceConfig,
+)
 from dffml.util.testing.source import FileSourceTest
 from dffml.util.asynctestcase import AsyncTestCase
 
@@ -12,3 +23,154 @@ class TestJSONSource(FileSourceTest, AsyncTestCase):
                 filename=self.testfile, allowempty=True, readwrite=True
             )
         )
+
+
+class TestJSONLinesSource(FileSourceTest, AsyncTestCase):
+    async def setUpSource(self):
+        return JSONLinesSource(
+            JSONLinesSourceConfig(
+                filename=self.testfile, allowempty=True, readwrite=True
+            )
+        )
+
+    async def update(self, *records, **kwargs):
+        async with JSONLinesSource(
+            JSONLinesSourceConfig(
+                filename=self.testfile,
+                allowempty=True,
+                readwrite=True,
+                **kwargs,
+            )
+        ) as source:
+            async with source() as sctx:
+                for record in records:
+                    await sctx.update(record)
+
+    async def stream(self):
+        async with JSONLinesSource(
+            JSONLinesSourceConfig(filename=self.testfile)
+        ) as source:
+            async with source() as sctx:
+                return {
+                    record.key: record.features()
+                    async for record in sctx.records()
+                }
+
+    def lines(self):
+        with open(self.testfile) as fd:
+            return fd.read().splitlines()
+
+    async def test_append_and_compact(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, "records.jsonl")
+            await self.update(
+                *[
+                    Record(str(i), data={"features": {"i": i}})
+                    for i in range(4)
+                ]
+            )
+            self.assertEqual(len(self.lines()), 4)
+            # Updates are appended, the last line of a record wins
+            await self.update(Record("1", data={"features": {"i": 10}}))
+            self.assertEqual(len(self.lines()), 5)
+            self.assertEqual(
+                await self.stream(),
+                {"0": {"i": 0}, "1": {"i": 10}, "2": {"i": 2}, "3": {"i": 3}},
+            )
+            # More than a quarter of the lines would be outdated
+            await self.update(
+                Record("2", data={"features": {"i": 20}}), compact=0.25
+            )
+            self.assertEqual(len(self.lines()), 4)
+            self.assertEqual(
+                await self.stream(),
+                {"0": {"i": 0}, "1": {"i": 10}, "2": {"i": 20}, "3": {"i": 3}},
+            )
+            self.assertEqual(
+                [json.loads(line)["key"] for line in self.lines()],
+                ["0", "3", "1", "2"],
+            )
+
+    async def test_record_seeks_to_last_line(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            for filename in ["records.jsonl", "records.jsonl.gz"]:
+                self.testfile = os.path.join(testdir, filename)
+                with self.subTest(filename=filename):
+                    await self.update(
+                        *[
+                            Record(str(i), data={"features": {"i": i}})
+                            for i in range(4)
+                        ]
+                    )
+                    await self.update(
+                        Record("1", data={"features": {"i": 10}})
+                    )
+                    async with JSONLinesSource(
+                        JSONLinesSourceConfig(filename=self.testfile)
+                    ) as source:
+                        async with source() as sctx:
+                            with patch.object(
+                                source, "parse_line", wraps=source.parse_line
+                            ) as parse_line:
+                                self.assertEqual(
+                                    {
+                                        key: record.features()
+                                        for key, record in (
+                                            await sctx.records_by_keys(
+                                                ["2", "1", "5"]
+                                            )
+                                        ).items()
+                                    },
+                                    {"2": {"i": 2}, "1": {"i": 10}, "5": {}},
+                                )
+                    if not filename.endswith(".gz"):
+                        # Only the lines of the records looked up are parsed
+                        self.assertEqual(parse_line.call_count, 2)
+
+    async def test_lines_not_written_by_source(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, "records.jsonl")
+            with open(self.testfile, "w", newline="") as fd:
+                fd.write('{"key": "a", "features": {"i": 1}}\r\n')
+                fd.write('{"features": {"i": 2}, "key": "a", "tag": "x"}\n')
+                fd.write('{"tag":"untagged","key":"b","features":{"i":3}}\n')
+            self.assertEqual(
+                await self.stream(), {"a": {"i": 1}, "b": {"i": 3}}
+            )
+            await self.update(Record("c", data={"features": {"i": 4}}))
+            async with JSONLinesSource(
+                JSONLinesSourceConfig(filename=self.testfile)
+            ) as source:
+                async with source() as sctx:
+                    self.assertEqual(
+                        (await sctx.record("b")).features(), {"i": 3}
+                    )
+                    self.assertEqual(
+                        (await sctx.record("c")).features(), {"i": 4}
+                    )
+
+    async def test_lookups_close_file(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, "records.jsonl.gz")
+            await self.update(
+                *[
+                    Record(str(i), data={"features": {"i": i}})
+                    for i in range(3)
+                ]
+            )
+            source = JSONLinesSource(
+                JSONLinesSourceConfig(filename=self.testfile)
+            )
+            opened = []
+
+            def opener(*args):
+                fd = JSONLinesSource.opener(source, *args)
+                opened.append(fd)
+                return fd
+
+            with patch.object(source, "opener", new=opener):
+                async with source, source() as sctx:
+                    await sctx.record("0")
+                    self.assertEqual(len(opened), 2)
+                    # Lookups which stop reading early still close the file
+                    self.assertTrue(all(fd.closed for fd in opened))
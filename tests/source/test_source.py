@@ -0,0 +1,60 @@
+from dffml.record import Record
+from dffml.source.source import Sources, SubsetSources
+from dffml.source.memory import MemorySource, MemorySourceConfig
+from dffml.util.asynctestcase import AsyncTestCase
+
+
+class TestSources(AsyncTestCase):
+    async def test_records_batched(self):
+        features = MemorySource(
+            MemorySourceConfig(
+                records=[
+                    Record(str(i), data={"features": {"number": i}})
+                    for i in range(5)
+                ]
+            )
+        )
+        squares = MemorySource(
+            MemorySourceConfig(
+                records=[
+                    Record(str(i), data={"features": {"square": i * i}})
+                    for i in range(5)
+                ]
+            )
+        )
+        async with Sources(features, squares) as sources:
+            async with sources() as sctx:
+                batches = [
+                    [record.features() for record in batch]
+                    async for batch in sctx.records_batched(
+                        2, lambda record: record.feature("number") != 2
+                    )
+                ]
+        self.assertEqual(
+            batches,
+            [
+                [{"number": 0, "square": 0}, {"number": 1, "square": 1}],
+                [{"number": 3, "square": 9}],
+                [{"number": 4, "square": 16}],
+            ],
+        )
+
+    async def test_subset_records_batched(self):
+        source = MemorySource(
+            MemorySourceConfig(records=[Record(str(i)) for i in range(5)])
+        )
+        async with SubsetSources(source, keys=["1", "2", "4"]) as sources:
+            async with sources() as sctx:
+                self.assertEqual(
+                    [
+                        [record.key for record in batch]
+                        async for batch in sctx.records_batched(
+                            2, lambda record: record.key != "2"
+                        )
+                    ],
+                    [["1"], ["4"]],
+                )
+                self.assertEqual(
+                    [record.key async for record in sctx.records()],
+                    ["1", "2", "4"],
+                )
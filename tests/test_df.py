@@ -1,4 +1,5 @@
 import sys
+import pickle
 import contextlib
 from unittest.mock import patch, MagicMock
 from typing import List
@@ -249,6 +250,29 @@ class MockIterEntryPoints(AsyncTestCase):
         self.exit_stack.__exit__(None, None, None)
 
 
+class TestInput(AsyncTestCase):
+    def test_uid(self):
+        first = Input(value=1, definition=definitions[4])
+        second = Input(value=2, definition=definitions[4])
+        self.assertIsInstance(first.uid, int)
+        self.assertGreater(second.uid, first.uid)
+        # uuid is only created when asked for
+        self.assertIsNone(first._uuid)
+        self.assertEqual(first.uuid, first.uuid)
+        self.assertNotEqual(first.uuid, second.uuid)
+
+    def test_pickle(self):
+        item = Input(value=1, definition=definitions[4])
+        unpickled = pickle.loads(pickle.dumps(item))
+        self.assertEqual(unpickled.value, item.value)
+        self.assertEqual(unpickled.uuid, item.uuid)
+        self.assertNotEqual(unpickled.uid, item.uid)
+
+    def test_slots(self):
+        item = Input(value=1, definition=definitions[4])
+        self.assertFalse(hasattr(item, "__dict__"))
+
+
 class TestOperation(MockIterEntryPoints):
     entrypoints = {
         "dffml.operation": {
@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2019 Intel Corporation
+import pickle
 import unittest
 
 from dffml.record import RecordPrediction, RecordData, Record
@@ -51,6 +52,14 @@ class TestRecordData(unittest.TestCase):
     def test_null_dict_no_prediction(self):
         self.assertNotIn("prediction", self.null.dict())
 
+    def test_null_lazy(self):
+        self.assertEqual(self.null.dict(), {"key": ""})
+        self.assertIsNone(self.null._features)
+        self.assertIsNone(self.null._prediction)
+        self.assertIsNone(self.null._last_updated_default)
+        self.assertEqual(self.null.features, {})
+        self.assertEqual(self.null.dict(), {"key": ""})
+
 
 class TestRecord(unittest.TestCase):
     def setUp(self):
@@ -72,7 +81,7 @@ class TestRecord(unittest.TestCase):
         repr(self.full)
 
     def test_str(self):
-        self.full.prediction = RecordPrediction()
+        self.full.data.prediction = {}
         self.assertIn("Undetermined", str(self.full))
         self.full.data.prediction = {
             "Prediction": RecordPrediction(value="Good")
@@ -89,6 +98,54 @@ class TestRecord(unittest.TestCase):
         self.assertIn("half", null.extra)
         self.assertTrue(null.extra["half"])
 
+    def test_merge_features_predictions(self):
+        record = Record(
+            "full",
+            data=dict(
+                features=dict(dead="beef", numbers=[1]),
+                prediction=dict(first=dict(value="feed", confidence=0.5)),
+            ),
+        )
+        features = record.data.features
+        record.merge(
+            Record(
+                "full",
+                data=dict(
+                    features=dict(dead="face", feed="face", numbers=[2]),
+                    prediction=dict(
+                        first=dict(value="other", confidence=0.9),
+                        second=dict(value="face", confidence=0.42),
+                    ),
+                    last_updated="2020-01-02T03:04:05Z",
+                ),
+            )
+        )
+        self.assertIs(features, record.data.features)
+        self.assertEqual(
+            record.features(),
+            {"dead": "beef", "feed": "face", "numbers": [1, 2]},
+        )
+        self.assertEqual(record.prediction("first").value, "feed")
+        self.assertIsInstance(record.prediction("second"), RecordPrediction)
+        self.assertEqual(record.prediction("second").confidence, 0.42)
+        self.assertEqual(
+            record.export()["last_updated"], "2020-01-02T03:04:05Z"
+        )
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            self.null.prediction = RecordPrediction()
+        with self.assertRaises(AttributeError):
+            self.null.data.extra = {}
+
+    def test_pickle(self):
+        self.full.predicted("target_name", "feed", 1.00)
+        loaded = pickle.loads(pickle.dumps(self.full))
+        self.assertEqual(loaded.export(), self.full.export())
+        self.assertIsInstance(
+            loaded.prediction("target_name"), RecordPrediction
+        )
+
     def test_key(self):
         return self.full.data.key
 